@@ -3,8 +3,12 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
-from .models import AssetType, Manufacturer, Asset, AssetSpecification, AssetLog, MaintenanceRecord
+from capacity.budget import refresh_footprints
+from sync.log import record_objects
+from sync.models import Change
+from .models import AssetType, Manufacturer, Asset, AssetSpecification, AssetLog, MaintenanceRecord, AssignmentRule
 
 @admin.register(AssetType)
 class AssetTypeAdmin(admin.ModelAdmin):
@@ -97,6 +101,7 @@ class AssetAdmin(admin.ModelAdmin):
         'description'
     )
     readonly_fields = ('created_at', 'updated_at', 'warranty_status_display', 'maintenance_due_display')
+    autocomplete_fields = ('depends_on', 'space')
     
     fieldsets = (
         ('Basic Information', {
@@ -113,9 +118,11 @@ class AssetAdmin(admin.ModelAdmin):
         ('Location & Assignment', {
             'fields': (
                 'location',
+                'space',
                 'assigned_to',
                 'status',
-                'priority'
+                'priority',
+                'depends_on'
             )
         }),
         ('Dates & Warranty', {
@@ -201,21 +208,29 @@ class AssetAdmin(admin.ModelAdmin):
     maintenance_due_display.short_description = 'Maintenance Due'
     
     # Admin actions
+    def set_status(self, queryset, status):
+        # update() sends no signals; record the change for the mobile clients and the capacity totals
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = Asset.objects.filter(pk__in=ids).update(status=status, updated_at=timezone.now())
+        record_objects(Change.ASSET, ids)
+        refresh_footprints(ids)
+        return updated
+    
     def mark_as_active(self, request, queryset):
         """Mark selected assets as active"""
-        updated = queryset.update(status='active')
+        updated = self.set_status(queryset, 'active')
         self.message_user(request, f'{updated} assets marked as active.')
     mark_as_active.short_description = "Mark selected assets as active"
     
     def mark_as_maintenance(self, request, queryset):
         """Mark selected assets as under maintenance"""
-        updated = queryset.update(status='maintenance')
+        updated = self.set_status(queryset, 'maintenance')
         self.message_user(request, f'{updated} assets marked as under maintenance.')
     mark_as_maintenance.short_description = "Mark selected assets as under maintenance"
     
     def mark_as_faulty(self, request, queryset):
         """Mark selected assets as faulty"""
-        updated = queryset.update(status='faulty')
+        updated = self.set_status(queryset, 'faulty')
         self.message_user(request, f'{updated} assets marked as faulty.')
     mark_as_faulty.short_description = "Mark selected assets as faulty"
 
@@ -345,6 +360,16 @@ class MaintenanceRecordAdmin(admin.ModelAdmin):
         return 'Yes' if obj.is_overdue else 'No'
     is_overdue_display.short_description = 'Is Overdue'
 
+@admin.register(AssignmentRule)
+class AssignmentRuleAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for AssignmentRule model.
+    """
+    list_display = ('asset_type', 'location', 'department', 'is_active')
+    list_filter = ('is_active', 'asset_type', 'location', 'department')
+    search_fields = ('asset_type__name', 'location__name', 'department')
+    list_editable = ('is_active',)
+
 # Customize the admin site header
 admin.site.site_header = "Knowledge Engine - Asset Management"
 admin.site.site_title = "Knowledge Engine Admin"
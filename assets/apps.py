@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assets'
+
+    def ready(self):
+        # Connect the signal handlers that invalidate cached profile fragments
+        from . import signals  # noqa: F401
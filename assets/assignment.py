@@ -0,0 +1,174 @@
+# assets/assignment.py
+
+import heapq
+import itertools
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Asset, AssetLog, AssignmentRule
+from .utils import invalidate_user_asset_caches
+from .management.batch import DEFAULT_CHUNK_SIZE, bulk_update_fields, iter_chunks
+from users.models import CustomUser
+
+# Departments used when no assignment rule matches an asset.
+DEFAULT_DEPARTMENTS = ('IT',)
+
+# Asset fields the engine reads and writes; load assets with .only(*ASSIGNMENT_FIELDS).
+ASSIGNMENT_FIELDS = ('id', 'asset_tag', 'asset_type', 'location', 'assigned_to')
+
+
+class AssignmentEngine:
+    """
+    Assigns unassigned assets to users following the AssignmentRule table.
+
+    All active users are loaded once with their current asset counts and
+    indexed by (location, department). For every asset the most specific
+    matching rules give the eligible departments; the candidate pool is the
+    users of those departments at the asset's location, widened to any
+    location and finally to all users when nobody qualifies. Each pool keeps
+    a min-heap on asset count so the least loaded user is picked in
+    O(log n), and counts are shared across pools so load stays balanced
+    when users belong to several pools.
+    """
+    def __init__(self, users=None):
+        if users is None:
+            users = CustomUser.objects.filter(is_active=True)
+        users = list(users.annotate(asset_count=Count('assigned_assets')).order_by('pk'))
+
+        self.users = {user.pk: user for user in users}
+        self.counts = {user.pk: user.asset_count for user in users}
+
+        self.by_location_department = {}
+        self.by_department = {}
+        for user in users:
+            self.by_location_department.setdefault((user.location_id, user.department), []).append(user.pk)
+            self.by_department.setdefault(user.department, []).append(user.pk)
+
+        # Rules keyed by (asset_type_id, location_id), None meaning "any"
+        self.rules = {}
+        for asset_type_id, location_id, department in AssignmentRule.objects.filter(
+            is_active=True
+        ).values_list('asset_type_id', 'location_id', 'department'):
+            self.rules.setdefault((asset_type_id, location_id), set()).add(department)
+
+        self.pools = {}
+        self.tiebreak = itertools.count()
+
+    def departments_for(self, asset):
+        """
+        Return the departments responsible for an asset, from the most
+        specific matching rules: type and location, then type only, then
+        location only, then rules with neither.
+        """
+        for key in (
+            (asset.asset_type_id, asset.location_id),
+            (asset.asset_type_id, None),
+            (None, asset.location_id),
+            (None, None),
+        ):
+            departments = self.rules.get(key)
+            if departments:
+                return tuple(sorted(departments))
+        return DEFAULT_DEPARTMENTS
+
+    def candidates(self, location_id, departments):
+        """
+        Return the ids of the users eligible for an asset at a location,
+        falling back from same-location to same-department to everyone.
+        """
+        local = [
+            pk
+            for department in departments
+            for pk in self.by_location_department.get((location_id, department), [])
+        ]
+        if local:
+            return local
+        anywhere = [pk for department in departments for pk in self.by_department.get(department, [])]
+        return anywhere or list(self.users)
+
+    def pick(self, asset):
+        """
+        Choose the least loaded eligible user for an asset and count the
+        asset against them. Returns None if there are no active users.
+        """
+        if not self.users:
+            return None
+
+        key = (asset.location_id, self.departments_for(asset))
+        heap = self.pools.get(key)
+        if heap is None:
+            heap = [(self.counts[pk], next(self.tiebreak), pk) for pk in self.candidates(*key)]
+            heapq.heapify(heap)
+            self.pools[key] = heap
+
+        # Entries go stale when a user gets an asset through another pool;
+        # counts only grow, so re-push stale entries with the current count.
+        while True:
+            count, _, pk = heap[0]
+            if count == self.counts[pk]:
+                break
+            heapq.heapreplace(heap, (self.counts[pk], next(self.tiebreak), pk))
+
+        self.counts[pk] += 1
+        heapq.heapreplace(heap, (self.counts[pk], next(self.tiebreak), pk))
+        return self.users[pk]
+
+    def assign(self, chunks, performed_by=None, dry_run=False):
+        """
+        Assign unassigned assets, given as an iterable of lists of assets
+        (e.g. iter_chunks() or a BatchJob over a queryset loaded with
+        .only(*ASSIGNMENT_FIELDS)).
+
+        Each chunk is saved with one bulk update and one bulk insert of
+        'assignment_change' log entries. Returns the number of assets assigned.
+        """
+        assigned = 0
+
+        for chunk in chunks:
+            pairs = []
+            for asset in chunk:
+                user = self.pick(asset)
+                if user is None:
+                    return assigned
+                asset.assigned_to = user
+                pairs.append((asset, user))
+
+            if not dry_run:
+                with transaction.atomic():
+                    bulk_update_fields(chunk, ['assigned_to'])
+                    AssetLog.objects.bulk_create([
+                        AssetLog(
+                            asset=asset,
+                            event_type='assignment_change',
+                            description=f'Asset automatically assigned to {user.full_name}',
+                            user=performed_by,
+                            old_value='Unassigned',
+                            new_value=user.full_name
+                        )
+                        for asset, user in pairs
+                    ])
+                # Bulk writes skip the model signals, so invalidate directly
+                invalidate_user_asset_caches(*{user.pk for _, user in pairs})
+
+            assigned += len(pairs)
+
+        return assigned
+
+
+def get_unassigned_assets():
+    """
+    Return the assets waiting for assignment, loading only the fields the engine needs.
+    Decommissioned assets are left alone.
+    """
+    return Asset.objects.filter(
+        assigned_to__isnull=True
+    ).exclude(status='decommissioned').only(*ASSIGNMENT_FIELDS)
+
+
+def auto_assign_unassigned(performed_by=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Assign every currently unassigned asset in one pass.
+    """
+    chunks = iter_chunks(get_unassigned_assets(), chunk_size)
+    return AssignmentEngine().assign(chunks, performed_by=performed_by, dry_run=dry_run)
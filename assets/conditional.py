@@ -0,0 +1,126 @@
+# assets/conditional.py
+
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Exists, F, Func, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from .models import Asset, AssetLog, MaintenanceRecord
+from .utils import filter_assets
+from telemetry.models import Rollup, RollupWatermark
+
+
+def get_asset_detail_version(request, asset_tag):
+    """
+    Return (last_modified, parts) for an asset's detail page in one query:
+    the asset's own updated_at (also touched when its specifications
+    change), its latest log entry and the latest change to, and number of,
+    its maintenance records. For assets that report telemetry, the minute
+    roll-up watermark too, as the page shows roll-ups up to it.
+    """
+    latest_log = AssetLog.objects.filter(
+        asset=OuterRef('pk')
+    ).order_by('-timestamp').values('timestamp')[:1]
+    latest_maintenance = MaintenanceRecord.objects.filter(
+        asset=OuterRef('pk')
+    ).order_by('-updated_at').values('updated_at')[:1]
+    maintenance_count = MaintenanceRecord.objects.filter(
+        asset=OuterRef('pk')
+    ).order_by().values('asset').annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    telemetry_watermark = RollupWatermark.objects.filter(resolution=Rollup.MINUTE).values('processed_until')
+
+    row = Asset.objects.filter(asset_tag=asset_tag).annotate(
+        last_log=Subquery(latest_log),
+        maintenance_updated=Subquery(latest_maintenance),
+        maintenance_count=Subquery(maintenance_count),
+        has_telemetry=Exists(Rollup.objects.filter(asset=OuterRef('pk'), resolution=Rollup.MINUTE)),
+        telemetry_watermark=Subquery(telemetry_watermark),
+    ).values_list(
+        'updated_at', 'last_log', 'maintenance_updated', 'maintenance_count', 'has_telemetry', 'telemetry_watermark'
+    ).first()
+    if row is None:
+        return None
+    # The watermark moves every minute; only pages showing telemetry depend on it
+    row = row[:4] + (row[5] if row[4] else None,)
+    return max(value for value in row[:3] if value is not None), row
+
+
+def get_asset_list_version(request, **kwargs):
+    """
+    Return (last_modified, parts) for the asset list in one query: the
+    latest updated_at and the number of assets matching the request's
+    filters, plus the same over all assets (the filter options are built
+    from every asset, and counts catch deletions).
+    """
+    matching = Q(pk__in=filter_assets(Asset.objects.all(), request.GET).values('pk'))
+    version = Asset.objects.aggregate(
+        last_updated=Max('updated_at', filter=matching),
+        count=Count('pk', filter=matching),
+        all_last_updated=Max('updated_at'),
+        all_count=Count('pk'),
+    )
+    return version['all_last_updated'], tuple(version.values())
+
+
+def get_asset_table_version(request, **kwargs):
+    """
+    Return (last_modified, parts) for pages built from all assets, such as
+    the status summary: the latest updated_at and the number of assets.
+    """
+    version = Asset.objects.aggregate(last_updated=Max('updated_at'), count=Count('pk'))
+    return version['last_updated'], tuple(version.values())
+
+
+def conditional_asset_view(get_version):
+    """
+    Answer GET and HEAD requests with 304 Not Modified when the data a page
+    is built from has not changed, without running the view.
+
+    get_version(request, *args, **kwargs) returns (last_modified, parts) from
+    a cheap query, or None when the page should always be rendered. The ETag
+    combines those parts with the user (pages show who is logged in, and
+    their CSRF token changes at every login) and today's date (maintenance
+    due and warranty states depend on it). Responses are marked private and
+    must be revalidated, so browsers always ask but rarely download.
+
+    Only the ETag decides whether to answer 304: Last-Modified is sent for
+    information but cannot see deletions or the user and date changing.
+    Apply below @login_required.
+    """
+    def validators(request, *args, **kwargs):
+        # Computed once per request; the response reuses it for Last-Modified
+        if not hasattr(request, '_asset_validators'):
+            version = None
+            # Pending flash messages are shown once, so such pages must render
+            if request.method in ('GET', 'HEAD') and not len(messages.get_messages(request)):
+                version = get_version(request, *args, **kwargs)
+            request._asset_validators = version
+        return request._asset_validators
+
+    def etag(request, *args, **kwargs):
+        version = validators(request, *args, **kwargs)
+        if version is None:
+            return None
+        user = request.user
+        parts = (user.pk, user.login_time, timezone.localdate(), request.get_full_path(), *version[1])
+        return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag)(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            version = getattr(request, '_asset_validators', None)
+            if version is not None and response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+                if version[0] is not None and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(version[0].timestamp())
+            return response
+        return _wrapped_view
+    return decorator
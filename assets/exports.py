@@ -0,0 +1,138 @@
+# assets/exports.py
+
+import csv
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Asset, AssetSpecification
+
+# Number of rows fetched from the database cursor per round trip.
+# Large enough to keep the query overhead low, small enough to keep memory flat.
+EXPORT_CHUNK_SIZE = 2000
+
+# Fixed columns written before the pivoted specification columns.
+SPEC_MATRIX_BASE_COLUMNS = ['Asset Tag', 'Name', 'Location', 'Status']
+
+# Columns of the asset list export as (header, queryset lookup) pairs.
+# Lookups span foreign keys so rows can be read with values_list()
+# without loading model instances.
+ASSET_EXPORT_FIELDS = [
+    ('asset_tag', 'asset_tag'),
+    ('name', 'name'),
+    ('asset_type', 'asset_type__name'),
+    ('manufacturer', 'manufacturer__name'),
+    ('model_number', 'model_number'),
+    ('serial_number', 'serial_number'),
+    ('location', 'location__name'),
+    ('assigned_to', 'assigned_to__username'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('purchase_date', 'purchase_date'),
+    ('installation_date', 'installation_date'),
+    ('warranty_expiry', 'warranty_expiry'),
+    ('last_maintenance', 'last_maintenance'),
+    ('next_maintenance', 'next_maintenance'),
+    ('updated_at', 'updated_at'),
+]
+
+# Byte order mark so spreadsheet applications (Excel, LibreOffice) detect UTF-8.
+UTF8_BOM = '\ufeff'
+
+
+class Echo:
+    """
+    File-like object that returns what is written to it instead of buffering it.
+    Lets csv.writer produce lines one at a time for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+def get_specification_columns(asset_type):
+    """
+    Return the sorted list of specification names used by assets of a type.
+    These become the pivoted columns of the specification matrix.
+    """
+    return list(
+        AssetSpecification.objects.filter(
+            asset__asset_type=asset_type
+        ).values_list('specification_name', flat=True).distinct().order_by('specification_name')
+    )
+
+
+def format_specification(value, unit):
+    """Combine a specification value and its unit into a single cell"""
+    return f"{value} {unit}" if unit else value
+
+
+def iter_specification_matrix(asset_type, columns=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one row per asset of the given type, with specifications as columns.
+
+    The rows come from a single query over assets left-joined to their
+    specifications and ordered by asset tag, so consecutive rows of the same
+    asset can be folded together without holding more than one asset in memory.
+    The first yielded row is the header.
+    """
+    if columns is None:
+        columns = get_specification_columns(asset_type)
+    column_index = {name: i for i, name in enumerate(columns)}
+
+    yield SPEC_MATRIX_BASE_COLUMNS + columns
+
+    rows = Asset.objects.filter(asset_type=asset_type).order_by(
+        'asset_tag', 'specifications__specification_name'
+    ).values_list(
+        'asset_tag', 'name', 'location__name', 'status',
+        'specifications__specification_name',
+        'specifications__specification_value',
+        'specifications__unit',
+    ).iterator(chunk_size=chunk_size)
+
+    for asset_key, asset_rows in groupby(rows, key=lambda row: row[:4]):
+        specs = [''] * len(columns)
+        for row in asset_rows:
+            spec_name = row[4]
+            if spec_name is None:
+                # Asset without any specifications (left join miss)
+                continue
+            index = column_index.get(spec_name)
+            if index is not None:
+                specs[index] = format_specification(row[5], row[6])
+        yield list(asset_key) + specs
+
+
+def iter_asset_rows(queryset, header=True, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the asset list export rows for a queryset as plain tuples.
+    With header=True the first row holds the column names.
+    """
+    if header:
+        yield [name for name, _ in ASSET_EXPORT_FIELDS]
+
+    lookups = [lookup for _, lookup in ASSET_EXPORT_FIELDS]
+    yield from queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def iter_jsonl_lines(rows, fields=ASSET_EXPORT_FIELDS):
+    """
+    Encode an iterable of rows as JSON Lines, one object per row.
+    Dates and datetimes are written in ISO 8601 format.
+    """
+    names = [name for name, _ in fields]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def iter_csv_lines(rows, bom=False):
+    """
+    Encode an iterable of rows as CSV text, one line at a time.
+    With bom=True the output starts with a UTF-8 byte order mark for Excel.
+    """
+    writer = csv.writer(Echo())
+    if bom:
+        yield UTF8_BOM
+    for row in rows:
+        yield writer.writerow(row)
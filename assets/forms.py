@@ -5,6 +5,38 @@ from django.utils import timezone
 from .models import Asset, AssetType, Manufacturer, MaintenanceRecord, AssetSpecification
 from users.models import Location, CustomUser
 
+def normalize_asset_tag(asset_tag):
+    """
+    Normalize an asset tag to the stored convention (upper case, no surrounding spaces).
+    """
+    return asset_tag.strip().upper()
+
+def check_asset_dates(data):
+    """
+    Check the date relationships of an asset.
+    Returns the first problem found as a message, or None if the dates are consistent.
+    Shared by AssetForm and the bulk CSV importer so both enforce the same rules.
+    """
+    purchase_date = data.get('purchase_date')
+    installation_date = data.get('installation_date')
+    warranty_expiry = data.get('warranty_expiry')
+    last_maintenance = data.get('last_maintenance')
+    next_maintenance = data.get('next_maintenance')
+    
+    if purchase_date and installation_date:
+        if installation_date < purchase_date:
+            return "Installation date cannot be before purchase date."
+    
+    if purchase_date and warranty_expiry:
+        if warranty_expiry < purchase_date:
+            return "Warranty expiry cannot be before purchase date."
+    
+    if last_maintenance and next_maintenance:
+        if next_maintenance <= last_maintenance:
+            return "Next maintenance date must be after last maintenance date."
+    
+    return None
+
 class AssetForm(forms.ModelForm):
     """
     Form for creating and editing assets.
@@ -95,7 +127,7 @@ class AssetForm(forms.ModelForm):
         """
         Validate that asset tag is unique and follows naming convention.
         """
-        asset_tag = self.cleaned_data['asset_tag'].upper()
+        asset_tag = normalize_asset_tag(self.cleaned_data['asset_tag'])
         
         # Check if asset tag already exists (excluding current instance if editing)
         existing = Asset.objects.filter(asset_tag=asset_tag)
@@ -112,24 +144,11 @@ class AssetForm(forms.ModelForm):
         Perform cross-field validation.
         """
         cleaned_data = super().clean()
-        purchase_date = cleaned_data.get('purchase_date')
-        installation_date = cleaned_data.get('installation_date')
-        warranty_expiry = cleaned_data.get('warranty_expiry')
-        last_maintenance = cleaned_data.get('last_maintenance')
-        next_maintenance = cleaned_data.get('next_maintenance')
         
         # Validate date relationships
-        if purchase_date and installation_date:
-            if installation_date < purchase_date:
-                raise forms.ValidationError("Installation date cannot be before purchase date.")
-        
-        if purchase_date and warranty_expiry:
-            if warranty_expiry < purchase_date:
-                raise forms.ValidationError("Warranty expiry cannot be before purchase date.")
-        
-        if last_maintenance and next_maintenance:
-            if next_maintenance <= last_maintenance:
-                raise forms.ValidationError("Next maintenance date must be after last maintenance date.")
+        error = check_asset_dates(cleaned_data)
+        if error:
+            raise forms.ValidationError(error)
         
         return cleaned_data
 
@@ -219,4 +238,20 @@ AssetSpecificationFormSet = forms.inlineformset_factory(
     form=AssetSpecificationForm,
     extra=3,
     can_delete=True
-)
\ No newline at end of file
+)
+
+class AssetImportForm(forms.Form):
+    """
+    Form for uploading a CSV file of assets to create or update in bulk.
+    """
+    csv_file = forms.FileField(
+        help_text="CSV file with one asset per row, in the asset list export format",
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,text/csv'
+        })
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        help_text="Validate the file and report errors without saving anything"
+    )
@@ -0,0 +1,371 @@
+# assets/imports.py
+
+import codecs
+import csv
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .forms import check_asset_dates, normalize_asset_tag
+from .models import Asset, AssetType, Manufacturer, AssetSpecification, AssetLog
+from .utils import invalidate_user_asset_caches
+from users.utils import invalidate_profiles
+from users.models import Location, CustomUser
+from capacity.budget import refresh_footprints
+from sync.log import record_objects
+from sync.models import Change
+
+# Number of CSV rows validated and written per transaction.
+IMPORT_CHUNK_SIZE = 1000
+
+# Columns that must be present in the CSV header.
+REQUIRED_COLUMNS = ['asset_tag', 'name', 'asset_type', 'manufacturer', 'location']
+
+# Plain text columns copied onto the asset, with their maximum length.
+TEXT_COLUMNS = {
+    'name': 255,
+    'model_number': 100,
+    'serial_number': 100,
+    'description': None,
+    'notes': None,
+}
+
+DATE_COLUMNS = ['purchase_date', 'installation_date', 'warranty_expiry', 'last_maintenance', 'next_maintenance']
+
+# Columns resolved to foreign keys, mapped to the model field they set.
+FOREIGN_KEY_COLUMNS = {
+    'asset_type': 'asset_type_id',
+    'manufacturer': 'manufacturer_id',
+    'location': 'location_id',
+    'assigned_to': 'assigned_to_id',
+}
+
+CHOICE_COLUMNS = {
+    'status': (dict(Asset.STATUS_CHOICES), 'active'),
+    'priority': (dict(Asset.PRIORITY_CHOICES), 'medium'),
+}
+
+# Specification columns are named 'spec:<Specification Name>', e.g. 'spec:Power Rating'.
+SPEC_COLUMN_PREFIX = 'spec:'
+
+# Maximum lengths of a specification's name, value and unit.
+SPEC_NAME_LENGTH = AssetSpecification._meta.get_field('specification_name').max_length
+SPEC_VALUE_LENGTH = AssetSpecification._meta.get_field('specification_value').max_length
+SPEC_UNIT_LENGTH = AssetSpecification._meta.get_field('unit').max_length
+
+
+def is_utf8(f, chunk_size=1024 * 1024):
+    """
+    Whether a binary file is UTF-8 text from start to end; reads it once
+    and rewinds it. Checked before importing, since chunks are committed
+    as they go and a bad byte further down would stop the import halfway.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        f.seek(0)
+    return True
+
+
+def parse_specification(cell):
+    """
+    Split a specification cell such as '600 kVA' into its value and unit.
+    This is the inverse of exports.format_specification; cells that do not
+    start with a number are kept whole as the value.
+    """
+    value, _, unit = cell.strip().partition(' ')
+    try:
+        float(value)
+    except ValueError:
+        return cell.strip(), ''
+    return value, unit.strip()
+
+
+class ImportResult:
+    """
+    Outcome of a CSV import: counts of created/updated assets and row-level errors.
+    """
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.specifications = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+
+class AssetImporter:
+    """
+    Create or update assets (and their specifications) from CSV rows, keyed by asset tag.
+
+    Each chunk of rows is validated in a query-free pre-pass using the same
+    rules as AssetForm, with foreign keys resolved from name -> id dictionaries
+    loaded once up front. Valid rows are then upserted with
+    bulk_create(update_conflicts=True) in a single transaction per chunk.
+    Invalid rows are skipped and reported with their line number.
+    """
+    def __init__(self, user=None, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+        # Foreign key lookups, matched case-insensitively on name
+        self.lookups = {
+            'asset_type': self.build_lookup(AssetType.objects.values_list('name', 'id')),
+            'manufacturer': self.build_lookup(Manufacturer.objects.values_list('name', 'id')),
+            'location': self.build_lookup(Location.objects.values_list('name', 'id')),
+            'assigned_to': self.build_lookup(CustomUser.objects.values_list('username', 'id')),
+        }
+
+        # First line each tag/serial number was seen on, to catch duplicates within the file
+        self.seen_tags = {}
+        self.seen_serials = {}
+
+    @staticmethod
+    def build_lookup(pairs):
+        return {name.lower(): pk for name, pk in pairs}
+
+    def run(self, f):
+        """
+        Import all rows from a text file object and return an ImportResult.
+        """
+        result = ImportResult()
+        reader = csv.DictReader(f)
+
+        header = reader.fieldnames or []
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            result.add_error(1, f"Missing required column(s): {', '.join(missing)}")
+            return result
+
+        self.columns = [column for column in header if column in TEXT_COLUMNS or column in DATE_COLUMNS
+                        or column in FOREIGN_KEY_COLUMNS or column in CHOICE_COLUMNS]
+        self.spec_columns = [column for column in header if column.startswith(SPEC_COLUMN_PREFIX)]
+
+        rows = enumerate(reader, start=2)  # Line 1 is the header
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            valid = self.validate_chunk(chunk, result)
+            if not valid:
+                continue
+            if self.dry_run:
+                self.count_chunk(valid, result)
+            else:
+                self.save_chunk(valid, result)
+
+        return result
+
+    def validate_chunk(self, chunk, result):
+        """
+        Clean a chunk of (line, row) pairs and return the valid rows as dicts
+        ready to be saved. Errors are recorded on the result.
+        """
+        valid = []
+        for line, row in chunk:
+            data, errors = self.clean_row(line, row)
+            if errors:
+                for message in errors:
+                    result.add_error(line, message)
+            else:
+                valid.append(data)
+
+        # Serial numbers are unique across all assets, so a serial already
+        # used by a different asset would make the whole chunk fail on insert.
+        serials = [data['serial_number'] for data in valid if data.get('serial_number')]
+        if serials:
+            owners = dict(
+                Asset.objects.filter(serial_number__in=serials).values_list('serial_number', 'asset_tag')
+            )
+            checked = []
+            for data in valid:
+                owner = owners.get(data.get('serial_number'))
+                if owner and owner != data['asset_tag']:
+                    result.add_error(data['line'], f"Serial number {data['serial_number']} already belongs to {owner}")
+                else:
+                    checked.append(data)
+            valid = checked
+
+        return valid
+
+    def clean_row(self, line, row):
+        """
+        Validate a single CSV row. Returns (data, errors).
+        """
+        errors = []
+        data = {'line': line}
+
+        asset_tag = normalize_asset_tag(row.get('asset_tag') or '')
+        if not asset_tag:
+            errors.append("Asset tag is required.")
+        elif len(asset_tag) > 100:
+            errors.append("Asset tag is longer than 100 characters.")
+        elif asset_tag in self.seen_tags:
+            errors.append(f"Duplicate asset tag {asset_tag} (first seen on line {self.seen_tags[asset_tag]}).")
+        else:
+            self.seen_tags[asset_tag] = line
+        data['asset_tag'] = asset_tag
+
+        for column in self.columns:
+            value = (row.get(column) or '').strip()
+
+            if column in TEXT_COLUMNS:
+                max_length = TEXT_COLUMNS[column]
+                if max_length and len(value) > max_length:
+                    errors.append(f"{column} is longer than {max_length} characters.")
+                data[column] = value
+
+            elif column in DATE_COLUMNS:
+                try:
+                    data[column] = parse_date(value) if value else None
+                except ValueError:
+                    data[column] = None
+                if value and data[column] is None:
+                    errors.append(f"{column} '{value}' is not a valid date (expected YYYY-MM-DD).")
+
+            elif column in FOREIGN_KEY_COLUMNS:
+                field = FOREIGN_KEY_COLUMNS[column]
+                if not value:
+                    data[field] = None
+                    continue
+                data[field] = self.lookups[column].get(value.lower())
+                if data[field] is None:
+                    label = 'user' if column == 'assigned_to' else column.replace('_', ' ')
+                    errors.append(f"Unknown {label} '{value}'.")
+
+            elif column in CHOICE_COLUMNS:
+                choices, default = CHOICE_COLUMNS[column]
+                value = value.lower() or default
+                if value not in choices:
+                    errors.append(f"{column} '{value}' is not one of: {', '.join(choices)}.")
+                data[column] = value
+
+        if not data.get('name'):
+            errors.append("Name is required.")
+        for column in ('asset_type', 'manufacturer', 'location'):
+            if not (row.get(column) or '').strip():
+                errors.append(f"{column.replace('_', ' ').capitalize()} is required.")
+
+        # The serial number is unique but optional, so blanks are stored as NULL
+        serial_number = data.get('serial_number') or None
+        if serial_number:
+            first_line = self.seen_serials.setdefault(serial_number, line)
+            if first_line != line:
+                errors.append(f"Duplicate serial number {serial_number} (first seen on line {first_line}).")
+        if 'serial_number' in data:
+            data['serial_number'] = serial_number
+
+        date_error = check_asset_dates(data)
+        if date_error:
+            errors.append(date_error)
+
+        specifications = []
+        for column in self.spec_columns:
+            cell = (row.get(column) or '').strip()
+            if cell:
+                spec_name = column[len(SPEC_COLUMN_PREFIX):].strip()
+                value, unit = parse_specification(cell)
+                if len(spec_name) > SPEC_NAME_LENGTH:
+                    errors.append(f"Specification name '{spec_name[:20]}...' is longer than {SPEC_NAME_LENGTH} characters.")
+                elif len(value) > SPEC_VALUE_LENGTH:
+                    errors.append(f"{spec_name} is longer than {SPEC_VALUE_LENGTH} characters.")
+                elif len(unit) > SPEC_UNIT_LENGTH:
+                    errors.append(f"{spec_name} unit is longer than {SPEC_UNIT_LENGTH} characters.")
+                specifications.append((spec_name, value, unit))
+        data['specifications'] = specifications
+
+        return data, errors
+
+    def count_chunk(self, valid, result):
+        """
+        Record how many rows of a validated chunk would create or update assets.
+        Used for dry runs, where nothing is written.
+        """
+        tags = [data['asset_tag'] for data in valid]
+        existing = Asset.objects.filter(asset_tag__in=tags).count()
+        result.updated += existing
+        result.created += len(valid) - existing
+        result.specifications += sum(len(data['specifications']) for data in valid)
+
+    def save_chunk(self, valid, result):
+        """
+        Upsert a chunk of validated rows, their specifications and audit log entries.
+        """
+        fields = [FOREIGN_KEY_COLUMNS.get(column, column) for column in self.columns]
+        update_fields = fields + ['updated_at']
+        tags = [data['asset_tag'] for data in valid]
+
+        with transaction.atomic():
+            # Existing assets and their current assignees, whose cached summaries change too
+            existing = dict(Asset.objects.filter(asset_tag__in=tags).values_list('asset_tag', 'assigned_to_id'))
+
+            Asset.objects.bulk_create(
+                [Asset(asset_tag=data['asset_tag'], **{field: data[field] for field in fields}) for data in valid],
+                update_conflicts=True,
+                unique_fields=['asset_tag'],
+                update_fields=update_fields,
+            )
+
+            asset_ids = dict(Asset.objects.filter(asset_tag__in=tags).values_list('asset_tag', 'id'))
+
+            specifications = [
+                AssetSpecification(
+                    asset_id=asset_ids[data['asset_tag']],
+                    specification_name=spec_name,
+                    specification_value=value,
+                    unit=unit,
+                )
+                for data in valid
+                for spec_name, value, unit in data['specifications']
+            ]
+            if specifications:
+                AssetSpecification.objects.bulk_create(
+                    specifications,
+                    update_conflicts=True,
+                    unique_fields=['asset', 'specification_name'],
+                    update_fields=['specification_value', 'unit', 'updated_at'],
+                )
+
+            AssetLog.objects.bulk_create([
+                AssetLog(
+                    asset_id=asset_ids[data['asset_tag']],
+                    event_type='updated' if data['asset_tag'] in existing else 'created',
+                    description=(
+                        'Asset information updated from CSV import' if data['asset_tag'] in existing
+                        else 'Asset created from CSV import'
+                    ),
+                    user=self.user,
+                )
+                for data in valid
+            ])
+
+            # Bulk writes skip the model signals, so record the changes for the mobile clients directly
+            record_objects(Change.ASSET, asset_ids.values())
+            if specifications:
+                record_objects(Change.SPECIFICATION, AssetSpecification.objects.filter(
+                    asset_id__in=asset_ids.values(),
+                    specification_name__in={specification.specification_name for specification in specifications},
+                ).values('pk'))
+            # ...and bring the power and cooling totals up to date
+            refresh_footprints(asset_ids.values())
+
+        # Bulk writes skip the model signals, so invalidate directly
+        invalidate_user_asset_caches(*{data.get('assigned_to_id') for data in valid}, *set(existing.values()))
+        if self.user is not None:
+            invalidate_profiles(self.user.pk)
+
+        result.updated += len(existing)
+        result.created += len(valid) - len(existing)
+        result.specifications += len(specifications)
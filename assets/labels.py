@@ -0,0 +1,255 @@
+# assets/labels.py
+
+import hashlib
+import os
+import tempfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+
+try:
+    import segno
+except ImportError:  # Needed only to print labels; the rest of the app runs without it
+    segno = None
+
+# Where QR symbols are cached, one PBM file per content hash. Sheets reuse
+# them, so regenerating thousands of labels only encodes the new or changed ones.
+LABEL_CACHE_DIR = getattr(settings, 'ASSET_LABEL_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'labels'))
+
+# Start of the URLs encoded in the labels (e.g. https://ke.example.com); when
+# empty, the host of the request printing them.
+LABEL_BASE_URL = getattr(settings, 'ASSET_LABEL_BASE_URL', '')
+
+# QR error correction: 'l', 'm', 'q' or 'h'. Higher survives more scratches
+# and dirt, at the cost of a denser symbol.
+LABEL_ERROR_LEVEL = getattr(settings, 'ASSET_LABEL_ERROR_LEVEL', 'm')
+
+# Sheet layout in points (1/72 inch): A4 with 3 × 8 labels of 70 × 37 mm by default.
+LABEL_SHEET = {
+    'page_width': 595.28,
+    'page_height': 841.89,
+    'columns': 3,
+    'rows': 8,
+    'margin_left': 0.0,
+    'margin_top': 4.5 * 72 / 25.4,
+    'label_width': 70 * 72 / 25.4,
+    'label_height': 37 * 72 / 25.4,
+    'padding': 6.0,
+} | getattr(settings, 'ASSET_LABEL_SHEET', {})
+
+# Assets per label request at most.
+MAX_LABELS = 20_000
+
+# Modules of blank space around a QR symbol, as the standard requires
+QUIET_ZONE = 4
+
+# Characters of the asset name printed on a label at most
+NAME_LENGTH = 24
+
+
+class QRSymbol:
+    """
+    A QR symbol as rows of packed bits, 1 for a dark module, most significant
+    bit first and each row padded to a whole byte: the layout of both a PBM
+    image and a PDF image mask, so it is written to either without conversion.
+    """
+    __slots__ = ('size', 'bits')
+
+    def __init__(self, size, bits):
+        self.size = size
+        self.bits = bits
+
+    @classmethod
+    def encode(cls, data):
+        if segno is None:
+            raise ImproperlyConfigured('Printing asset labels needs the segno package (pip install segno).')
+        matrix = segno.make(data, error=LABEL_ERROR_LEVEL, micro=False, boost_error=False).matrix
+        row_bytes = (len(matrix) + 7) // 8
+        bits = bytearray()
+        for row in matrix:
+            value = 0
+            for dark in row:
+                value = (value << 1) | (dark & 1)
+            bits += (value << (row_bytes * 8 - len(row))).to_bytes(row_bytes, 'big')
+        return cls(len(matrix), bytes(bits))
+
+    @classmethod
+    def from_pbm(cls, content):
+        # As written by to_pbm: the header is two lines, the bits follow
+        magic, dimensions, bits = content.split(b'\n', 2)
+        size = int(dimensions.split()[0])
+        if magic != b'P4' or len(bits) != size * ((size + 7) // 8):
+            raise ValueError('Not a QR symbol written by to_pbm')
+        return cls(size, bits)
+
+    def to_pbm(self):
+        return b'P4\n%d %d\n' % (self.size, self.size) + self.bits
+
+    def is_dark(self, x, y):
+        row_bytes = (self.size + 7) // 8
+        return self.bits[y * row_bytes + x // 8] >> (7 - x % 8) & 1
+
+    def svg_path(self):
+        """Path data drawing the dark modules, one rectangle per horizontal run"""
+        commands = []
+        for y in range(self.size):
+            x = 0
+            while x < self.size:
+                if self.is_dark(x, y):
+                    start = x
+                    while x < self.size and self.is_dark(x, y):
+                        x += 1
+                    commands.append(f'M{start} {y}h{x - start}v1h-{x - start}z')
+                x += 1
+        return ''.join(commands)
+
+
+def symbol_cache_path(data):
+    digest = hashlib.sha256(f'{LABEL_ERROR_LEVEL}:{data}'.encode()).hexdigest()
+    return os.path.join(LABEL_CACHE_DIR, digest[:2], f'{digest}.pbm')
+
+
+def get_symbol(data, stats=None):
+    """
+    The QR symbol encoding data, from the disk cache or encoded and cached.
+    The file name is the hash of what is encoded, so a changed URL gets a
+    new file and an unchanged one is never encoded twice. Counts 'cached'
+    and 'encoded' in stats, if given.
+    """
+    path = symbol_cache_path(data)
+    try:
+        with open(path, 'rb') as f:
+            symbol = QRSymbol.from_pbm(f.read())
+        if stats is not None:
+            stats['cached'] += 1
+        return symbol
+    except (OSError, ValueError):
+        pass
+
+    symbol = QRSymbol.encode(data)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a temporary name and renamed, so a reader never sees half a file
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(symbol.to_pbm())
+    os.replace(temporary, path)
+    if stats is not None:
+        stats['encoded'] += 1
+    return symbol
+
+
+def label_url(asset_tag, base_url=''):
+    """The URL a label encodes: the asset's detail page"""
+    return (LABEL_BASE_URL or base_url).rstrip('/') + reverse('asset_detail', args=[asset_tag])
+
+
+def label_name(name):
+    return name if len(name) <= NAME_LENGTH else name[:NAME_LENGTH - 1] + '…'
+
+
+def render_label_svg(asset_tag, name, base_url=''):
+    """One label as an SVG image: the QR symbol with the tag and name beside it"""
+    symbol = get_symbol(label_url(asset_tag, base_url))
+    side = symbol.size + 2 * QUIET_ZONE
+    # Text area to the right of the symbol, in module units
+    width = side * 2.6
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:.1f} {side}" shape-rendering="crispEdges">'
+        f'<rect width="{width:.1f}" height="{side}" fill="#fff"/>'
+        f'<path transform="translate({QUIET_ZONE} {QUIET_ZONE})" d="{symbol.svg_path()}"/>'
+        f'<text x="{side}" y="{side * 0.42:.1f}" font-family="Helvetica, Arial, sans-serif" font-weight="bold" font-size="{side * 0.16:.1f}">{escape(asset_tag)}</text>'
+        f'<text x="{side}" y="{side * 0.62:.1f}" font-family="Helvetica, Arial, sans-serif" font-size="{side * 0.09:.1f}">{escape(label_name(name))}</text>'
+        '</svg>'
+    )
+
+
+def pdf_string(text):
+    """A PDF literal string in WinAnsiEncoding, the standard fonts' encoding (cp1252)"""
+    text = text.encode('cp1252', 'replace')
+    return b'(' + text.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def label_operators(symbol, asset_tag, name, x, y, sheet=LABEL_SHEET):
+    """PDF content operators drawing one label with its lower left corner at (x, y)"""
+    padding = sheet['padding']
+    side = sheet['label_height'] - 2 * padding
+    module = side / (symbol.size + 2 * QUIET_ZONE)
+    qr_x, qr_y = x + padding + QUIET_ZONE * module, y + padding + QUIET_ZONE * module
+    qr_side = symbol.size * module
+    text_x = x + padding + side + padding / 2
+    # The symbol as an inline 1-bit image mask: dark modules paint, light ones stay blank
+    return (
+        f'q {qr_side:.3f} 0 0 {qr_side:.3f} {qr_x:.3f} {qr_y:.3f} cm\n'
+        f'BI /IM true /W {symbol.size} /H {symbol.size} /BPC 1 /D [1 0] ID\n'.encode()
+        + symbol.bits
+        + b'\nEI Q\n'
+        + f'BT /F2 11 Tf {text_x:.2f} {y + sheet["label_height"] * 0.55:.2f} Td '.encode()
+        + pdf_string(asset_tag) + b' Tj ET\n'
+        + f'BT /F1 7 Tf {text_x:.2f} {y + sheet["label_height"] * 0.38:.2f} Td '.encode()
+        + pdf_string(label_name(name)) + b' Tj ET\n'
+    )
+
+
+def iter_label_pdf(assets, base_url='', sheet=LABEL_SHEET, stats=None):
+    """
+    Stream a PDF of label sheets for (asset_tag, name) pairs, page by page,
+    so memory stays flat however many labels there are. Objects are written
+    as they come and the page tree and cross-reference table last.
+    """
+    offsets = {}
+    position = 0
+
+    def write_object(number, body):
+        nonlocal position
+        offsets[number] = position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        position += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position += len(header)
+    yield header
+    # 1: catalog, 2: page tree (written last), 3 and 4: fonts, pages from 5
+    yield write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    yield write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    yield write_object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    per_page = sheet['columns'] * sheet['rows']
+    pages = []
+    number = 5
+
+    def write_page(content):
+        nonlocal number
+        stream = zlib.compress(content)
+        page, contents = number, number + 1
+        number += 2
+        pages.append(page)
+        return write_object(page, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {sheet["page_width"]} {sheet["page_height"]}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {contents} 0 R >>'
+        ).encode()) + write_object(contents, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+
+    content = bytearray()
+    count = 0
+    for asset_tag, name in assets:
+        index = count % per_page
+        column, row = index % sheet['columns'], index // sheet['columns']
+        x = sheet['margin_left'] + column * sheet['label_width']
+        y = sheet['page_height'] - sheet['margin_top'] - (row + 1) * sheet['label_height']
+        content += label_operators(get_symbol(label_url(asset_tag, base_url), stats), asset_tag, name, x, y, sheet)
+        count += 1
+        if count % per_page == 0:
+            yield write_page(bytes(content))
+            content = bytearray()
+    if content or not pages:
+        yield write_page(bytes(content))
+
+    kids = ' '.join(f'{page} 0 R' for page in pages)
+    yield write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'.encode())
+
+    xref = [b'xref\n0 %d\n' % number, b'0000000000 65535 f \n']
+    xref += [b'%010d 00000 n \n' % offsets[object_number] for object_number in range(1, number)]
+    yield b''.join(xref) + b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, position)
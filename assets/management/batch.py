@@ -0,0 +1,203 @@
+# assets/management/batch.py
+
+import json
+import os
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Directory where checkpoints of resumable commands are stored.
+CHECKPOINT_DIR = getattr(settings, 'BATCH_CHECKPOINT_DIR', os.path.join(settings.BASE_DIR, '.checkpoints'))
+
+
+def add_batch_arguments(parser, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Add the standard --chunk-size and --resume options to a command's parser"""
+    parser.add_argument('--chunk-size', type=int, default=chunk_size, help='Rows loaded and written per batch')
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint of an interrupted run')
+
+
+def iter_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE, start_after=None):
+    """
+    Yield lists of objects from a queryset, ordered by primary key.
+
+    Uses keyset pagination (pk > last pk) rather than offsets, so every chunk
+    is an indexed range scan and rows updated by the caller between chunks
+    (e.g. no longer matching the filter) do not shift the remaining pages.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = start_after
+    while True:
+        page = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def bulk_get_or_create(model, key_field, rows):
+    """
+    Get or create many objects at once, keyed by a unique field.
+
+    rows maps each key to the defaults for creating it. Returns
+    (objects_by_key, created_keys) using two queries at most instead of one
+    get_or_create round trip per row.
+    """
+    existing = {
+        getattr(obj, key_field): obj
+        for obj in model.objects.filter(**{f'{key_field}__in': list(rows)})
+    }
+    missing = [key for key in rows if key not in existing]
+    if missing:
+        model.objects.bulk_create(
+            [model(**{key_field: key, **rows[key]}) for key in missing],
+            ignore_conflicts=True,
+        )
+        # Re-read so the new objects have primary keys on every backend
+        existing.update({
+            getattr(obj, key_field): obj
+            for obj in model.objects.filter(**{f'{key_field}__in': missing})
+        })
+    return existing, missing
+
+
+def bulk_update_fields(objs, fields):
+    """
+    Save only the given fields of many objects of one model in bulk.
+
+    QuerySet.bulk_update() does not apply auto_now, so any auto_now fields
+    (e.g. Asset.updated_at) are stamped here and added to the field list.
+    """
+    if not objs:
+        return 0
+    model = type(objs[0])
+    fields = list(fields)
+    now = timezone.now()
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) and field.name not in fields:
+            fields.append(field.name)
+            for obj in objs:
+                setattr(obj, field.attname, now)
+    return model.objects.bulk_update(objs, fields)
+
+
+class Checkpoint:
+    """
+    Remembers the last primary key a named command finished, in a small JSON file.
+    """
+    def __init__(self, name, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f'{name}.json')
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('last_pk')
+        except (OSError, ValueError):
+            return None
+
+    def save(self, last_pk):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_pk': last_pk, 'saved_at': time.time()}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class NoCheckpoint:
+    """Stands in for a Checkpoint in dry runs, which must not touch the one of a real run"""
+    def load(self):
+        return None
+
+    def save(self, last_pk):
+        pass
+
+    def clear(self):
+        pass
+
+
+class Progress:
+    """
+    Prints processed counts and throughput to a command's output at a fixed interval.
+    """
+    def __init__(self, stdout, total=None, label='rows', interval=2.0):
+        self.stdout = stdout
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def advance(self, count):
+        self.count += count
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        if self.total:
+            done = f'{self.count}/{self.total} {self.label} ({self.count / self.total * 100:.1f}%)'
+        else:
+            done = f'{self.count} {self.label}'
+        self.stdout.write(f'Processed {done}, {self.rate:.0f} {self.label}/s')
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f'Processed {self.count} {self.label} in {elapsed:.1f}s ({self.rate:.0f} {self.label}/s)')
+
+
+class BatchJob:
+    """
+    Iterate a queryset chunk by chunk with progress reporting and checkpoints.
+
+    The checkpoint is written when the caller asks for the next chunk, i.e.
+    after its work on the previous one is done, so a resumed run never skips
+    rows that were not saved. Wrap the writes for a chunk in a transaction:
+
+        job = BatchJob(self, Asset.objects.filter(...), 'my_command', resume=options['resume'])
+        for chunk in job:
+            with transaction.atomic():
+                Asset.objects.bulk_update(chunk, ['status'])
+        job.finish()
+
+    With dry_run, no checkpoint is read, written or cleared, so a dry run
+    leaves an interrupted real run resumable.
+    """
+    def __init__(self, command, queryset, name, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, label='rows', dry_run=False):
+        self.command = command
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.checkpoint = NoCheckpoint() if dry_run else Checkpoint(name)
+
+        self.start_after = self.checkpoint.load() if resume else None
+        if self.start_after is not None:
+            command.stdout.write(f'Resuming {name} after primary key {self.start_after}')
+            queryset = queryset.filter(pk__gt=self.start_after)
+        self.progress = Progress(command.stdout, total=queryset.count(), label=label)
+
+    def __iter__(self):
+        for chunk in iter_chunks(self.queryset, self.chunk_size, self.start_after):
+            yield chunk
+            self.checkpoint.save(chunk[-1].pk)
+            self.progress.advance(len(chunk))
+
+    def finish(self):
+        """Report the final throughput and discard the checkpoint of a completed run"""
+        self.checkpoint.clear()
+        self.progress.finish()
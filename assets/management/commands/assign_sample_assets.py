@@ -1,14 +1,27 @@
 # assets/management/commands/assign_sample_assets.py
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import date, timedelta
-from assets.models import Asset, AssetLog
+from assets.assignment import AssignmentEngine, ASSIGNMENT_FIELDS
+from assets.models import Asset, AssetType, AssignmentRule
+from assets.management.batch import BatchJob, add_batch_arguments
 from users.models import CustomUser
 
+# Default department rules seeded into AssignmentRule when the table is empty
+DEFAULT_ASSIGNMENT_RULES = {
+    'UPS': ['IT', 'Facilities'],
+    'Generator': ['Facilities', 'Engineering'],
+    'IAC': ['IT', 'Facilities'],
+    'Camera System': ['Security', 'IT'],
+    'Pump': ['Facilities', 'Engineering'],
+    'Fire System': ['Safety', 'Facilities'],
+}
+
 class Command(BaseCommand):
     help = 'Assign sample assets to users for testing integration'
 
+    def add_arguments(self, parser):
+        add_batch_arguments(parser)
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting asset assignment...'))
         
@@ -45,52 +58,29 @@ class Command(BaseCommand):
             admin_user.save()
             self.stdout.write(f'Created admin user: {admin_user.username}')
         
-        # Assignment logic based on asset type and user department
-        assignment_rules = {
-            'UPS': ['IT', 'Facilities'],
-            'Generator': ['Facilities', 'Engineering'],
-            'IAC': ['IT', 'Facilities'],
-            'Camera System': ['Security', 'IT'],
-            'Pump': ['Facilities', 'Engineering'],
-            'Fire System': ['Safety', 'Facilities'],
-        }
+        # Seed the assignment rules on first run
+        if not AssignmentRule.objects.exists():
+            asset_types = AssetType.objects.filter(name__in=DEFAULT_ASSIGNMENT_RULES)
+            AssignmentRule.objects.bulk_create([
+                AssignmentRule(asset_type=asset_type, department=department)
+                for asset_type in asset_types
+                for department in DEFAULT_ASSIGNMENT_RULES[asset_type.name]
+            ])
+            self.stdout.write(f'Created default assignment rules for {len(asset_types)} asset types')
         
-        assignments_made = 0
+        engine = AssignmentEngine(users)
+        job = BatchJob(
+            self,
+            unassigned_assets.only(*ASSIGNMENT_FIELDS),
+            'assign_sample_assets',
+            chunk_size=options['chunk_size'],
+            resume=options['resume'],
+            label='assets',
+        )
         
-        for asset in unassigned_assets:
-            # Find suitable users based on asset type
-            suitable_departments = assignment_rules.get(asset.asset_type.name, ['IT'])
-            suitable_users = users.filter(department__in=suitable_departments)
-            
-            if not suitable_users.exists():
-                # Fallback to any user
-                suitable_users = users
-            
-            # Assign to user with least assets
-            user_asset_counts = {}
-            for user in suitable_users:
-                user_asset_counts[user] = user.assigned_assets.count()
-            
-            # Get user with minimum assets
-            assigned_user = min(user_asset_counts.keys(), key=lambda u: user_asset_counts[u])
-            
-            # Make the assignment
-            asset.assigned_to = assigned_user
-            asset.save()
-            
-            # Create log entry
-            AssetLog.objects.create(
-                asset=asset,
-                event_type='assignment_change',
-                description=f'Asset assigned to {assigned_user.full_name} during system setup',
-                user=admin_user,
-                old_value='Unassigned',
-                new_value=assigned_user.full_name
-            )
-            
-            assignments_made += 1
-            self.stdout.write(f'Assigned {asset.asset_tag} to {assigned_user.full_name}')
+        assignments_made = engine.assign(job, performed_by=admin_user)
         
+        job.finish()
         self.stdout.write(
             self.style.SUCCESS(f'Successfully assigned {assignments_made} assets!')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,43 @@
+# assets/management/commands/auto_assign_assets.py
+
+from django.core.management.base import BaseCommand, CommandError
+from assets.assignment import AssignmentEngine, get_unassigned_assets
+from assets.management.batch import BatchJob, add_batch_arguments
+from users.models import CustomUser
+
+class Command(BaseCommand):
+    help = 'Assign all unassigned assets to users according to the assignment rules, balancing load'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        add_batch_arguments(parser)
+        parser.add_argument('--user', type=str, help='Username recorded on the asset log entries (defaults to the first superuser)')
+        parser.add_argument('--dry-run', action='store_true', help='Compute the assignments without saving them')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            performed_by = CustomUser.objects.filter(username=options['user']).first()
+            if performed_by is None:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+        else:
+            performed_by = CustomUser.objects.filter(is_superuser=True).first()
+
+        engine = AssignmentEngine()
+        if not engine.users:
+            raise CommandError('No active users found. Please create users first.')
+
+        job = BatchJob(
+            self,
+            get_unassigned_assets(),
+            'auto_assign_assets',
+            chunk_size=options['chunk_size'],
+            resume=options['resume'],
+            label='assets',
+            dry_run=options['dry_run'],
+        )
+        assigned = engine.assign(job, performed_by=performed_by, dry_run=options['dry_run'])
+        job.finish()
+
+        prefix = 'Dry run: would have assigned' if options['dry_run'] else 'Successfully assigned'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} {assigned} assets'))
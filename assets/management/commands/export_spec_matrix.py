@@ -0,0 +1,46 @@
+# assets/management/commands/export_spec_matrix.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from assets.models import AssetType
+from assets.exports import EXPORT_CHUNK_SIZE, iter_specification_matrix, iter_csv_lines
+
+class Command(BaseCommand):
+    help = 'Export all assets of a type as CSV with their specifications pivoted into columns'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('asset_type', type=str, help='Asset type name (e.g., Generator)')
+        parser.add_argument('--output', '-o', type=str, help='Output file path (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+        parser.add_argument('--no-bom', action='store_true', help='Do not write the UTF-8 byte order mark used by Excel')
+
+    def handle(self, *args, **options):
+        try:
+            asset_type = AssetType.objects.get(name=options['asset_type'])
+        except AssetType.DoesNotExist:
+            raise CommandError(f'Asset type "{options["asset_type"]}" does not exist')
+
+        rows = iter_specification_matrix(asset_type, chunk_size=options['chunk_size'])
+        lines = iter_csv_lines(rows, bom=not options['no_bom'])
+
+        if options['output']:
+            # newline='' because csv.writer already terminates each line
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                written = self.write_lines(f, lines)
+            self.stderr.write(
+                self.style.SUCCESS(f'Exported {written} {asset_type.name} assets to {options["output"]}')
+            )
+        else:
+            self.write_lines(sys.stdout, lines)
+
+    def write_lines(self, f, lines):
+        """Write CSV lines to a file and return the number of data rows written"""
+        count = -1  # The header row is not an asset
+        for line in lines:
+            f.write(line)
+            if line.endswith('\n'):
+                count += 1
+        return max(count, 0)
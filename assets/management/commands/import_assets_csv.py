@@ -0,0 +1,56 @@
+# assets/management/commands/import_assets_csv.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from assets.imports import AssetImporter, IMPORT_CHUNK_SIZE, is_utf8
+from users.models import CustomUser
+
+class Command(BaseCommand):
+    help = 'Create or update assets and specifications from a CSV file, keyed by asset tag'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', type=str, help='Path to the CSV file')
+        parser.add_argument('--user', type=str, help='Username recorded on the asset log entries (defaults to the first superuser)')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows validated and written per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file and report errors without saving anything')
+        parser.add_argument('--max-errors', type=int, default=50, help='Maximum number of row errors to print')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = CustomUser.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+        else:
+            user = CustomUser.objects.filter(is_superuser=True).first()
+
+        importer = AssetImporter(user=user, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+
+        started = time.monotonic()
+        try:
+            # Checked before anything is written, as chunks are committed as they go
+            with open(options['file_path'], 'rb') as f:
+                if not is_utf8(f):
+                    raise CommandError(f'{options["file_path"]} is not valid UTF-8 text; nothing was imported')
+            # utf-8-sig also accepts files written by our own exports, which start with a BOM
+            with open(options['file_path'], 'r', encoding='utf-8-sig', newline='') as f:
+                result = importer.run(f)
+        except OSError as e:
+            raise CommandError(f'Could not read {options["file_path"]}: {e}')
+        elapsed = time.monotonic() - started
+
+        for line, message in result.errors[:options['max_errors']]:
+            self.stdout.write(self.style.ERROR(f'Line {line}: {message}'))
+        if len(result.errors) > options['max_errors']:
+            self.stdout.write(self.style.ERROR(f'... and {len(result.errors) - options["max_errors"]} more errors'))
+
+        prefix = 'Dry run: would have' if options['dry_run'] else 'Successfully'
+        rate = result.imported / elapsed * 60 if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix} created {result.created} and updated {result.updated} assets '
+                f'({result.specifications} specifications) in {elapsed:.1f}s, {rate:.0f} rows/min'
+            )
+        )
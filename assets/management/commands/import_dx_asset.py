@@ -7,6 +7,8 @@ from datetime import datetime, date
 
 class Command(BaseCommand):
     help = 'Import DX-Asset from text file format'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
 
     def add_arguments(self, parser):
         parser.add_argument('file_path', type=str, help='Path to DX-Asset text file')
@@ -1,10 +1,11 @@
 # assets/management/commands/populate_assets.py
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import transaction
 from datetime import date, timedelta
 from assets.models import AssetType, Manufacturer, Asset, AssetSpecification
-from users.models import Location, CustomUser
+from assets.management.batch import bulk_get_or_create
+from users.models import Location
 
 class Command(BaseCommand):
     help = 'Populate the database with sample asset data for testing'
@@ -26,13 +27,12 @@ class Command(BaseCommand):
             ('Kidde Panel', 'Fire control panels'),
         ]
         
-        for name, description in asset_types_data:
-            asset_type, created = AssetType.objects.get_or_create(
-                name=name,
-                defaults={'description': description}
-            )
-            if created:
-                self.stdout.write(f'Created asset type: {name}')
+        asset_types, created_names = bulk_get_or_create(
+            AssetType, 'name',
+            {name: {'description': description} for name, description in asset_types_data}
+        )
+        for name in created_names:
+            self.stdout.write(f'Created asset type: {name}')
         
         # Create Manufacturers
         manufacturers_data = [
@@ -48,13 +48,12 @@ class Command(BaseCommand):
             ('Honeywell', 'https://www.honeywell.com', 'support@honeywell.com'),
         ]
         
-        for name, website, contact in manufacturers_data:
-            manufacturer, created = Manufacturer.objects.get_or_create(
-                name=name,
-                defaults={'website': website, 'support_contact': contact}
-            )
-            if created:
-                self.stdout.write(f'Created manufacturer: {name}')
+        manufacturers, created_names = bulk_get_or_create(
+            Manufacturer, 'name',
+            {name: {'website': website, 'support_contact': contact} for name, website, contact in manufacturers_data}
+        )
+        for name in created_names:
+            self.stdout.write(f'Created manufacturer: {name}')
         
         # Get or create a default location
         location, created = Location.objects.get_or_create(
@@ -193,42 +192,41 @@ class Command(BaseCommand):
             },
         ]
         
-        # Create the assets
+        # Create the assets that do not exist yet, with their specifications
+        defaults = {
+            'location': location,
+            'purchase_date': date.today() - timedelta(days=365),
+            'installation_date': date.today() - timedelta(days=350),
+            'warranty_expiry': date.today() + timedelta(days=730),
+            'next_maintenance': date.today() + timedelta(days=90),
+        }
+        specifications = {}
+        asset_rows = {}
         for asset_data in sample_assets:
-            specifications = asset_data.pop('specifications', [])
-            
-            # Get related objects
-            asset_type = AssetType.objects.get(name=asset_data['asset_type'])
-            manufacturer = Manufacturer.objects.get(name=asset_data['manufacturer'])
-            
-            # Create the asset
-            asset, created = Asset.objects.get_or_create(
-                asset_tag=asset_data['asset_tag'],
-                defaults={
-                    **asset_data,
-                    'asset_type': asset_type,
-                    'manufacturer': manufacturer,
-                    'location': location,
-                    'purchase_date': date.today() - timedelta(days=365),
-                    'installation_date': date.today() - timedelta(days=350),
-                    'warranty_expiry': date.today() + timedelta(days=730),
-                    'next_maintenance': date.today() + timedelta(days=90),
-                }
-            )
+            specifications[asset_data['asset_tag']] = asset_data.pop('specifications', [])
+            asset_rows[asset_data.pop('asset_tag')] = {
+                **asset_data,
+                **defaults,
+                'asset_type': asset_types[asset_data['asset_type']],
+                'manufacturer': manufacturers[asset_data['manufacturer']],
+            }
+        
+        with transaction.atomic():
+            assets, created_tags = bulk_get_or_create(Asset, 'asset_tag', asset_rows)
             
-            if created:
-                self.stdout.write(f'Created asset: {asset.asset_tag}')
-                
-                # Add specifications
-                for spec_name, spec_value, unit in specifications:
-                    AssetSpecification.objects.create(
-                        asset=asset,
+            new_specifications = []
+            for asset_tag in created_tags:
+                self.stdout.write(f'Created asset: {asset_tag}')
+                for spec_name, spec_value, unit in specifications[asset_tag]:
+                    new_specifications.append(AssetSpecification(
+                        asset=assets[asset_tag],
                         specification_name=spec_name,
                         specification_value=spec_value,
                         unit=unit
-                    )
+                    ))
                     self.stdout.write(f'  Added specification: {spec_name}')
+            AssetSpecification.objects.bulk_create(new_specifications)
         
         self.stdout.write(
             self.style.SUCCESS('Successfully populated asset data!')
-        )
\ No newline at end of file
+        )
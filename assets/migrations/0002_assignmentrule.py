@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(help_text='Department whose users can be assigned (e.g., Facilities, IT)', max_length=100)),
+                ('is_active', models.BooleanField(default=True, help_text='Inactive rules are ignored by the assignment engine')),
+                ('asset_type', models.ForeignKey(blank=True, help_text='Asset type this rule applies to (empty for any type)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignment_rules', to='assets.assettype')),
+                ('location', models.ForeignKey(blank=True, help_text='Location this rule applies to (empty for any location)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignment_rules', to='users.location')),
+            ],
+            options={
+                'verbose_name': 'Assignment Rule',
+                'verbose_name_plural': 'Assignment Rules',
+                'ordering': ['asset_type__name', 'location__name', 'department'],
+                'unique_together': {('asset_type', 'location', 'department')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_assignmentrule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assetlog',
+            name='event_type',
+            field=models.CharField(choices=[('created', 'Asset Created'), ('updated', 'Asset Updated'), ('status_change', 'Status Changed'), ('assignment_change', 'Assignment Changed'), ('maintenance_scheduled', 'Maintenance Scheduled'), ('maintenance_completed', 'Maintenance Completed'), ('incident_reported', 'Incident Reported'), ('incident_resolved', 'Incident Resolved'), ('specification_updated', 'Specification Updated')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_add_incident_resolved_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='depends_on',
+            field=models.ManyToManyField(blank=True, help_text='Assets this one needs to run, e.g. the UPS feeding it or the chiller cooling it', related_name='dependents', to='assets.asset'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_asset_depends_on'),
+        ('capacity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='space',
+            field=models.ForeignKey(blank=True, help_text='Rack, row or hall the asset is installed in, counted in its power and cooling budget', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='assets', to='capacity.space'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_asset_space'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetspecification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -66,6 +66,14 @@ class Asset(models.Model):
     
     # Location and Assignment
     location = models.ForeignKey(Location, on_delete=models.PROTECT, help_text="Physical location of the asset")
+    space = models.ForeignKey(
+        'capacity.Space',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='assets',
+        help_text="Rack, row or hall the asset is installed in, counted in its power and cooling budget"
+    )
     assigned_to = models.ForeignKey(
         CustomUser, 
         on_delete=models.SET_NULL, 
@@ -74,6 +82,13 @@ class Asset(models.Model):
         related_name='assigned_assets',
         help_text="Employee responsible for this asset"
     )
+    depends_on = models.ManyToManyField(
+        'self',
+        symmetrical=False,
+        blank=True,
+        related_name='dependents',
+        help_text="Assets this one needs to run, e.g. the UPS feeding it or the chiller cooling it"
+    )
     
     # Status and Operational Information
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', help_text="Current operational status")
@@ -132,6 +147,7 @@ class AssetSpecification(models.Model):
     specification_name = models.CharField(max_length=100, help_text="Name of the specification (e.g., 'Power Rating', 'Fuel Capacity')")
     specification_value = models.CharField(max_length=255, help_text="Value of the specification (e.g., '600 kVA', '1000 Liters')")
     unit = models.CharField(max_length=50, blank=True, help_text="Unit of measurement (e.g., 'kVA', 'Liters', 'Celsius')")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['asset', 'specification_name']
@@ -154,6 +170,7 @@ class AssetLog(models.Model):
         ('maintenance_scheduled', 'Maintenance Scheduled'),
         ('maintenance_completed', 'Maintenance Completed'),
         ('incident_reported', 'Incident Reported'),
+        ('incident_resolved', 'Incident Resolved'),
         ('specification_updated', 'Specification Updated'),
     ]
     
@@ -250,4 +267,41 @@ class MaintenanceRecord(models.Model):
         """Check if scheduled maintenance is overdue"""
         if self.status in ['completed', 'cancelled']:
             return False
-        return self.scheduled_date < timezone.now().date()
\ No newline at end of file
+        return self.scheduled_date < timezone.now().date()
+
+class AssignmentRule(models.Model):
+    """
+    Maps assets of a type and/or location to the department responsible for them.
+    Used by the auto-assignment engine to pick eligible users; an empty
+    asset type or location matches any, and the most specific matching
+    rules win.
+    """
+    asset_type = models.ForeignKey(
+        AssetType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='assignment_rules',
+        help_text="Asset type this rule applies to (empty for any type)"
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='assignment_rules',
+        help_text="Location this rule applies to (empty for any location)"
+    )
+    department = models.CharField(max_length=100, help_text="Department whose users can be assigned (e.g., Facilities, IT)")
+    is_active = models.BooleanField(default=True, help_text="Inactive rules are ignored by the assignment engine")
+    
+    class Meta:
+        ordering = ['asset_type__name', 'location__name', 'department']
+        unique_together = ['asset_type', 'location', 'department']
+        verbose_name = "Assignment Rule"
+        verbose_name_plural = "Assignment Rules"
+
+    def __str__(self):
+        asset_type = self.asset_type.name if self.asset_type else "Any type"
+        location = self.location.name if self.location else "any location"
+        return f"{asset_type} at {location} → {self.department}"
@@ -0,0 +1,41 @@
+# assets/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Asset, AssetLog, AssetSpecification
+
+# Invalidate cached per-user data (asset summaries, profile fragments)
+# when the assets or activity they show change.
+# The cache helpers are imported in the handlers, so that loading the app
+# (e.g. for a management command) does not import assets.utils.
+
+@receiver(pre_save, sender=Asset)
+def remember_previous_assignee(sender, instance, **kwargs):
+    # The previous assignee's summary and profile also count this asset
+    if instance.pk:
+        instance._previous_assignee_id = Asset.objects.filter(
+            pk=instance.pk
+        ).values_list('assigned_to_id', flat=True).first()
+
+@receiver(post_save, sender=Asset)
+def invalidate_user_caches_on_asset_save(sender, instance, **kwargs):
+    from .utils import invalidate_user_asset_caches
+    invalidate_user_asset_caches(instance.assigned_to_id, getattr(instance, '_previous_assignee_id', None))
+
+@receiver(post_delete, sender=Asset)
+def invalidate_user_caches_on_asset_delete(sender, instance, **kwargs):
+    from .utils import invalidate_user_asset_caches
+    invalidate_user_asset_caches(instance.assigned_to_id)
+
+@receiver(post_save, sender=AssetLog)
+def invalidate_profile_on_asset_log(sender, instance, created, **kwargs):
+    if created:
+        from users.utils import invalidate_profiles
+        invalidate_profiles(instance.user_id)
+
+@receiver([post_save, post_delete], sender=AssetSpecification)
+def touch_asset_on_specification_change(sender, instance, **kwargs):
+    # Specifications have no timestamp of their own; bumping the asset's
+    # updated_at changes the ETag of its detail page (see assets/conditional.py)
+    Asset.objects.filter(pk=instance.asset_id).update(updated_at=timezone.now())
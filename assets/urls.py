@@ -14,6 +14,7 @@ urlpatterns = [
     
     # Asset management views (specific paths first)
     path('add/', views.asset_add, name='asset_add'),
+    path('import/', views.asset_import, name='asset_import'),
     path('maintenance/schedule/', views.maintenance_schedule, name='maintenance_schedule'),
     
     # User-asset integration
@@ -21,10 +22,19 @@ urlpatterns = [
     
     # API endpoints
     path('api/status-summary/', views.asset_status_summary, name='asset_status_summary'),
+    path('api/user-summaries/', views.user_asset_summaries, name='user_asset_summaries'),
+    path('api/nearby/', views.nearby_assets, name='nearby_assets'),
+    path('api/scan/', views.asset_scan, name='asset_scan'),
+    
+    # Export endpoints
+    path('export/assets/', views.asset_list_export, name='asset_list_export'),
+    path('export/specifications/<str:asset_type>/', views.asset_spec_matrix_export, name='asset_spec_matrix_export'),
+    path('export/labels/', views.asset_labels, name='asset_labels'),
     
     # Asset detail views (dynamic paths last)
     path('<str:asset_tag>/', views.asset_detail, name='asset_detail'),
     path('<str:asset_tag>/edit/', views.asset_edit, name='asset_edit'),
     path('<str:asset_tag>/assign/', views.asset_assign, name='asset_assign'),
     path('<str:asset_tag>/maintenance/', views.asset_maintenance, name='asset_maintenance'),
+    path('<str:asset_tag>/label.svg', views.asset_label, name='asset_label'),
 ]
\ No newline at end of file
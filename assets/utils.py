@@ -1,9 +1,28 @@
 # assets/utils.py
 
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from core.routers import replica_safe
+from users.geo import locations_near
+from users.utils import invalidate_profiles
+from capacity.budget import refresh_footprints
+from sync.log import record_objects
+from sync.models import Change
 from .models import Asset, AssetLog, MaintenanceRecord
 
+# How long per-user asset summaries stay cached (seconds) when caching is requested.
+SUMMARY_CACHE_TIMEOUT = getattr(settings, 'ASSET_SUMMARY_CACHE_TIMEOUT', 300)
+
+# Assets returned by a nearby search at most.
+NEARBY_LIMIT = 100
+
+# Locations a nearby search reads per query, nearest first: each costs
+# three bound parameters, well under SQLite's limit of 999 per statement.
+NEARBY_LOCATION_BATCH = 250
+
+@replica_safe
 def get_asset_health_summary():
     """
     Get a comprehensive health summary of all assets.
@@ -48,26 +67,115 @@ def get_asset_health_summary():
         'health_percentage': round((status_summary['active'] / total_assets * 100) if total_assets > 0 else 0, 1)
     }
 
-def get_user_asset_summary(user):
+def filter_assets(assets, params):
     """
-    Get asset summary for a specific user.
-    Useful for user dashboards and incident assignment.
+    Apply the asset list filters (status, type, location, search) to a queryset.
+    Shared by the asset list page and its exports so both always agree.
     """
-    user_assets = Asset.objects.filter(assigned_to=user)
+    status_filter = params.get('status')
+    if status_filter:
+        assets = assets.filter(status=status_filter)
     
+    type_filter = params.get('type')
+    if type_filter:
+        assets = assets.filter(asset_type__name=type_filter)
+    
+    location_filter = params.get('location')
+    if location_filter:
+        assets = assets.filter(location__name=location_filter)
+    
+    search_query = params.get('search')
+    if search_query:
+        assets = assets.filter(
+            Q(asset_tag__icontains=search_query) |
+            Q(name__icontains=search_query) |
+            Q(serial_number__icontains=search_query) |
+            Q(description__icontains=search_query)
+        )
+    
+    return assets
+
+def summary_cache_key(user_id):
+    return f'user-asset-summary:{user_id}'
+
+def empty_asset_summary():
     return {
-        'total_assigned': user_assets.count(),
-        'by_status': {
-            'active': user_assets.filter(status='active').count(),
-            'maintenance': user_assets.filter(status='maintenance').count(),
-            'faulty': user_assets.filter(status='faulty').count(),
-        },
-        'maintenance_due': user_assets.filter(
-            next_maintenance__lte=timezone.now().date()
-        ).exclude(status='decommissioned').count(),
-        'critical_assets': user_assets.filter(priority='critical').count(),
+        'total_assigned': 0,
+        'by_status': {'active': 0, 'maintenance': 0, 'faulty': 0},
+        'maintenance_due': 0,
+        'critical_assets': 0,
     }
 
+def get_user_asset_summaries(users, use_cache=False):
+    """
+    Get asset summaries for many users at once, keyed by user id.
+    All counts come from a single query grouped by assignee, instead of
+    six counts per user. With use_cache=True, summaries are read from and
+    stored in the cache; they are invalidated whenever an asset assigned
+    to the user is saved (see invalidate_user_asset_caches).
+    """
+    user_ids = [getattr(user, 'pk', user) for user in users]
+    today = timezone.now().date()
+    summaries = {}
+    
+    if use_cache:
+        # Cached entries carry the date because "maintenance due" depends on it
+        cached = cache.get_many([summary_cache_key(user_id) for user_id in user_ids])
+        for user_id in user_ids:
+            entry = cached.get(summary_cache_key(user_id))
+            if entry and entry[0] == today:
+                summaries[user_id] = entry[1]
+    
+    missing = [user_id for user_id in user_ids if user_id not in summaries]
+    if missing:
+        fresh = {user_id: empty_asset_summary() for user_id in missing}
+        rows = Asset.objects.filter(assigned_to__in=missing).values('assigned_to').annotate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            maintenance=Count('id', filter=Q(status='maintenance')),
+            faulty=Count('id', filter=Q(status='faulty')),
+            due=Count('id', filter=Q(next_maintenance__lte=today) & ~Q(status='decommissioned')),
+            critical=Count('id', filter=Q(priority='critical')),
+        ).order_by()
+        
+        for row in rows:
+            fresh[row['assigned_to']] = {
+                'total_assigned': row['total'],
+                'by_status': {
+                    'active': row['active'],
+                    'maintenance': row['maintenance'],
+                    'faulty': row['faulty'],
+                },
+                'maintenance_due': row['due'],
+                'critical_assets': row['critical'],
+            }
+        
+        if use_cache:
+            cache.set_many(
+                {summary_cache_key(user_id): (today, summary) for user_id, summary in fresh.items()},
+                SUMMARY_CACHE_TIMEOUT
+            )
+        summaries.update(fresh)
+    
+    return summaries
+
+def get_user_asset_summary(user, use_cache=False):
+    """
+    Get asset summary for a specific user.
+    Useful for user dashboards and incident assignment.
+    """
+    return get_user_asset_summaries([user], use_cache=use_cache)[user.pk]
+
+def invalidate_user_asset_caches(*user_ids):
+    """
+    Drop cached per-user asset data (asset summaries and profile fragments)
+    after assets assigned to these users were created, changed or reassigned.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        cache.delete_many([summary_cache_key(user_id) for user_id in user_ids])
+        invalidate_profiles(*user_ids)
+
 def log_asset_event(asset, event_type, description, user, old_value=None, new_value=None):
     """
     Centralized function for logging asset events.
@@ -82,6 +190,36 @@ def log_asset_event(asset, event_type, description, user, old_value=None, new_va
         new_value=new_value or ''
     )
 
+def set_assets_status(asset_ids, status, description, user=None, keep_statuses=('decommissioned',)):
+    """
+    Set the status of many assets at once, e.g. to 'faulty' when alerts fire.
+
+    One UPDATE changes every asset not already in that status (or in one
+    of keep_statuses), with a status_change log entry for each, written
+    with one bulk INSERT. Returns the ids of the assets changed.
+    """
+    assets = list(
+        Asset.objects.filter(pk__in=asset_ids)
+        .exclude(status__in=[status, *keep_statuses])
+        .values_list('pk', 'status', 'assigned_to_id')
+    )
+    if not assets:
+        return []
+    changed_ids = [asset_id for asset_id, _, _ in assets]
+    Asset.objects.filter(pk__in=changed_ids).update(status=status, updated_at=timezone.now())
+    AssetLog.objects.bulk_create([
+        AssetLog(
+            asset_id=asset_id, event_type='status_change', description=description,
+            user=user, old_value=old_status, new_value=status,
+        )
+        for asset_id, old_status, _ in assets
+    ])
+    # update() and bulk_create() send no signals
+    invalidate_user_asset_caches(*{assigned_to_id for _, _, assigned_to_id in assets})
+    record_objects(Change.ASSET, changed_ids)
+    refresh_footprints(changed_ids)
+    return changed_ids
+
 def get_asset_incident_context(asset):
     """
     Prepare asset context for incident management.
@@ -119,11 +257,18 @@ def get_asset_incident_context(asset):
 
 def find_related_assets(asset, radius_km=None):
     """
-    Find assets related to the given asset.
+    Find assets related to the given asset: the same type at its location
+    (or, with radius_km, at any location within that many km of it) and the
+    assets assigned to the same user.
     This can be used for impact analysis in incident management.
     """
+    location_ids = [asset.location_id]
+    if radius_km is not None:
+        # Read by geohash range; see users/geo.py
+        location_ids = [location.pk for location, _ in locations_near(asset.location, radius_km)]
+    
     related_assets = Asset.objects.filter(
-        location=asset.location,
+        location__in=location_ids,
         asset_type=asset.asset_type
     ).exclude(id=asset.id)
     
@@ -133,11 +278,50 @@ def find_related_assets(asset, radius_km=None):
             assigned_to=asset.assigned_to
         ).exclude(id=asset.id)
         
-        # Combine querysets
-        related_assets = related_assets.union(user_assets)
+        # Combine querysets (SQLite refuses ORDER BY inside a UNION, so drop the default ordering)
+        related_assets = related_assets.order_by().union(user_assets.order_by())
     
     return related_assets
 
+@replica_safe
+def find_nearby_assets(location_distances, params, limit=NEARBY_LIMIT):
+    """
+    Assets at the given locations, a list of (location, distance in km) as
+    users.geo.locations_within() returns it, filtered like the asset list
+    (type, status, search) and nearest location first, each with
+    distance_km set. The database orders by distance, so only `limit`
+    rows are read; use it to find the nearest spare of a type. Only the
+    locations with matching assets are queried, NEARBY_LOCATION_BATCH at
+    a time until `limit` is reached, so a radius covering tens of
+    thousands of locations stays within the database's limit on query
+    parameters.
+    """
+    distances = {location.pk: distance for location, distance in location_distances}
+    params = {key: params[key] for key in ('type', 'status', 'search') if params.get(key)}
+    if len(distances) > NEARBY_LOCATION_BATCH:
+        stocked = set(filter_assets(Asset.objects.all(), params).order_by().values_list('location_id', flat=True).distinct())
+        location_ids = [location_id for location_id in distances if location_id in stocked]
+    else:
+        location_ids = list(distances)
+    assets = []
+    for start in range(0, len(location_ids), NEARBY_LOCATION_BATCH):
+        batch = location_ids[start:start + NEARBY_LOCATION_BATCH]
+        rank = Case(
+            *[When(location_id=location_id, then=Value(index)) for index, location_id in enumerate(batch)],
+            output_field=IntegerField(),
+        )
+        assets += (
+            filter_assets(Asset.objects.filter(location__in=batch), params)
+            .select_related('asset_type', 'location')
+            .annotate(location_rank=rank)
+            .order_by('location_rank', 'asset_tag')[:limit - len(assets)]
+        )
+        if len(assets) >= limit:
+            break
+    for asset in assets:
+        asset.distance_km = distances[asset.location_id]
+    return assets
+
 def get_maintenance_recommendations(asset):
     """
     Generate maintenance recommendations based on asset history and status.
@@ -1,16 +1,32 @@
 # assets/views.py
 
+import io
+from urllib.parse import unquote, urlsplit
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.text import slugify
 from .models import Asset, AssetType, Manufacturer, MaintenanceRecord, AssetLog
-from .forms import AssetForm, MaintenanceRecordForm
+from .forms import AssetForm, MaintenanceRecordForm, AssetImportForm, normalize_asset_tag
+from .exports import iter_specification_matrix, iter_asset_rows, iter_csv_lines, iter_jsonl_lines
+from .imports import AssetImporter, is_utf8
+from .labels import MAX_LABELS, iter_label_pdf, render_label_svg
+from .conditional import (
+    conditional_asset_view, get_asset_detail_version, get_asset_list_version, get_asset_table_version
+)
+from .utils import filter_assets, find_nearby_assets, get_user_asset_summary, get_user_asset_summaries
+from users.geo import locations_within, parse_center, parse_radius
 from users.models import CustomUser
+from core.routers import replica_safe
+from telemetry.series import get_asset_telemetry_summary
 
 @login_required
+@replica_safe
 def asset_dashboard(request):
     """
     Main dashboard showing asset overview and statistics.
@@ -55,6 +71,7 @@ def asset_dashboard(request):
     return render(request, 'assets/dashboard.html', context)
 
 @login_required
+@conditional_asset_view(get_asset_list_version)
 def asset_list(request):
     """
     Display a list of all assets with filtering options.
@@ -63,30 +80,12 @@ def asset_list(request):
         'asset_type', 'manufacturer', 'location', 'assigned_to'
     ).order_by('asset_tag')
     
-    # Filter by status
+    # Filter by status, type, location and search query
+    assets = filter_assets(assets, request.GET)
     status_filter = request.GET.get('status')
-    if status_filter:
-        assets = assets.filter(status=status_filter)
-    
-    # Filter by asset type
     type_filter = request.GET.get('type')
-    if type_filter:
-        assets = assets.filter(asset_type__name=type_filter)
-    
-    # Filter by location
     location_filter = request.GET.get('location')
-    if location_filter:
-        assets = assets.filter(location__name=location_filter)
-    
-    # Search functionality
     search_query = request.GET.get('search')
-    if search_query:
-        assets = assets.filter(
-            Q(asset_tag__icontains=search_query) |
-            Q(name__icontains=search_query) |
-            Q(serial_number__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
     
     # Get filter options for the template
     asset_types = AssetType.objects.all()
@@ -123,6 +122,7 @@ def asset_list_by_type(request, asset_type):
     return render(request, 'assets/asset_list_by_type.html', context)
 
 @login_required
+@conditional_asset_view(get_asset_detail_version)
 def asset_detail(request, asset_tag):
     """
     Display detailed information about a specific asset.
@@ -134,11 +134,15 @@ def asset_detail(request, asset_tag):
     maintenance_records = asset.maintenance_records.order_by('-scheduled_date')[:10]
     recent_logs = asset.logs.order_by('-timestamp')[:10]
     
+    # Sensor readings, from the telemetry roll-ups
+    telemetry = get_asset_telemetry_summary(asset)
+    
     context = {
         'asset': asset,
         'specifications': specifications,
         'maintenance_records': maintenance_records,
         'recent_logs': recent_logs,
+        'telemetry': telemetry,
     }
     
     return render(request, 'assets/asset_detail.html', context)
@@ -208,6 +212,42 @@ def asset_add(request):
     
     return render(request, 'assets/asset_form.html', context)
 
+@login_required
+def asset_import(request):
+    """
+    Create or update assets in bulk from an uploaded CSV file.
+    """
+    result = None
+    
+    if request.method == 'POST':
+        form = AssetImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            upload = form.cleaned_data['csv_file'].file
+            
+            # Checked up front: nothing is written from a file that cannot be read to the end
+            if not is_utf8(upload):
+                form.add_error('csv_file', 'The file is not valid UTF-8 text.')
+            else:
+                csv_file = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+                importer = AssetImporter(user=request.user, dry_run=dry_run)
+                result = importer.run(csv_file)
+                if result.imported and not dry_run:
+                    messages.success(
+                        request,
+                        f'Imported {result.imported} assets ({result.created} created, {result.updated} updated).'
+                    )
+    else:
+        form = AssetImportForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+        'page_title': 'Import Assets',
+    }
+    
+    return render(request, 'assets/asset_import.html', context)
+
 @login_required
 def asset_maintenance(request, asset_tag):
     """
@@ -256,22 +296,82 @@ def maintenance_schedule(request):
     return render(request, 'assets/maintenance_form.html', context)
 
 @login_required
+@replica_safe
+@conditional_asset_view(get_asset_table_version)
 def asset_status_summary(request):
     """
     API endpoint returning asset status summary as JSON.
     This can be used for dashboard widgets or AJAX updates.
+    Pollers sending If-None-Match get 304 until an asset changes.
     """
-    summary = {
-        'total': Asset.objects.count(),
-        'active': Asset.objects.filter(status='active').count(),
-        'maintenance': Asset.objects.filter(status='maintenance').count(),
-        'faulty': Asset.objects.filter(status='faulty').count(),
-        'standby': Asset.objects.filter(status='standby').count(),
-        'decommissioned': Asset.objects.filter(status='decommissioned').count(),
-    }
+    # One query with a conditional count per status
+    summary = Asset.objects.aggregate(
+        total=Count('pk'),
+        **{
+            status: Count('pk', filter=Q(status=status))
+            for status in ('active', 'maintenance', 'faulty', 'standby', 'decommissioned')
+        }
+    )
     
     return JsonResponse(summary)
 
+@login_required
+@replica_safe
+def user_asset_summaries(request):
+    """
+    API endpoint returning asset summaries for many users as JSON, keyed by user id.
+    Filter with ?location=<name>, ?department=<name> or repeated ?user=<id>.
+    Intended for team-lead dashboards listing every technician on one page.
+    """
+    users = CustomUser.objects.filter(is_active=True)
+    if request.GET.get('location'):
+        users = users.filter(location__name=request.GET['location'])
+    if request.GET.get('department'):
+        users = users.filter(department=request.GET['department'])
+    user_ids = [user_id for user_id in request.GET.getlist('user') if user_id.isdigit()]
+    if user_ids:
+        users = users.filter(pk__in=user_ids)
+    
+    summaries = get_user_asset_summaries(users.values_list('pk', flat=True), use_cache=True)
+    
+    return JsonResponse({str(user_id): summary for user_id, summary in summaries.items()})
+
+@login_required
+@replica_safe
+def nearby_assets(request):
+    """
+    API endpoint listing assets near a site or point, nearest first, e.g.
+    the nearest spare UPS: ?location=<name or id> (or ?lat=&lng=),
+    ?radius_km= (default GEO_DEFAULT_RADIUS_KM) and the asset list filters
+    ?type=, ?status= and ?search=.
+    """
+    try:
+        latitude, longitude, _ = parse_center(request.GET)
+        radius_km = parse_radius(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    locations = locations_within(latitude, longitude, radius_km)
+    assets = find_nearby_assets(locations, request.GET)
+    
+    return JsonResponse({
+        'locations': [
+            {'name': location.name, 'country': location.country, 'distance_km': round(distance, 1)}
+            for location, distance in locations
+        ],
+        'assets': [
+            {
+                'asset_tag': asset.asset_tag,
+                'name': asset.name,
+                'asset_type': asset.asset_type.name,
+                'status': asset.status,
+                'location': asset.location.name,
+                'distance_km': round(asset.distance_km, 1),
+            }
+            for asset in assets
+        ],
+    })
+
 @login_required
 def asset_assign(request, asset_tag):
     """
@@ -333,15 +433,126 @@ def user_assets(request, user_id):
         'asset_type', 'manufacturer', 'location'
     ).order_by('asset_tag')
     
-    # Get maintenance due for this user's assets
-    maintenance_due = assets.filter(
-        next_maintenance__lte=timezone.now().date()
-    ).exclude(status='decommissioned')
+    # Get maintenance due for this user's assets from the rows already loaded
+    # instead of running a second filtered query
+    assets = list(assets)
+    maintenance_due = [
+        asset for asset in assets
+        if asset.is_maintenance_due and asset.status != 'decommissioned'
+    ]
     
     context = {
         'profile_user': user,
         'assets': assets,
         'maintenance_due': maintenance_due,
+        'summary': get_user_asset_summary(user, use_cache=True),
+        'asset_type_count': len({asset.asset_type_id for asset in assets}),
     }
     
-    return render(request, 'assets/user_assets.html', context)
\ No newline at end of file
+    return render(request, 'assets/user_assets.html', context)
+
+@login_required
+@replica_safe
+def asset_spec_matrix_export(request, asset_type):
+    """
+    Stream all assets of a type as CSV with their specifications as columns.
+    The output starts with a UTF-8 byte order mark so it opens cleanly in Excel.
+    """
+    asset_type_obj = get_object_or_404(AssetType, name=asset_type)
+    
+    rows = iter_specification_matrix(asset_type_obj)
+    response = StreamingHttpResponse(
+        iter_csv_lines(rows, bom=True),
+        content_type='text/csv; charset=utf-8'
+    )
+    filename = f'{slugify(asset_type_obj.name)}-specifications.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
+
+@login_required
+@replica_safe
+def asset_list_export(request):
+    """
+    Stream the assets matching the asset list filters as CSV or JSON Lines.
+    Accepts the same query parameters as asset_list plus 'format' (csv or jsonl).
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'jsonl'):
+        return JsonResponse({'error': 'Unsupported export format'}, status=400)
+    
+    assets = filter_assets(Asset.objects.order_by('asset_tag'), request.GET)
+    
+    if export_format == 'jsonl':
+        lines = iter_jsonl_lines(iter_asset_rows(assets, header=False))
+        content_type = 'application/x-ndjson'
+    else:
+        lines = iter_csv_lines(iter_asset_rows(assets), bom=True)
+        content_type = 'text/csv; charset=utf-8'
+    
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="assets.{export_format}"'
+    
+    return response
+
+@login_required
+@replica_safe
+def asset_labels(request):
+    """
+    Print-ready PDF of QR labels for the assets matching the asset list
+    filters, streamed sheet by sheet. Each QR code opens the asset's page.
+    """
+    assets = filter_assets(Asset.objects.order_by('asset_tag'), request.GET)
+    rows = list(assets.values_list('asset_tag', 'name')[:MAX_LABELS + 1])
+    if len(rows) > MAX_LABELS:
+        return JsonResponse({'error': f'Narrow the filters: labels are printed for {MAX_LABELS} assets at most'}, status=400)
+    
+    base_url = request.build_absolute_uri('/')
+    response = StreamingHttpResponse(iter_label_pdf(rows, base_url), content_type='application/pdf')
+    response['Content-Disposition'] = 'inline; filename="asset-labels.pdf"'
+    
+    return response
+
+@login_required
+@replica_safe
+def asset_label(request, asset_tag):
+    """
+    One asset's label as SVG, for label printers and for embedding.
+    """
+    asset = get_object_or_404(Asset.objects.values('asset_tag', 'name'), asset_tag=asset_tag)
+    svg = render_label_svg(asset['asset_tag'], asset['name'], request.build_absolute_uri('/'))
+    
+    response = HttpResponse(svg, content_type='image/svg+xml')
+    response['Cache-Control'] = 'private, max-age=3600'
+    
+    return response
+
+@login_required
+@replica_safe
+def asset_scan(request):
+    """
+    API endpoint resolving a scanned label: ?code= is an asset tag or the
+    URL a label encodes. One lookup on the unique asset tag index.
+    """
+    code = request.GET.get('code', '').strip()
+    if '/' in code:
+        # A label URL: the tag is the last part of the path, percent-encoded like any URL part
+        code = unquote(urlsplit(code).path.rstrip('/').rsplit('/', 1)[-1])
+    asset_tag = normalize_asset_tag(code)
+    if not asset_tag:
+        return JsonResponse({'error': 'code is required'}, status=400)
+    
+    asset = Asset.objects.filter(asset_tag=asset_tag).values(
+        'asset_tag', 'name', 'status', 'asset_type__name', 'location__name'
+    ).first()
+    if asset is None:
+        return JsonResponse({'error': f'No asset with tag {asset_tag}'}, status=404)
+    
+    return JsonResponse({
+        'asset_tag': asset['asset_tag'],
+        'name': asset['name'],
+        'status': asset['status'],
+        'asset_type': asset['asset_type__name'],
+        'location': asset['location__name'],
+        'url': reverse('asset_detail', args=[asset['asset_tag']]),
+    })
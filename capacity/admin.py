@@ -0,0 +1,25 @@
+# capacity/admin.py
+
+from django.contrib import admin
+from .models import Space
+
+@admin.register(Space)
+class SpaceAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Space model. The totals are read-only: they
+    follow the assets installed (see capacity.budget).
+    """
+    list_display = ('name', 'kind', 'parent', 'asset_count', 'power_load_kw', 'power_capacity_kw', 'cooling_load_kw', 'cooling_capacity_kw')
+    list_filter = ('kind',)
+    search_fields = ('name',)
+    list_select_related = ('parent',)
+    raw_id_fields = ('parent',)
+    readonly_fields = ('power_supply_kw', 'cooling_supply_kw', 'power_load_kw', 'cooling_load_kw', 'asset_count')
+    fields = ('kind', 'name', 'parent', 'location', 'power_limit_kw', 'cooling_limit_kw', *readonly_fields)
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Assets are installed in racks, rows or halls, not whole sites
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if request.GET.get('model_name') == 'asset':
+            queryset = queryset.exclude(kind='site')
+        return queryset, may_have_duplicates
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CapacityConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'capacity'
+
+    def ready(self):
+        # Connect the signal handlers that keep the capacity totals up to date
+        from . import signals  # noqa: F401
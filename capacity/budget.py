@@ -0,0 +1,256 @@
+# capacity/budget.py
+
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from assets.models import Asset, AssetSpecification
+from .models import Footprint, Space
+
+# Specifications read for each part of an asset's footprint, by name. The
+# first one an asset has is used.
+POWER_SUPPLY_SPECS = getattr(settings, 'CAPACITY_POWER_SUPPLY_SPECS', ['Power Rating'])
+COOLING_SUPPLY_SPECS = getattr(settings, 'CAPACITY_COOLING_SUPPLY_SPECS', ['Cooling Capacity'])
+POWER_LOAD_SPECS = getattr(settings, 'CAPACITY_POWER_LOAD_SPECS', ['Power Consumption', 'Power Draw'])
+FOOTPRINT_SPECS = {*POWER_SUPPLY_SPECS, *COOLING_SUPPLY_SPECS, *POWER_LOAD_SPECS}
+
+# Real power per kVA of apparent power, for UPS ratings given in VA or kVA.
+POWER_FACTOR = getattr(settings, 'CAPACITY_POWER_FACTOR', 0.9)
+
+# kW per unit; VA units are multiplied by POWER_FACTOR as well.
+UNIT_KW = {
+    'w': 0.001,
+    'kw': 1.0,
+    'mw': 1000.0,
+    'va': 0.001,
+    'kva': 1.0,
+    'mva': 1000.0,
+    'tons': 3.517,
+    'ton': 3.517,
+    'tr': 3.517,
+    'btu/h': 0.000293,
+    'btu/hr': 0.000293,
+    'btuh': 0.000293,
+}
+
+NUMBER_PATTERN = re.compile(r'-?\d+(?:[.,]\d+)?')
+
+# The footprint parts, as named on Space and Footprint
+FIELDS = ('power_supply_kw', 'cooling_supply_kw', 'power_load_kw', 'cooling_load_kw')
+
+
+def spec_kw(value, unit):
+    """
+    A specification value in kW, e.g. ('600', 'kVA') → 540.0 or ('7.5 tons', '') → 26.4.
+    The unit may be part of the value. Returns None if it cannot be read.
+    """
+    match = NUMBER_PATTERN.search(value or '')
+    if not match:
+        return None
+    unit = (unit or value[match.end():]).strip().lower()
+    if unit not in UNIT_KW:
+        return None
+    kw = float(match.group().replace(',', '.')) * UNIT_KW[unit]
+    return kw * POWER_FACTOR if unit.endswith('va') else kw
+
+
+def first_kw(specs, names):
+    for name in names:
+        if name in specs:
+            kw = spec_kw(*specs[name])
+            if kw is not None:
+                return kw
+    return 0.0
+
+
+def footprint_values(status, specs):
+    """
+    What an asset adds to its space, from its status and its specifications
+    ({name: (value, unit)}). Decommissioned assets add nothing. Everything
+    drawing power gives it off as heat, except the cooling units removing it.
+    """
+    if status == 'decommissioned':
+        return dict.fromkeys(FIELDS, 0.0)
+    power_supply = first_kw(specs, POWER_SUPPLY_SPECS)
+    cooling_supply = first_kw(specs, COOLING_SUPPLY_SPECS)
+    power_load = first_kw(specs, POWER_LOAD_SPECS)
+    return {
+        'power_supply_kw': power_supply,
+        'cooling_supply_kw': cooling_supply,
+        'power_load_kw': power_load,
+        'cooling_load_kw': 0.0 if cooling_supply else power_load,
+    }
+
+
+def get_specs(asset_ids):
+    """{asset id: {name: (value, unit)}} for the footprint specifications, in one query"""
+    specs = {asset_id: {} for asset_id in asset_ids}
+    rows = AssetSpecification.objects.filter(
+        asset__in=asset_ids,
+        specification_name__in=FOOTPRINT_SPECS,
+    ).values_list('asset_id', 'specification_name', 'specification_value', 'unit')
+    for asset_id, name, value, unit in rows:
+        specs[asset_id][name] = (value, unit)
+    return specs
+
+
+def parent_path(path):
+    """'12/40/311/' → '12/40/'"""
+    return path[:path.rstrip('/').rfind('/') + 1]
+
+
+def add_to_path(path, deltas, count=0):
+    """Add to the totals of a space and every space above it, with one UPDATE"""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if count:
+        changes['asset_count'] = F('asset_count') + count
+    if changes:
+        Space.objects.filter(pk__in=[int(pk) for pk in path.split('/') if pk]).update(**changes)
+
+
+def refresh_footprint(asset_id):
+    """
+    Bring the spaces' totals up to date with one asset's placement, status
+    and specifications: the difference with its last counted footprint is
+    added along the paths concerned, at most two UPDATEs. Call after an
+    asset is saved or its specifications change.
+    """
+    with transaction.atomic():
+        asset = Asset.objects.filter(pk=asset_id).values('space_id', 'space__path', 'status').first()
+        old = Footprint.objects.select_for_update().select_related('space').filter(asset_id=asset_id).first()
+        if asset is None or asset['space_id'] is None:
+            if old:
+                remove_footprint(old)
+            return
+
+        new = footprint_values(asset['status'], get_specs([asset_id])[asset_id])
+        if old is None:
+            Footprint.objects.create(asset_id=asset_id, space_id=asset['space_id'], **new)
+            add_to_path(asset['space__path'], new, count=1)
+        elif old.space_id != asset['space_id']:
+            add_to_path(old.space.path, {field: -getattr(old, field) for field in FIELDS}, count=-1)
+            add_to_path(asset['space__path'], new, count=1)
+            Footprint.objects.filter(pk=asset_id).update(space_id=asset['space_id'], **new)
+        else:
+            deltas = {field: new[field] - getattr(old, field) for field in FIELDS}
+            if any(deltas.values()):
+                add_to_path(old.space.path, deltas)
+                Footprint.objects.filter(pk=asset_id).update(**new)
+
+
+def refresh_footprints(asset_ids):
+    """
+    refresh_footprint() for many assets at once, after bulk writes that send
+    no signals (update(), bulk_create()): the assets, footprints and
+    specifications are read with three queries, and the totals of each
+    space concerned updated once, with the differences of all its assets.
+    """
+    asset_ids = set(asset_ids)
+    if not asset_ids:
+        return
+    with transaction.atomic():
+        assets = {
+            pk: (space_id, path, status) for pk, space_id, path, status in
+            Asset.objects.filter(pk__in=asset_ids, space__isnull=False).values_list('pk', 'space_id', 'space__path', 'status')
+        }
+        old = {
+            footprint.asset_id: footprint for footprint in
+            Footprint.objects.select_for_update().select_related('space').filter(asset_id__in=asset_ids)
+        }
+        specs = get_specs(list(assets))
+
+        # {path: {field: delta, 'count': delta}}, summed over the assets
+        deltas = defaultdict(lambda: dict.fromkeys(FIELDS, 0.0) | {'count': 0})
+        footprints = []
+        for asset_id, footprint in old.items():
+            if asset_id not in assets:
+                for field in FIELDS:
+                    deltas[footprint.space.path][field] -= getattr(footprint, field)
+                deltas[footprint.space.path]['count'] -= 1
+        for asset_id, (space_id, path, status) in assets.items():
+            new = footprint_values(status, specs[asset_id])
+            footprint = old.get(asset_id)
+            if footprint is not None and footprint.space_id == space_id:
+                # Differences per asset, so the unchanged ones add exactly nothing
+                for field in FIELDS:
+                    deltas[path][field] += new[field] - getattr(footprint, field)
+            else:
+                if footprint is not None:
+                    for field in FIELDS:
+                        deltas[footprint.space.path][field] -= getattr(footprint, field)
+                    deltas[footprint.space.path]['count'] -= 1
+                for field in FIELDS:
+                    deltas[path][field] += new[field]
+                deltas[path]['count'] += 1
+            footprints.append(Footprint(asset_id=asset_id, space_id=space_id, **new))
+
+        for path, changes in deltas.items():
+            count = changes.pop('count')
+            add_to_path(path, changes, count=count)
+        Footprint.objects.filter(asset_id__in=old.keys() - assets.keys()).delete()
+        Footprint.objects.bulk_create(
+            footprints, batch_size=500,
+            update_conflicts=True, unique_fields=['asset'], update_fields=['space', *FIELDS],
+        )
+
+
+def remove_footprint(footprint):
+    """Take an asset out of the totals, e.g. before it is deleted"""
+    with transaction.atomic():
+        add_to_path(footprint.space.path, {field: -getattr(footprint, field) for field in FIELDS}, count=-1)
+        footprint.delete()
+
+
+def move_space(space, old_path):
+    """
+    After a space moved to another parent: take its totals off the spaces
+    it left, add them to the spaces it joined, and rewrite the paths below
+    it. Returns the number of spaces whose path changed.
+    """
+    with transaction.atomic():
+        totals = Space.objects.select_for_update().values(*FIELDS, 'asset_count').get(pk=space.pk)
+        count = totals.pop('asset_count')
+        # The spaces above it, without the space itself
+        add_to_path(parent_path(old_path), {field: -value for field, value in totals.items()}, count=-count)
+        add_to_path(parent_path(space.path), totals, count=count)
+        below = Space.objects.filter(path__gt=old_path, path__lt=old_path + '~').only('pk', 'path')
+        moved = [Space(pk=child.pk, path=space.path + child.path[len(old_path):]) for child in below]
+        Space.objects.bulk_update(moved, ['path'], batch_size=500)
+    return len(moved)
+
+
+def rebuild_totals():
+    """
+    Recompute every footprint and total from the assets, for setting up
+    the app and repairing totals changed behind its back (e.g. by update()
+    calls, which send no signals). Returns the number of spaces whose
+    totals were wrong.
+    """
+    with transaction.atomic():
+        placed = list(Asset.objects.filter(space__isnull=False).values_list('pk', 'space_id', 'status'))
+        specs = get_specs([pk for pk, _, _ in placed])
+        spaces = {space.pk: space for space in Space.objects.all()}
+        totals = {pk: dict.fromkeys(FIELDS, 0.0) | {'asset_count': 0} for pk in spaces}
+
+        Footprint.objects.all().delete()
+        footprints = []
+        for asset_id, space_id, status in placed:
+            values = footprint_values(status, specs[asset_id])
+            footprints.append(Footprint(asset_id=asset_id, space_id=space_id, **values))
+            for pk in spaces[space_id].path.split('/')[:-1]:
+                for field in FIELDS:
+                    totals[int(pk)][field] += values[field]
+                totals[int(pk)]['asset_count'] += 1
+        Footprint.objects.bulk_create(footprints, batch_size=500)
+
+        wrong = []
+        for pk, space in spaces.items():
+            if any(abs(getattr(space, field) - value) > 1e-6 for field, value in totals[pk].items()):
+                for field, value in totals[pk].items():
+                    setattr(space, field, value)
+                wrong.append(space)
+        Space.objects.bulk_update(wrong, [*FIELDS, 'asset_count'], batch_size=500)
+    return len(wrong)
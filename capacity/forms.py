@@ -0,0 +1,24 @@
+# capacity/forms.py
+
+from django import forms
+
+class FitForm(forms.Form):
+    """
+    A what-if placement: which racks can take this much more load.
+    """
+    ORDER_CHOICES = [
+        ('tight', 'Fullest racks first'),
+        ('spread', 'Emptiest racks first'),
+    ]
+    
+    power_kw = forms.FloatField(min_value=0, widget=forms.NumberInput(attrs={
+        'class': 'form-control',
+        'step': '0.1',
+        'placeholder': 'Power draw (kW)'
+    }))
+    cooling_kw = forms.FloatField(required=False, min_value=0, widget=forms.NumberInput(attrs={
+        'class': 'form-control',
+        'step': '0.1',
+        'placeholder': 'Heat (kW, default: the power draw)'
+    }))
+    order = forms.ChoiceField(choices=ORDER_CHOICES, required=False, widget=forms.Select(attrs={'class': 'form-control'}))
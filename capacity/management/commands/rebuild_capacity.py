@@ -0,0 +1,22 @@
+# capacity/management/commands/rebuild_capacity.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from capacity.budget import rebuild_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute the power and cooling totals of every space from the assets installed'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        wrong = rebuild_totals()
+        elapsed = time.monotonic() - started
+
+        if wrong:
+            self.stdout.write(self.style.WARNING(f'{wrong} space{"s" if wrong != 1 else ""} had wrong totals, now fixed'))
+        self.stdout.write(self.style.SUCCESS(f'Capacity totals rebuilt in {elapsed:.2f}s'))
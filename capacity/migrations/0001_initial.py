@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assets', '0004_asset_depends_on'),
+        ('users', '0003_location_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Space',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('site', 'Site'), ('hall', 'Hall'), ('row', 'Row'), ('rack', 'Rack')], max_length=10)),
+                ('name', models.CharField(help_text='e.g., Hall B, Row 3, Rack B3-07', max_length=100)),
+                ('path', models.CharField(db_index=True, editable=False, max_length=100)),
+                ('power_limit_kw', models.FloatField(blank=True, help_text='e.g., the rack PDU or hall feed rating', null=True)),
+                ('cooling_limit_kw', models.FloatField(blank=True, help_text='Heat the space is designed to remove', null=True)),
+                ('power_supply_kw', models.FloatField(default=0, editable=False, help_text='Rated power of the UPS units installed')),
+                ('cooling_supply_kw', models.FloatField(default=0, editable=False, help_text='Rated capacity of the cooling units installed')),
+                ('power_load_kw', models.FloatField(default=0, editable=False, help_text='Power drawn by the assets installed')),
+                ('cooling_load_kw', models.FloatField(default=0, editable=False, help_text='Heat given off by the assets installed')),
+                ('asset_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('location', models.ForeignKey(blank=True, help_text='Datacenter location of a site', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='spaces', to='users.location')),
+                ('parent', models.ForeignKey(blank=True, help_text='Site of a hall, hall of a row, row of a rack', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='capacity.space')),
+            ],
+            options={
+                'ordering': ['path'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Footprint',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='footprint', serialize=False, to='assets.asset')),
+                ('power_supply_kw', models.FloatField(default=0)),
+                ('cooling_supply_kw', models.FloatField(default=0)),
+                ('power_load_kw', models.FloatField(default=0)),
+                ('cooling_load_kw', models.FloatField(default=0)),
+                ('space', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='footprints', to='capacity.space')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='space',
+            constraint=models.UniqueConstraint(fields=('parent', 'name'), name='capacity_space_unique_name'),
+        ),
+    ]
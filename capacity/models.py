@@ -0,0 +1,161 @@
+# capacity/models.py
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from assets.models import Asset
+from users.models import Location
+
+class Space(models.Model):
+    """
+    A node of the physical topology: site → hall → row → rack.
+    
+    Every space carries the totals of the assets installed in it and in the
+    spaces below it. They are kept up to date incrementally: when an asset
+    moves or its specifications change, only the difference is added to the
+    spaces on its path (see capacity.budget), never recomputed from the
+    assets. `path` lists the ids from the site down ('12/40/311/'), so the
+    spaces above are known from one row and the spaces below are one index
+    range.
+    """
+    KIND_CHOICES = [
+        ('site', 'Site'),
+        ('hall', 'Hall'),
+        ('row', 'Row'),
+        ('rack', 'Rack'),
+    ]
+    
+    # Kind of space each kind sits in
+    PARENT_KINDS = {'site': None, 'hall': 'site', 'row': 'hall', 'rack': 'row'}
+    
+    TOTAL_FIELDS = ['power_supply_kw', 'cooling_supply_kw', 'power_load_kw', 'cooling_load_kw', 'asset_count']
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=100, help_text="e.g., Hall B, Row 3, Rack B3-07")
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='children',
+        help_text="Site of a hall, hall of a row, row of a rack"
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='spaces',
+        help_text="Datacenter location of a site"
+    )
+    path = models.CharField(max_length=100, editable=False, db_index=True)
+    
+    # Design limits; empty when only the installed equipment limits the space
+    power_limit_kw = models.FloatField(null=True, blank=True, help_text="e.g., the rack PDU or hall feed rating")
+    cooling_limit_kw = models.FloatField(null=True, blank=True, help_text="Heat the space is designed to remove")
+    
+    # Totals of the assets in this space and below, maintained by capacity.budget
+    power_supply_kw = models.FloatField(default=0, editable=False, help_text="Rated power of the UPS units installed")
+    cooling_supply_kw = models.FloatField(default=0, editable=False, help_text="Rated capacity of the cooling units installed")
+    power_load_kw = models.FloatField(default=0, editable=False, help_text="Power drawn by the assets installed")
+    cooling_load_kw = models.FloatField(default=0, editable=False, help_text="Heat given off by the assets installed")
+    asset_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    class Meta:
+        ordering = ['path']
+        constraints = [
+            models.UniqueConstraint(fields=['parent', 'name'], name='capacity_space_unique_name'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+    
+    def clean(self):
+        parent_kind = self.PARENT_KINDS.get(self.kind)
+        if parent_kind is None and self.parent_id:
+            raise ValidationError({'parent': 'A site is not inside another space.'})
+        if parent_kind and (self.parent is None or self.parent.kind != parent_kind):
+            raise ValidationError({'parent': f'A {self.get_kind_display().lower()} goes in a {parent_kind}.'})
+        if self.kind == 'site' and self.location_id is None:
+            raise ValidationError({'location': 'A site needs its location.'})
+    
+    def save(self, *args, **kwargs):
+        parent_path = self.parent.path if self.parent_id else ''
+        if self.pk is None:
+            # The path ends with the id, known once the row is inserted
+            super().save(*args, **kwargs)
+            self.path = f'{parent_path}{self.pk}/'
+            Space.objects.filter(pk=self.pk).update(path=self.path)
+            return
+        
+        old_path = Space.objects.filter(pk=self.pk).values_list('path', flat=True).first()
+        self.path = f'{parent_path}{self.pk}/'
+        if kwargs.get('update_fields') is None:
+            # The totals are only ever changed by capacity.budget; writing back the
+            # values read earlier would lose the changes made since
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        if old_path and old_path != self.path:
+            # Imported here because capacity.budget imports this module
+            from .budget import move_space
+            move_space(self, old_path)
+    
+    @property
+    def ancestor_ids(self):
+        """Ids of the spaces above this one, site first"""
+        return [int(pk) for pk in self.path.split('/')[:-2]]
+    
+    @property
+    def power_capacity_kw(self):
+        return capacity_of(self.power_limit_kw, self.power_supply_kw)
+    
+    @property
+    def cooling_capacity_kw(self):
+        return capacity_of(self.cooling_limit_kw, self.cooling_supply_kw)
+    
+    @property
+    def power_headroom_kw(self):
+        capacity = self.power_capacity_kw
+        return None if capacity is None else capacity - self.power_load_kw
+    
+    @property
+    def cooling_headroom_kw(self):
+        capacity = self.cooling_capacity_kw
+        return None if capacity is None else capacity - self.cooling_load_kw
+    
+    @property
+    def power_utilization(self):
+        """Power load as a percentage of capacity, or None"""
+        capacity = self.power_capacity_kw
+        return round(self.power_load_kw / capacity * 100) if capacity else None
+    
+    @property
+    def cooling_utilization(self):
+        capacity = self.cooling_capacity_kw
+        return round(self.cooling_load_kw / capacity * 100) if capacity else None
+
+def capacity_of(limit, supply):
+    """
+    What a space can take: the lower of its design limit and the rating of
+    the equipment supplying it, whichever are known; None if neither is.
+    """
+    known = [value for value in (limit, supply or None) if value is not None]
+    return min(known) if known else None
+
+class Footprint(models.Model):
+    """
+    What an installed asset adds to the totals of the spaces on its path, as
+    last counted. An asset move or specification change subtracts the old
+    footprint and adds the new one, so the totals never need a full pass.
+    """
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name='footprint')
+    space = models.ForeignKey(Space, on_delete=models.PROTECT, related_name='footprints')
+    power_supply_kw = models.FloatField(default=0)
+    cooling_supply_kw = models.FloatField(default=0)
+    power_load_kw = models.FloatField(default=0)
+    cooling_load_kw = models.FloatField(default=0)
+    
+    def __str__(self):
+        return f"{self.asset_id} in {self.space_id}"
@@ -0,0 +1,97 @@
+# capacity/planning.py
+
+from django.db.models import Q
+
+from .models import Space, capacity_of
+
+# Placements returned by a what-if query at most.
+FIT_LIMIT = 50
+
+
+class Node:
+    """One space as the planner sees it, with the headroom left on its path"""
+    __slots__ = ('pk', 'kind', 'name', 'path', 'parent_id', 'power_headroom', 'cooling_headroom', 'power_limited_by', 'cooling_limited_by')
+
+    def __init__(self, pk, kind, name, path, parent_id):
+        self.pk = pk
+        self.kind = kind
+        self.name = name
+        self.path = path
+        self.parent_id = parent_id
+
+
+def tighter(own, own_pk, inherited, inherited_pk):
+    """The smaller headroom of a space and of the spaces above it, and the space it belongs to"""
+    if own is None:
+        return inherited, inherited_pk
+    if inherited is None or own < inherited:
+        return own, own_pk
+    return inherited, inherited_pk
+
+
+class CapacityTree:
+    """
+    The spaces under one space (or all of them), with the power and cooling
+    headroom each has left once the spaces above it are counted: a rack
+    with 3 kW spare in a hall with 1 kW spare can take 1 kW. Loaded with one
+    query from the totals capacity.budget keeps; answering a placement
+    query is then one pass over the racks in memory.
+    """
+    def __init__(self, within=None):
+        spaces = Space.objects.all()
+        if within is not None:
+            # The subtree is one range on the path index; the spaces above it are a handful of ids
+            spaces = spaces.filter(
+                Q(path__gte=within.path, path__lt=within.path + '~') | Q(pk__in=within.ancestor_ids)
+            )
+        rows = spaces.order_by('path').values_list(
+            'pk', 'kind', 'name', 'path', 'parent_id',
+            'power_limit_kw', 'power_supply_kw', 'power_load_kw',
+            'cooling_limit_kw', 'cooling_supply_kw', 'cooling_load_kw',
+        )
+
+        self.nodes = {}
+        # Ordered by path, so every space comes after the spaces above it
+        for pk, kind, name, path, parent_id, power_limit, power_supply, power_load, cooling_limit, cooling_supply, cooling_load in rows:
+            node = Node(pk, kind, name, path, parent_id)
+            parent = self.nodes.get(parent_id)
+            power_capacity = capacity_of(power_limit, power_supply)
+            cooling_capacity = capacity_of(cooling_limit, cooling_supply)
+            node.power_headroom, node.power_limited_by = tighter(
+                None if power_capacity is None else power_capacity - power_load, pk,
+                parent.power_headroom if parent else None, parent.power_limited_by if parent else None,
+            )
+            node.cooling_headroom, node.cooling_limited_by = tighter(
+                None if cooling_capacity is None else cooling_capacity - cooling_load, pk,
+                parent.cooling_headroom if parent else None, parent.cooling_limited_by if parent else None,
+            )
+            self.nodes[pk] = node
+
+    def fit(self, power_kw, cooling_kw=None, kind='rack', order='tight', limit=FIT_LIMIT):
+        """
+        The spaces of a kind that can take power_kw more load and cooling_kw
+        more heat (by default the same as the power: it all ends up as heat).
+        order='tight' lists the fullest spaces that still fit first, to keep
+        whole racks free; order='spread' the emptiest. Spaces without known
+        capacity anywhere on their path fit anything and come last.
+        """
+        cooling_kw = power_kw if cooling_kw is None else cooling_kw
+        fits = [
+            node for node in self.nodes.values()
+            if node.kind == kind
+            and (node.power_headroom is None or node.power_headroom >= power_kw)
+            and (node.cooling_headroom is None or node.cooling_headroom >= cooling_kw)
+        ]
+
+        def key(node):
+            headrooms = [headroom for headroom in (node.power_headroom, node.cooling_headroom) if headroom is not None]
+            if not headrooms:
+                return (1, 0)
+            return (0, min(headrooms) if order == 'tight' else -min(headrooms))
+
+        fits.sort(key=key)
+        return fits[:limit]
+
+    def describe(self, node):
+        """Where a space is, e.g. 'Kampala / Hall B / Row 3 / B3-07'"""
+        return ' / '.join(self.nodes[int(pk)].name for pk in node.path.split('/')[:-1] if int(pk) in self.nodes)
@@ -0,0 +1,36 @@
+# capacity/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from assets.models import Asset, AssetSpecification
+
+# Keep the spaces' power and cooling totals up to date as assets move, change
+# status or get new specifications. The budget helpers are imported in the
+# handlers, so that loading the app does not import them. Changes made with
+# update() or bulk_create() send no signals; "manage.py rebuild_capacity"
+# catches up with those.
+
+@receiver(post_save, sender=Asset)
+def refresh_footprint_on_asset_save(sender, instance, **kwargs):
+    from .budget import refresh_footprint
+    from .models import Footprint
+    # Unplaced assets that never were cost one lookup
+    if instance.space_id or Footprint.objects.filter(pk=instance.pk).exists():
+        refresh_footprint(instance.pk)
+
+@receiver(pre_delete, sender=Asset)
+def remove_footprint_on_asset_delete(sender, instance, **kwargs):
+    from .budget import remove_footprint
+    from .models import Footprint
+    footprint = Footprint.objects.select_related('space').filter(pk=instance.pk).first()
+    if footprint:
+        remove_footprint(footprint)
+
+@receiver([post_save, post_delete], sender=AssetSpecification)
+def refresh_footprint_on_specification_change(sender, instance, origin=None, **kwargs):
+    from .budget import FOOTPRINT_SPECS, refresh_footprint
+    # Specifications deleted along with their asset are handled above
+    if isinstance(origin, Asset) or getattr(origin, 'model', None) is Asset:
+        return
+    if instance.specification_name in FOOTPRINT_SPECS:
+        refresh_footprint(instance.asset_id)
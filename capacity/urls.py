@@ -0,0 +1,15 @@
+# capacity/urls.py
+
+from django.urls import path
+from . import views
+
+# URL patterns for the Capacity application
+# These will be prefixed with 'capacity/' when included in the main project URLs
+
+urlpatterns = [
+    # Budgets per space and what-if placements
+    path('', views.capacity_overview, name='capacity_overview'),
+    
+    # API endpoints
+    path('api/fit/', views.capacity_fit, name='capacity_fit'),
+]
@@ -0,0 +1,71 @@
+# capacity/views.py
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from core.routers import replica_safe
+from .forms import FitForm
+from .models import Space
+from .planning import CapacityTree
+
+def get_space(params, key):
+    """The space named by ?<key>=<id>, or None if not given"""
+    value = params.get(key, '')
+    return get_object_or_404(Space, pk=value) if value.isdigit() else None
+
+@login_required
+@replica_safe
+def capacity_overview(request):
+    """
+    Power and cooling budget of the spaces in a space (the sites by default;
+    ?space=<id> drills down), and the racks a new load would fit in.
+    """
+    space = get_space(request.GET, 'space')
+    form = FitForm(request.GET if 'power_kw' in request.GET else None)
+    
+    fits = None
+    if form.is_bound and form.is_valid():
+        tree = CapacityTree(within=space)
+        fits = [
+            (node, tree.describe(node), tree.nodes[node.power_limited_by] if node.power_limited_by else None)
+            for node in tree.fit(form.cleaned_data['power_kw'], form.cleaned_data['cooling_kw'], order=form.cleaned_data['order'] or 'tight')
+        ]
+    
+    context = {
+        'space': space,
+        'breadcrumbs': Space.objects.filter(pk__in=space.ancestor_ids).order_by('path') if space else [],
+        'spaces': Space.objects.filter(parent=space).select_related('location').order_by('name'),
+        'form': form,
+        'fits': fits,
+    }
+    
+    return render(request, 'capacity/capacity_overview.html', context)
+
+@login_required
+@replica_safe
+def capacity_fit(request):
+    """
+    API endpoint for what-if placements: the racks that can take
+    ?power_kw= more load (and ?cooling_kw= more heat, by default the same),
+    optionally ?within=<space id> and ?order=tight|spread.
+    """
+    form = FitForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors.get_json_data()}, status=400)
+    within = get_space(request.GET, 'within')
+    
+    tree = CapacityTree(within=within)
+    fits = tree.fit(form.cleaned_data['power_kw'], form.cleaned_data['cooling_kw'], order=form.cleaned_data['order'] or 'tight')
+    
+    return JsonResponse({'racks': [
+        {
+            'id': node.pk,
+            'name': node.name,
+            'where': tree.describe(node),
+            'power_headroom_kw': None if node.power_headroom is None else round(node.power_headroom, 2),
+            'cooling_headroom_kw': None if node.cooling_headroom is None else round(node.cooling_headroom, 2),
+            'power_limited_by': tree.nodes[node.power_limited_by].name if node.power_limited_by else None,
+            'cooling_limited_by': tree.nodes[node.cooling_limited_by].name if node.cooling_limited_by else None,
+        }
+        for node in fits
+    ]})
@@ -0,0 +1,106 @@
+# core/databases.py
+
+# Database profiles selected with the KE_DB_PROFILE environment variable.
+# Imported by settings.py, so nothing here may import Django models.
+
+import os
+
+# Applied to every new SQLite connection by core.signals.configure_sqlite_connection.
+# WAL lets readers run alongside a writer, NORMAL sync is safe under WAL and
+# saves an fsync per commit, and busy_timeout makes a second writer wait for
+# the lock instead of failing with "database is locked" right away.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def sqlite_profile(base_dir):
+    """
+    SQLite tuned for a single site with several concurrent writers.
+
+    Transactions start with BEGIN IMMEDIATE so a writer takes the lock up
+    front (and waits busy_timeout for it) rather than failing when it tries
+    to upgrade a read lock halfway through.
+    """
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('KE_DB_NAME', base_dir / 'db.sqlite3'),
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        },
+    }
+
+
+def postgres_profile(base_dir):
+    """
+    PostgreSQL with either persistent connections or a connection pool.
+
+    By default each worker thread keeps its connection for KE_DB_CONN_MAX_AGE
+    seconds and checks it is alive before reuse. KE_DB_POOL=1 uses psycopg's
+    connection pool instead (requires psycopg[pool]); Django does not allow
+    persistent connections together with a pool, so CONN_MAX_AGE is 0 then.
+    """
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('KE_DB_NAME', 'knowledge_engine'),
+        'USER': os.environ.get('KE_DB_USER', 'knowledge_engine'),
+        'PASSWORD': os.environ.get('KE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('KE_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('KE_DB_PORT', '5432'),
+        'CONN_MAX_AGE': env_int('KE_DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': env_int('KE_DB_CONNECT_TIMEOUT', 5),
+        },
+    }
+    if os.environ.get('KE_DB_POOL') == '1':
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': env_int('KE_DB_POOL_MIN_SIZE', 2),
+            'max_size': env_int('KE_DB_POOL_MAX_SIZE', 10),
+            'timeout': env_int('KE_DB_POOL_TIMEOUT', 10),
+        }
+    return database
+
+
+def replica_profile(default, base_dir):
+    """
+    The 'replica' entry for a primary database entry, enabled with KE_DB_REPLICA=1.
+
+    For PostgreSQL it points at a streaming replica on KE_DB_REPLICA_HOST.
+    For SQLite the stand-in is a copy of the database file, refreshed with
+    "python manage.py sync_sqlite_replica" (e.g. from cron). Tests use the
+    primary for both aliases.
+    """
+    replica = {**default, 'OPTIONS': dict(default.get('OPTIONS', {})), 'TEST': {'MIRROR': 'default'}}
+    if default['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = os.environ.get('KE_DB_REPLICA_NAME', base_dir / 'db.replica.sqlite3')
+    else:
+        replica['HOST'] = os.environ.get('KE_DB_REPLICA_HOST', default['HOST'])
+        replica['PORT'] = os.environ.get('KE_DB_REPLICA_PORT', default['PORT'])
+    return replica
+
+
+DATABASE_PROFILES = {
+    'sqlite': sqlite_profile,
+    'postgres': postgres_profile,
+}
+
+
+def database_profile(name, base_dir):
+    """Return the DATABASES entry for a profile name"""
+    if name not in DATABASE_PROFILES:
+        raise ValueError(f'Unknown database profile "{name}", expected one of: {", ".join(DATABASE_PROFILES)}')
+    return DATABASE_PROFILES[name](base_dir)
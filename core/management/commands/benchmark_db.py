@@ -0,0 +1,136 @@
+# core/management/commands/benchmark_db.py
+
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import Client
+
+from assets.models import Asset, AssetLog
+
+# Marks the rows the write benchmark creates, so they can be removed afterwards.
+BENCHMARK_DESCRIPTION = 'benchmark_db write test'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the configured database profile on the hot views and with concurrent writers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, required=True, help='Username to request the pages as')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per view')
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads')
+        parser.add_argument('--writes', type=int, default=200, help='Writes per writer thread')
+        parser.add_argument('--readers', type=int, default=2, help='Reader threads running during the write test')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            self.user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+        self.asset = Asset.objects.order_by('pk').first()
+        if self.asset is None:
+            raise CommandError('The benchmark needs at least one asset')
+
+        database = settings.DATABASES['default']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Profile "{getattr(settings, "DATABASE_PROFILE", "?")}": {database["ENGINE"]} '
+            f'(CONN_MAX_AGE={database.get("CONN_MAX_AGE", 0)}, pool={bool(database.get("OPTIONS", {}).get("pool"))})'
+        ))
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = {}
+                for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                    cursor.execute(f'PRAGMA {name}')
+                    pragmas[name] = cursor.fetchone()[0]
+            self.stdout.write(', '.join(f'{name}={value}' for name, value in pragmas.items()))
+
+        self.benchmark_views(options['requests'])
+        self.benchmark_writes(options['writers'], options['writes'], options['readers'])
+
+    def benchmark_views(self, requests):
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(self.user)
+        views = [
+            ('asset_dashboard', '/assets/'),
+            ('asset_list', '/assets/list/'),
+            ('asset_detail', f'/assets/{self.asset.asset_tag}/'),
+            ('asset_status_summary', '/assets/api/status-summary/'),
+            ('profile', '/users/profile/'),
+        ]
+
+        self.stdout.write(f'\n{"view":<22} {"median ms":>10} {"p95 ms":>10} {"req/s":>8}')
+        for name, url in views:
+            client.get(url)  # Warm up caches and templates
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} returned {response.status_code}')
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{name:<22} {statistics.median(timings) * 1000:>10.2f} {p95 * 1000:>10.2f} '
+                f'{len(timings) / sum(timings):>8.0f}'
+            )
+
+    def benchmark_writes(self, writers, writes, readers):
+        """
+        Writer threads insert asset log entries, each in its own transaction,
+        while reader threads keep loading the asset list. Counts the writes
+        that failed with a lock error, which the profile should prevent.
+        """
+        errors = []
+        done = threading.Event()
+        reads = [0] * readers
+
+        def write():
+            try:
+                for _ in range(writes):
+                    try:
+                        with transaction.atomic():
+                            AssetLog.objects.create(
+                                asset_id=self.asset.pk, event_type='updated',
+                                description=BENCHMARK_DESCRIPTION, user=self.user,
+                            )
+                    except OperationalError as e:
+                        errors.append(str(e))
+            finally:
+                connections.close_all()
+
+        def read(index):
+            try:
+                while not done.is_set():
+                    list(Asset.objects.select_related('asset_type', 'location').order_by('asset_tag')[:100])
+                    reads[index] += 1
+            finally:
+                connections.close_all()
+
+        reader_threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+        writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+        started = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        deleted, _ = AssetLog.objects.filter(description=BENCHMARK_DESCRIPTION).delete()
+        attempted = writers * writes
+        self.stdout.write(
+            f'\n{writers} writers x {writes} commits with {readers} readers: {elapsed:.2f}s, '
+            f'{(attempted - len(errors)) / elapsed:.0f} commits/s, {sum(reads) / elapsed:.0f} list reads/s, '
+            f'{len(errors)} failed writes'
+        )
+        if errors:
+            self.stdout.write(self.style.WARNING(f'First failure: {errors[0]}'))
+        self.stdout.write(f'Removed {deleted} benchmark log entries')
@@ -0,0 +1,49 @@
+# core/management/commands/build_static.py
+
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core.storage import COMPRESSIBLE_EXTENSIONS
+
+
+class Command(BaseCommand):
+    help = 'Collect, minify, hash and pre-compress static files into STATIC_ROOT, then report their sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-clear', action='store_true', help='Keep files from previous builds in STATIC_ROOT')
+
+    def handle(self, *args, **options):
+        call_command('collectstatic', interactive=False, clear=not options['no_clear'], verbosity=0)
+
+        if not hasattr(staticfiles_storage, 'load_manifest'):
+            self.stdout.write(f'Collected static files into {settings.STATIC_ROOT}')
+            return
+        # Read the manifest this build wrote, not the one loaded at startup
+        hashed_files, _ = staticfiles_storage.load_manifest()
+
+        self.stdout.write(f'{"file":<40} {"source":>9} {"built":>9} {"gzip":>9} {"brotli":>9}')
+        for name, hashed_name in sorted(hashed_files.items()):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            sizes = [
+                self.size(finders.find(name)),
+                self.size(staticfiles_storage.path(hashed_name)),
+                self.size(staticfiles_storage.path(hashed_name) + '.gz'),
+                self.size(staticfiles_storage.path(hashed_name) + '.br'),
+            ]
+            self.stdout.write(f'{name[-40:]:<40} ' + ' '.join(f'{size:>9}' for size in sizes))
+
+        self.stdout.write(self.style.SUCCESS(f'Built {len(hashed_files)} static files into {settings.STATIC_ROOT}'))
+
+    def size(self, path):
+        if not path:
+            return '-'
+        try:
+            return f'{os.path.getsize(path) / 1024:.1f} KB'
+        except OSError:
+            return '-'
@@ -0,0 +1,82 @@
+# core/management/commands/fetch_fonts.py
+
+import os
+import re
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# The families and weights base.html used to load from Google Fonts.
+GOOGLE_FONTS_CSS_URL = (
+    'https://fonts.googleapis.com/css2?family=Lato:wght@400;700;900'
+    '&family=Lora:ital,wght@0,400;0,500;0,600;0,700;1,400&display=swap'
+)
+
+# Google Fonts only serves woff2 to browsers it recognises.
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+# Each @font-face block is preceded by a comment naming its character subset
+FONT_FACE = re.compile(r'/\* (?P<subset>[\w-]+) \*/\s*(?P<block>@font-face \{.*?\})', re.S)
+FONT_URL = re.compile(r'url\((?P<url>https://[^)]+)\)')
+DESCRIPTOR = re.compile(r'font-(?P<name>family|style|weight): (?P<value>[^;]+);')
+
+
+class Command(BaseCommand):
+    help = 'Download the web fonts into static/fonts/ and write static/css/fonts.css to self-host them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subsets', type=str, default='latin,latin-ext',
+            help='Comma-separated character subsets to keep (default: latin,latin-ext)'
+        )
+        parser.add_argument('--url', type=str, default=GOOGLE_FONTS_CSS_URL, help='Google Fonts CSS URL to mirror')
+
+    def handle(self, *args, **options):
+        static_dir = settings.STATICFILES_DIRS[0]
+        fonts_dir = os.path.join(static_dir, 'fonts')
+        css_path = os.path.join(static_dir, 'css', 'fonts.css')
+        subsets = {subset.strip() for subset in options['subsets'].split(',') if subset.strip()}
+
+        css = self.fetch(options['url']).decode('utf-8')
+        faces = [match for match in FONT_FACE.finditer(css) if match.group('subset') in subsets]
+        if not faces:
+            raise CommandError(f'No font faces for subsets {", ".join(sorted(subsets))} found at {options["url"]}')
+
+        os.makedirs(fonts_dir, exist_ok=True)
+        blocks = []
+        downloaded = {}
+        for match in faces:
+            block = match.group('block')
+            descriptors = {d.group('name'): d.group('value').strip("'\" ") for d in DESCRIPTOR.finditer(block)}
+            url = FONT_URL.search(block).group('url')
+
+            # Variable fonts share one file across weights; download each file once
+            if url not in downloaded:
+                filename = '{family}-{style}-{weight}-{subset}.woff2'.format(
+                    family=descriptors['family'].lower().replace(' ', '-'),
+                    style=descriptors['style'],
+                    weight=descriptors['weight'].replace(' ', '-'),
+                    subset=match.group('subset'),
+                )
+                with open(os.path.join(fonts_dir, filename), 'wb') as f:
+                    f.write(self.fetch(url))
+                downloaded[url] = filename
+
+            blocks.append(f'/* {match.group("subset")} */\n' + block.replace(url, f'../fonts/{downloaded[url]}'))
+
+        with open(css_path, 'w', encoding='utf-8') as f:
+            f.write(f'/* Generated by "python manage.py fetch_fonts" from {options["url"]} */\n')
+            f.write('\n'.join(blocks) + '\n')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {len(downloaded)} font files to {fonts_dir} and {len(blocks)} font faces to {css_path}'
+        ))
+
+    def fetch(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.read()
+        except OSError as e:
+            raise CommandError(f'Could not download {url}: {e}')
@@ -0,0 +1,184 @@
+# core/management/commands/startup_report.py
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import get_commands
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter for every measurement; prints the phase timings as JSON.
+BOOTSTRAP = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+from django.conf import settings
+settings.INSTALLED_APPS
+phases = {"settings": time.perf_counter() - started}
+
+# Time each app's models import and ready() (which is where the admin
+# imports every admin.py); -X importtime cannot see modules loaded with
+# importlib.import_module, which is how Django loads both
+app_times = {}
+import_models = AppConfig.import_models
+
+def timed(name, phase, func):
+    def wrapper(*args, **kwargs):
+        mark = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            times = app_times.setdefault(name, {"models": 0.0, "ready": 0.0})
+            times[phase] += time.perf_counter() - mark
+    return wrapper
+
+def import_models_timed(self):
+    self.ready = timed(self.name, "ready", self.ready)
+    return timed(self.name, "models", import_models)(self)
+
+AppConfig.import_models = import_models_timed
+mark = time.perf_counter()
+django.setup()
+phases["apps"] = time.perf_counter() - mark
+app_name, command_name, run_checks = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+if command_name:
+    from django.core.management import load_command_class
+    mark = time.perf_counter()
+    command = load_command_class(app_name, command_name)
+    phases["command"] = time.perf_counter() - mark
+    # Commands that opt out of system checks skip them when run
+    run_checks = run_checks and bool(command.requires_system_checks)
+if run_checks:
+    from django.core import checks as system_checks
+    mark = time.perf_counter()
+    system_checks.run_checks()
+    phases["checks"] = time.perf_counter() - mark
+print(json.dumps({"phases": phases, "apps": app_times}))
+'''
+
+PHASES = ('interpreter', 'settings', 'apps', 'command', 'checks')
+
+
+class Command(BaseCommand):
+    help = 'Measure how long Django takes to start, by phase and by the app whose modules are imported'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--command', type=str, help='Also load this management command (e.g., import_dx_asset)')
+        parser.add_argument('--no-checks', action='store_true', help='Leave out the system checks a command runs')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs; the median is reported')
+        parser.add_argument('--limit', type=int, default=15, help='Modules listed in the slowest-imports table')
+        parser.add_argument(
+            '--budget', type=float, default=getattr(settings, 'STARTUP_BUDGET_MS', None),
+            help='Fail when the median startup exceeds this many milliseconds (default: STARTUP_BUDGET_MS)'
+        )
+
+    def handle(self, *args, **options):
+        app_name = ''
+        if options['command']:
+            app_name = get_commands().get(options['command'])
+            if app_name is None:
+                raise CommandError(f'Unknown command "{options["command"]}"')
+        arguments = [app_name, options['command'] or '', '0' if options['no_checks'] else '1']
+
+        runs = [self.run(arguments) for _ in range(max(options['repeat'], 1))]
+        phases = {
+            phase: statistics.median(run[0].get(phase, 0.0) for run in runs)
+            for phase in PHASES
+        }
+        total = statistics.median(run[1] for run in runs)
+
+        target = f'"{options["command"]}"' if options['command'] else 'django.setup()'
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Startup of {target}, median of {len(runs)} runs'))
+        for phase in PHASES:
+            if phase == 'interpreter' or phases[phase]:
+                self.stdout.write(f'  {phase:<12} {phases[phase] * 1000:>8.1f} ms')
+        self.stdout.write(f'  {"total":<12} {total * 1000:>8.1f} ms')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nApp loading (median)'))
+        self.stdout.write(f'  {"app":<36} {"models":>8} {"ready":>11}')
+        app_names = {name for run in runs for name in run[2]}
+        app_times = {
+            name: [
+                statistics.median(run[2].get(name, {}).get(phase, 0.0) for run in runs)
+                for phase in ('models', 'ready')
+            ]
+            for name in app_names
+        }
+        for name, (models, ready) in sorted(app_times.items(), key=lambda item: sum(item[1]), reverse=True):
+            self.stdout.write(f'  {name:<36} {models * 1000:>5.1f} ms {ready * 1000:>8.1f} ms')
+
+        # One more run with -X importtime for the breakdown of import statements;
+        # it slows imports down, so it is reported separately from the timings above
+        modules = self.import_times(arguments)
+        groups = {}
+        for name, self_us in modules.items():
+            group = self.group_for(name)
+            groups[group] = groups.get(group, 0) + self_us
+        imported = sum(groups.values())
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nImport time by owner ({len(modules)} modules)'))
+        for group, self_us in sorted(groups.items(), key=lambda item: item[1], reverse=True):
+            self.stdout.write(f'  {group:<36} {self_us / 1000:>8.1f} ms {self_us / imported * 100:>6.1f}%')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSlowest project modules (self time)'))
+        project = [(name, us) for name, us in modules.items() if self.is_project_module(name)]
+        for name, self_us in sorted(project, key=lambda item: item[1], reverse=True)[:options['limit']]:
+            self.stdout.write(f'  {name:<36} {self_us / 1000:>8.1f} ms')
+
+        if options['budget'] is not None and total * 1000 > options['budget']:
+            raise CommandError(f'Startup took {total * 1000:.0f} ms, over the {options["budget"]:.0f} ms budget')
+
+    def run(self, arguments, importtime=False):
+        """Start a fresh interpreter and return (phases, wall time, app times, stderr)"""
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', BOOTSTRAP] + arguments
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        phases = report['phases']
+        phases['interpreter'] = elapsed - sum(phases.values())
+        return phases, elapsed, report['apps'], result.stderr
+
+    def import_times(self, arguments):
+        """Return {module: self time in microseconds} from -X importtime output"""
+        stderr = self.run(arguments, importtime=True)[3]
+        modules = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = int(self_us)
+        return modules
+
+    def is_project_module(self, name):
+        """Whether a module belongs to one of our apps rather than Django or a library"""
+        base_dir = str(settings.BASE_DIR)
+        project_packages = {
+            config.name.split('.')[0] for config in apps.get_app_configs() if config.path.startswith(base_dir)
+        }
+        return name.split('.')[0] in project_packages
+
+    def group_for(self, name):
+        """The installed app owning a module, else Django, stdlib or third party"""
+        best = ''
+        for config in apps.get_app_configs():
+            if (name == config.name or name.startswith(config.name + '.')) and len(config.name) > len(best):
+                best = config.name
+        if best:
+            return f'app {best}'
+        top_level = name.split('.')[0]
+        if top_level == 'django':
+            return 'django (framework)'
+        if top_level in sys.stdlib_module_names or top_level.startswith('_'):
+            return 'python standard library'
+        return f'third party: {top_level}'
@@ -0,0 +1,43 @@
+# core/management/commands/sync_sqlite_replica.py
+
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import REPLICA_DATABASE
+
+
+class Command(BaseCommand):
+    help = 'Refresh the SQLite read replica stand-in with a consistent copy of the primary database'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        if REPLICA_DATABASE not in settings.DATABASES:
+            raise CommandError('No replica configured; set KE_DB_REPLICA=1')
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES[REPLICA_DATABASE]
+        if not (primary['ENGINE'].endswith('sqlite3') and replica['ENGINE'].endswith('sqlite3')):
+            raise CommandError('Only SQLite replicas are copied; other databases replicate on their own')
+
+        started = time.monotonic()
+        # Copy into a temporary file and swap it in, so readers of the replica
+        # never see a half-written database
+        tmp_path = f'{replica["NAME"]}.tmp'
+        source = sqlite3.connect(primary['NAME'])
+        target = sqlite3.connect(tmp_path)
+        try:
+            # The backup API copies a consistent snapshot even while others write
+            source.backup(target)
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, replica['NAME'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {primary["NAME"]} to {replica["NAME"]} in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,64 @@
+# core/middleware.py
+
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiling import template_profiler
+from .routers import begin_request, end_request, replica_configured
+
+logger = logging.getLogger(__name__)
+
+class TemplateProfilerMiddleware:
+    """
+    Profiles template rendering for every request when TEMPLATE_PROFILING is on.
+
+    The totals go out in a Server-Timing header (visible in the browser's
+    network panel) and the per-template table is logged to core.middleware
+    at DEBUG level. Disabled, the middleware removes itself at startup.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'TEMPLATE_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with template_profiler.profile(f'{request.method} {request.path}') as profile:
+            response = self.get_response(request)
+        
+        if profile.stats:
+            response['Server-Timing'] = (
+                f'tpl;dur={profile.render_time * 1000:.1f};desc="Template rendering", '
+                f'tplq;desc="Template queries: {profile.render_queries}/{profile.queries}"'
+            )
+            logger.debug('Template profile for %s\n%s', profile.label, profile.report(limit=20))
+        
+        return response
+
+class ReplicaRoutingMiddleware:
+    """
+    Gives read-your-writes consistency when a read replica is configured.
+
+    Users who wrote during a request are pinned to the primary for
+    REPLICA_STICKY_SECONDS, so replica-safe pages they open right after
+    (e.g. the dashboard after editing an asset) show their change. Place it
+    after AuthenticationMiddleware. Without a replica it removes itself.
+    """
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        begin_request(user_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            # Logging in happens during the request; pin the user it produced
+            user = getattr(request, 'user', None)
+            end_request(user.pk if user is not None and user.is_authenticated else user_id)
+        
+        return response
@@ -0,0 +1,197 @@
+# core/profiling.py
+
+import threading
+import time
+
+from django.db import connections
+from django.template.base import Template
+from django.template.loader_tags import BlockNode, IncludeNode
+
+# Kinds of render frames the profiler records.
+TEMPLATE = 'template'
+INCLUDE = 'include'
+BLOCK = 'block'
+
+
+class FrameStats:
+    """
+    Accumulated render statistics for one template, include or block.
+
+    total_time and total_queries include everything rendered inside the
+    frame; self_time and self_queries exclude nested frames, so they point
+    at the template that actually did the work (e.g. a lazy relation load).
+    """
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.total_queries = 0
+        self.self_queries = 0
+
+    def add(self, elapsed, child_time, queries, child_queries):
+        self.count += 1
+        self.total_time += elapsed
+        self.self_time += elapsed - child_time
+        self.total_queries += queries
+        self.self_queries += queries - child_queries
+
+
+class RenderProfile:
+    """
+    Render statistics of one request (or any other unit of work),
+    keyed by (kind, name).
+    """
+    def __init__(self, label=''):
+        self.label = label
+        self.stats = {}
+        self.queries = 0
+        self.render_time = 0.0
+        self.stack = []
+
+    def stats_for(self, kind, name):
+        key = (kind, name)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = FrameStats()
+        return stats
+
+    @property
+    def render_queries(self):
+        return sum(stats.self_queries for stats in self.stats.values())
+
+    def merge(self, other):
+        for key, other_stats in other.stats.items():
+            stats = self.stats_for(*key)
+            stats.count += other_stats.count
+            stats.total_time += other_stats.total_time
+            stats.self_time += other_stats.self_time
+            stats.total_queries += other_stats.total_queries
+            stats.self_queries += other_stats.self_queries
+        self.queries += other.queries
+        self.render_time += other.render_time
+
+    def rows(self, order_by='self_time'):
+        """Return (kind, name, stats) tuples, most expensive first"""
+        return sorted(
+            ((kind, name, stats) for (kind, name), stats in self.stats.items()),
+            key=lambda row: getattr(row[2], order_by),
+            reverse=True,
+        )
+
+    def report(self, limit=None, order_by='self_time'):
+        """Format the statistics as a plain text table"""
+        lines = [
+            f'{"kind":<9} {"name":<48} {"count":>6} {"total ms":>9} {"self ms":>9} {"queries":>8} {"self q":>7}'
+        ]
+        for kind, name, stats in self.rows(order_by)[:limit]:
+            lines.append(
+                f'{kind:<9} {name[-48:]:<48} {stats.count:>6} {stats.total_time * 1000:>9.2f} '
+                f'{stats.self_time * 1000:>9.2f} {stats.total_queries:>8} {stats.self_queries:>7}'
+            )
+        lines.append(
+            f'Rendering: {self.render_time * 1000:.2f} ms, '
+            f'{self.render_queries} of {self.queries} queries triggered inside templates'
+        )
+        return '\n'.join(lines)
+
+
+class TemplateProfiler:
+    """
+    Times template rendering and counts the queries run while rendering.
+
+    install() wraps Template._render (every template, including parents
+    reached through {% extends %}), IncludeNode.render and BlockNode.render.
+    Measurements only happen inside profile(), so once installed the cost
+    outside a profiled request is one thread-local lookup per frame.
+
+        with template_profiler.profile('GET /assets/') as profile:
+            response = view(request)
+        print(profile.report())
+    """
+    def __init__(self):
+        self.local = threading.local()
+        self.installed = False
+
+    @property
+    def current(self):
+        return getattr(self.local, 'profile', None)
+
+    def install(self):
+        if self.installed:
+            return
+        self.installed = True
+        profiler = self
+
+        template_render = Template._render
+        include_render = IncludeNode.render
+        block_render = BlockNode.render
+
+        def _render(self, context):
+            return profiler.measure(TEMPLATE, self.origin.template_name or self.origin.name, template_render, self, context)
+
+        def render_include(self, context):
+            return profiler.measure(INCLUDE, str(self.template.token), include_render, self, context)
+
+        def render_block(self, context):
+            return profiler.measure(BLOCK, self.name, block_render, self, context)
+
+        Template._render = _render
+        IncludeNode.render = render_include
+        BlockNode.render = render_block
+
+    def measure(self, kind, name, render, node, context):
+        profile = self.current
+        if profile is None:
+            return render(node, context)
+
+        # Children add their inclusive time and queries to the parent's frame
+        frame = [0.0, 0]
+        profile.stack.append(frame)
+        queries = profile.queries
+        started = time.perf_counter()
+        try:
+            return render(node, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            queries = profile.queries - queries
+            profile.stack.pop()
+            profile.stats_for(kind, str(name)).add(elapsed, frame[0], queries, frame[1])
+            if profile.stack:
+                profile.stack[-1][0] += elapsed
+                profile.stack[-1][1] += queries
+            else:
+                profile.render_time += elapsed
+
+    def count_query(self, execute, sql, params, many, context):
+        profile = self.current
+        if profile is not None:
+            profile.queries += 1
+        return execute(sql, params, many, context)
+
+    def profile(self, label=''):
+        return ProfileContext(self, RenderProfile(label))
+
+
+class ProfileContext:
+    def __init__(self, profiler, profile):
+        self.profiler = profiler
+        self.profile = profile
+        self.wrappers = []
+
+    def __enter__(self):
+        self.profiler.install()
+        self.previous = self.profiler.current
+        self.profiler.local.profile = self.profile
+        for connection in connections.all():
+            wrapper = connection.execute_wrapper(self.profiler.count_query)
+            wrapper.__enter__()
+            self.wrappers.append(wrapper)
+        return self.profile
+
+    def __exit__(self, *exc_info):
+        for wrapper in reversed(self.wrappers):
+            wrapper.__exit__(*exc_info)
+        self.profiler.local.profile = self.previous
+
+
+template_profiler = TemplateProfiler()
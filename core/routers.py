@@ -0,0 +1,124 @@
+# core/routers.py
+
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Alias of the read replica in DATABASES (see core.databases.replica_profile).
+REPLICA_DATABASE = 'replica'
+
+# After a user writes, their reads stay on the primary this long (seconds),
+# so they see their own changes while the replica catches up.
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 30)
+
+_state = threading.local()
+
+
+def replica_configured():
+    return REPLICA_DATABASE in settings.DATABASES
+
+
+def replica_pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for the next REPLICA_STICKY_SECONDS"""
+    if user_id:
+        cache.set(replica_pin_key(user_id), True, REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return bool(user_id) and cache.get(replica_pin_key(user_id), False)
+
+
+class ReplicaRouter:
+    """
+    Routes reads made inside @replica_safe code to the replica.
+
+    Everything else, and every write, uses the primary ('default'). Reads
+    also stay on the primary once the current request has written anything,
+    or when its user is pinned after a recent write (see
+    core.middleware.ReplicaRoutingMiddleware). Without a 'replica' entry in
+    DATABASES the router does nothing.
+    """
+    def db_for_read(self, model, **hints):
+        if (
+            getattr(_state, 'replica_depth', 0)
+            and not getattr(_state, 'wrote', False)
+            and not getattr(_state, 'pinned', False)
+            and replica_configured()
+        ):
+            return REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Remembered so later reads in this request see the write. Django
+        # also asks this for uniqueness validation, so a submitted form pins
+        # its user even if it was invalid; erring towards the primary is safe.
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA_DATABASE
+
+
+class replica_context:
+    """Context manager behind replica_safe; nests and restores on exit"""
+    def __enter__(self):
+        _state.replica_depth = getattr(_state, 'replica_depth', 0) + 1
+        return self
+
+    def __exit__(self, *exc_info):
+        _state.replica_depth -= 1
+
+
+def replica_safe(func):
+    """
+    Mark a view or utility as safe to read from the replica, i.e. it only
+    reads, and data a few seconds (REPLICA_STICKY_SECONDS) old is acceptable.
+    Reporting and dashboard code is the typical case:
+
+        @login_required
+        @replica_safe
+        def asset_dashboard(request):
+            ...
+
+    Streaming responses keep reading from the replica while they stream.
+    Writes inside the function still go to the primary, and any reads after
+    them too.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_context():
+            result = func(*args, **kwargs)
+        if getattr(result, 'streaming', False):
+            result.streaming_content = stream_from_replica(result.streaming_content)
+        return result
+    return wrapper
+
+
+def stream_from_replica(content):
+    with replica_context():
+        yield from content
+
+
+def begin_request(user_id):
+    """Reset the routing state for a new request on this thread"""
+    _state.wrote = False
+    _state.pinned = is_pinned_to_primary(user_id) if replica_configured() else False
+
+
+def end_request(user_id):
+    """Pin the user to the primary if the request wrote anything"""
+    if getattr(_state, 'wrote', False) and replica_configured():
+        pin_to_primary(user_id)
+    _state.wrote = False
+    _state.pinned = False
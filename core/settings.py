@@ -22,7 +22,9 @@ ALLOWED_HOSTS = []
 # These are the applications that are included in your project.
 # We have added the apps we plan to build: 'Users', 'Assets', and 'Incidents'.
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig does not import every admin.py at startup; core/urls.py
+    # calls admin.autodiscover() instead, so only processes serving URLs pay for it.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -30,17 +32,29 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     # Our custom applications
+    # 'core' holds project-wide tooling (template profiler, database setup, management commands).
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'assets.apps.AssetsConfig',
-    #'Incidents.apps.IncidentsConfig',
+    'telemetry.apps.TelemetryConfig',
+    'incidents.apps.IncidentsConfig',
+    'capacity.apps.CapacityConfig',
+    'sync.apps.SyncConfig',
 ]
 
 MIDDLEWARE = [
+    # Only active when TEMPLATE_PROFILING is on; first so it sees every query of the request.
+    'core.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files when SERVE_STATIC is on (deployments without nginx).
+    'core.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.LastSeenMiddleware',
+    # Only active with a read replica; keeps users who just wrote on the primary.
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -48,12 +62,15 @@ MIDDLEWARE = [
 # This tells Django where to find the main URL configuration for the project.
 ROOT_URLCONF = 'core.urls'
 
+# Templates are compiled once per process and kept by the cached loader
+# (Django's default since 4.1, configured explicitly here so it cannot be
+# lost by adding 'loaders'). In development the autoreloader clears it when
+# a template file changes.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         # This tells Django to look for a 'templates' directory at the project's root level.
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -61,25 +78,165 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Replaces APP_DIRS, which cannot be combined with 'loaders'.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Set KE_TEMPLATE_PROFILING=1 to time template rendering on every request
+# (see core/profiling.py). Reports are also available offline with
+# "python manage.py profile_templates <url>".
+TEMPLATE_PROFILING = os.environ.get('KE_TEMPLATE_PROFILING') == '1'
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 
 # --- DATABASE CONFIGURATION ---
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-# For development, we'll use SQLite, which is a simple file-based database.
-# For production, you would typically use a more robust database like PostgreSQL.
+# Choose a profile from core/databases.py with KE_DB_PROFILE:
+#   sqlite    (default) SQLite in WAL mode, tuned for several concurrent writers
+#   postgres  PostgreSQL with persistent connections, or a pool with KE_DB_POOL=1
+# Connection details come from KE_DB_NAME, KE_DB_USER, KE_DB_PASSWORD, KE_DB_HOST and KE_DB_PORT.
+# Compare them on the hot views with "python manage.py benchmark_db".
+from core.databases import database_profile, replica_profile  # noqa: E402
+
+DATABASE_PROFILE = os.environ.get('KE_DB_PROFILE', 'sqlite')
 DATABASES = {
+    'default': database_profile(DATABASE_PROFILE, BASE_DIR),
+}
+
+# KE_DB_REPLICA=1 adds a read replica. Reporting code marked with
+# core.routers.replica_safe reads from it; everything else uses 'default'.
+# Users who just wrote something keep reading from 'default' for
+# REPLICA_STICKY_SECONDS, which should exceed the replica's lag.
+if os.environ.get('KE_DB_REPLICA') == '1':
+    DATABASES['replica'] = replica_profile(DATABASES['default'], BASE_DIR)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 30
+
+
+# --- CACHING ---
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# A per-process in-memory cache by default. For deployments running several
+# worker processes, point this at a shared cache (e.g. Redis or Memcached).
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'knowledge-engine',
     }
 }
 
 
+# Profile page sections are cached per user for this long (seconds) and
+# invalidated early by the signal handlers in users/signals.py and assets/signals.py.
+PROFILE_FRAGMENT_CACHE_TIMEOUT = 600
+
+
+# Per-user asset summaries (assets.utils.get_user_asset_summaries) are cached this long (seconds).
+ASSET_SUMMARY_CACHE_TIMEOUT = 300
+
+
+# --- TELEMETRY ---
+# Raw readings are kept this long (seconds); older data lives only in roll-ups.
+TELEMETRY_RAW_RETENTION = 6 * 60 * 60
+# Roll-ups are kept this long (seconds) per resolution; None keeps them forever.
+TELEMETRY_ROLLUP_RETENTION = {
+    60: 2 * 24 * 60 * 60,
+    3600: 90 * 24 * 60 * 60,
+    86400: None,
+}
+# A minute is rolled up this many seconds after it ends, to wait for stragglers.
+TELEMETRY_LATENESS = 30
+# Bearer tokens accepted by the ingest endpoint, comma separated (one per gateway).
+TELEMETRY_INGEST_TOKENS = [token for token in os.environ.get('KE_TELEMETRY_TOKENS', '').split(',') if token]
+# Readings queued in memory per process before ingest answers 429, and written per batch.
+TELEMETRY_INGEST_QUEUE_SIZE = 250_000
+TELEMETRY_INGEST_BATCH_SIZE = 5_000
+
+
+# --- INCIDENTS ---
+# Minutes allowed per priority (1 Critical … 4 Low) to acknowledge and to resolve an
+# incident. Missed deadlines are flagged by "python manage.py sweep_incident_sla".
+INCIDENT_SLA_TARGETS = {
+    1: (15, 4 * 60),
+    2: (30, 8 * 60),
+    3: (2 * 60, 24 * 60),
+    4: (8 * 60, 72 * 60),
+}
+
+# Incident events (telemetry alerts, POST /incidents/api/events/) this many seconds
+# apart are correlated: repeats are suppressed and related events grouped under one
+# parent, related meaning sharing an upstream asset (Asset.depends_on), then the same
+# asset type at a location, then the same location.
+INCIDENT_CORRELATION_WINDOW = 300
+INCIDENT_CORRELATE_BY = ['dependency', 'asset_type', 'location']
+
+
+# --- CAPACITY ---
+# Asset specifications read for each asset's share of its space's power and cooling
+# budget; values in W, kW, VA, kVA, tons or BTU/h. kVA ratings count at CAPACITY_POWER_FACTOR.
+CAPACITY_POWER_SUPPLY_SPECS = ['Power Rating']
+CAPACITY_COOLING_SUPPLY_SPECS = ['Cooling Capacity']
+CAPACITY_POWER_LOAD_SPECS = ['Power Consumption', 'Power Draw']
+CAPACITY_POWER_FACTOR = 0.9
+
+
+# --- ASSET LABELS ---
+# QR labels (Assets › Print Labels) encode ASSET_LABEL_BASE_URL + the asset's page; empty
+# uses the host the labels are printed from. Set it when that is not the address scanners
+# reach. Encoded QR codes are cached under MEDIA_ROOT/labels/ by content.
+ASSET_LABEL_BASE_URL = ''
+ASSET_LABEL_ERROR_LEVEL = 'm'
+# Overrides of the sheet layout in points, e.g. {'columns': 2, 'rows': 7}; see assets/labels.py.
+ASSET_LABEL_SHEET = {}
+
+
+# --- SYNC ---
+# Changes sent per pull by the delta sync API for offline mobile clients (/sync/api/pull/);
+# clients pull again while the answer says there is more.
+SYNC_PAGE_SIZE = 5_000
+
+
+# --- PROFILE PHOTOS ---
+# Square variants (side in pixels) built in the background from every uploaded profile
+# photo, in WebP and JPEG, next to the originals; pages and the roster API use them instead
+# of the originals. Photos uploaded before: "python manage.py build_photo_variants".
+USER_PHOTO_SIZES = {'small': 96, 'medium': 192, 'large': 480}
+
+
+# --- SESSIONS ---
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/#configuring-the-session-engine
+# Database sessions cost a read and often a write on every request. Set
+# KE_SESSION_ENGINE to 'cached_db' (cache in front of the database) or
+# 'signed_cookies' (no server-side storage at all) to avoid that.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('KE_SESSION_ENGINE', 'db')]
+
+# Only write the session back when it changed (Django's default, made explicit).
+SESSION_SAVE_EVERY_REQUEST = False
+
+# "Last seen" timestamps are buffered and written in batches (see users/presence.py).
+PRESENCE_LAST_SEEN_RESOLUTION = 60
+PRESENCE_FLUSH_INTERVAL = 30
+PRESENCE_FLUSH_SIZE = 500
+
+
+# "python manage.py startup_report" fails when startup takes longer than this (milliseconds).
+STARTUP_BUDGET_MS = None
+
+
 # --- AUTHENTICATION & AUTHORIZATION ---
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 # This is the most important setting for our custom user model.
@@ -117,6 +274,24 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# "python manage.py build_static" collects, minifies, hashes (e.g. style.3f2a1b9c0d4e.css)
+# and pre-compresses (.gz, plus .br when the brotli package is installed) everything here.
+# With DEBUG on, or before the first build, {% static %} returns the plain names.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Set KE_SERVE_STATIC=1 to serve STATIC_ROOT from Django itself (core/static.py)
+# when there is no web server in front of it. Hashed files are cached by
+# browsers for a year; other files for STATIC_MAX_AGE seconds.
+SERVE_STATIC = os.environ.get('KE_SERVE_STATIC') == '1'
+STATIC_MAX_AGE = 60 * 60
+
 # URL that handles the media served from MEDIA_ROOT.
 MEDIA_URL = '/media/'
 # This is the directory where user-uploaded files (like profile photos) will be stored.
@@ -0,0 +1,21 @@
+# core/signals.py
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .databases import SQLITE_PRAGMAS
+from .routers import REPLICA_DATABASE
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    # PRAGMAs are per connection (journal_mode is also stored in the file),
+    # so they are applied every time Django opens one
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in SQLITE_PRAGMAS.items():
+            # The replica stand-in is replaced by a file copy; a WAL file left
+            # next to it would be replayed into the new copy
+            if name == 'journal_mode' and connection.alias == REPLICA_DATABASE:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,130 @@
+# core/static.py
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed
+from django.utils.http import http_date, parse_http_date_safe
+
+# Hashed files never change under their name; cache them for a year.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Files without a content hash in their name can change on the next deploy.
+DEFAULT_MAX_AGE = getattr(settings, 'STATIC_MAX_AGE', 60 * 60)
+
+# Pre-compressed variants in order of preference: (file suffix, Content-Encoding)
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.')
+
+
+class StaticFile:
+    """
+    One servable file under STATIC_ROOT with its headers computed once:
+    the path and size of each encoded variant, the ETag and cache lifetime.
+    """
+    def __init__(self, path, name, is_hashed):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        self.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        max_age = IMMUTABLE_MAX_AGE if is_hashed else DEFAULT_MAX_AGE
+        self.cache_control = f'public, max-age={max_age}' + (', immutable' if is_hashed else '')
+        self.variants = [
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for suffix, encoding in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+
+    def select(self, accept_encoding):
+        """
+        Return (path, size, content encoding or None, ETag) for the client's
+        Accept-Encoding. Each encoding gets its own ETag, as it is a
+        different representation of the file.
+        """
+        for encoding, path, size in self.variants:
+            if encoding in accept_encoding:
+                return path, size, encoding, f'{self.etag[:-1]}-{encoding}"'
+        return self.path, self.size, None, self.etag
+
+    def is_not_modified(self, request, etag):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in if_none_match or if_none_match.strip() == '*'
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and if_modified_since >= parse_http_date_safe(self.last_modified)
+
+
+def build_file_index(root, url_prefix):
+    """
+    Map every URL under url_prefix to a StaticFile by walking root once.
+    Compressed variants are served through their original's entry.
+    """
+    manifest_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    index = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(tuple(suffix for suffix, _ in ENCODINGS)):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            is_hashed = name in manifest_names or bool(HASHED_NAME.search(filename))
+            index[url_prefix + name] = StaticFile(path, name, is_hashed)
+    return index
+
+
+class StaticFilesMiddleware:
+    """
+    Serves collected static files from STATIC_ROOT without a separate web
+    server, for deployments that have no nginx in front of Django.
+
+    The file list is read once at startup (run collectstatic before starting
+    the process), so a request costs a dictionary lookup and never touches
+    paths outside STATIC_ROOT. Hashed files are sent with far-future
+    immutable caching, and the .br/.gz variants written by
+    core.storage.CompressedManifestStaticFilesStorage are used when the
+    client accepts them. Enable with SERVE_STATIC and place it right after
+    SecurityMiddleware.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVE_STATIC', False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else f'/{settings.STATIC_URL}'
+        self.files = build_file_index(settings.STATIC_ROOT, self.prefix)
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            # Not collected; let Django answer (a 404, or the development static view)
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        path, size, encoding, etag = static_file.select(request.headers.get('Accept-Encoding', ''))
+        if static_file.is_not_modified(request, etag):
+            response = HttpResponse(status=304)
+        else:
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=static_file.content_type)
+            else:
+                response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            response['Content-Length'] = size
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        response['ETag'] = etag
+        response['Last-Modified'] = static_file.last_modified
+        response['Cache-Control'] = static_file.cache_control
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
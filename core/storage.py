@@ -0,0 +1,135 @@
+# core/storage.py
+
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip variants are written
+    brotli = None
+
+# Files worth compressing; images and fonts are already compressed formats.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+
+# Compressed variants smaller than this fraction of the original are kept.
+MIN_COMPRESSION_RATIO = 0.95
+
+# Quoted strings (kept as they are) and comments (dropped), in one pass
+CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+CSS_WHITESPACE = re.compile(r'\s+')
+CSS_SPACE_AROUND = re.compile(r' ?([{};,>]) ?')
+CSS_SPACE_AFTER_COLON = re.compile(r': ')
+
+
+def minify_css(css):
+    """
+    Remove comments and redundant whitespace from a stylesheet.
+
+    Deliberately conservative: quoted strings (including data URIs) are left
+    untouched and spaces that can be significant (e.g. inside calc() or
+    between selector parts) are kept, so the output renders identically.
+    """
+    parts = []
+    position = 0
+    for match in CSS_STRING_OR_COMMENT.finditer(css):
+        parts.append((css[position:match.start()], False))
+        if match.group(1):
+            parts.append((match.group(1), True))
+        else:
+            parts.append((' ', False))
+        position = match.end()
+    parts.append((css[position:], False))
+
+    # Join the code between strings so whitespace rules apply across comments
+    chunks = []
+    code = []
+    for text, is_string in parts:
+        if is_string:
+            chunks.append(compact_css(''.join(code)))
+            chunks.append(text)
+            code = []
+        else:
+            code.append(text)
+    chunks.append(compact_css(''.join(code)))
+    return ''.join(chunks).strip()
+
+
+def compact_css(code):
+    code = CSS_WHITESPACE.sub(' ', code)
+    code = CSS_SPACE_AROUND.sub(r'\1', code)
+    code = CSS_SPACE_AFTER_COLON.sub(':', code)
+    return code.replace(';}', '}')
+
+
+def compress_variants(content):
+    """
+    Return {'.gz': bytes, '.br': bytes} for the encodings that make content
+    meaningfully smaller (brotli only when the package is installed).
+    """
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {
+        suffix: data for suffix, data in variants.items()
+        if len(data) < len(content) * MIN_COMPRESSION_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also minifies stylesheets before they are
+    hashed and writes pre-compressed .gz/.br files next to every compressible
+    file, so they can be served without compressing on each request (see
+    core.static.StaticFilesMiddleware, or nginx's gzip_static/brotli_static).
+
+    Files missing from the manifest, or every file before build_static has
+    run (e.g. under the test runner, which turns DEBUG off), get their plain
+    names rather than failing the page.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected into STATIC_ROOT either, so there is nothing to hash
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+
+        # collectstatic has already copied the sources here; minify the copies
+        # and hash those, so the hash matches what is served
+        paths = dict(paths)
+        for path in paths:
+            if path.endswith('.css'):
+                with self.open(path) as f:
+                    css = f.read().decode('utf-8')
+                self.replace(path, minify_css(css).encode('utf-8'))
+                paths[path] = (self, path)
+
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+
+        for name in sorted(processed_names):
+            self.write_compressed(name)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as f:
+            content = f.read()
+        for suffix, data in compress_variants(content).items():
+            self.replace(name + suffix, data)
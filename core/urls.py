@@ -6,6 +6,10 @@ from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
 
+# Register the models of every app's admin.py. Done here rather than at startup
+# (see INSTALLED_APPS), so management commands do not load the admin modules.
+admin.autodiscover()
+
 urlpatterns = [
     # The URL for the Django admin interface.
     path('admin/', admin.site.urls),
@@ -19,6 +23,16 @@ urlpatterns = [
     # Any URL starting with 'assets/' will be handled by the assets app
     path('assets/', include('assets.urls')),
 
+    # Telemetry application URLs (sensor reading time series)
+    path('telemetry/', include('telemetry.urls')),
+
+    # Incidents application URLs (queue, SLA tracking)
+    path('incidents/', include('incidents.urls')),
+    path('capacity/', include('capacity.urls')),
+
+    # Delta sync API for the technicians' offline mobile clients
+    path('sync/', include('sync.urls')),
+
     # For user convenience, this line redirects the root URL of the site ('/')
     # directly to our login page ('/users/login/'). So, when someone visits
     # your website's homepage, they will be taken straight to the login form.
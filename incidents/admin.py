@@ -0,0 +1,36 @@
+# incidents/admin.py
+
+from django.contrib import admin
+from .models import Incident, IncidentActivity
+
+class IncidentActivityInline(admin.TabularInline):
+    """
+    Inline admin for the activity log, newest first. Read-only: the log is an audit trail.
+    """
+    model = IncidentActivity
+    fields = ('timestamp', 'kind', 'entry', 'user')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Incident)
+class IncidentAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Incident model.
+    """
+    list_display = ('number', 'short_description', 'asset', 'priority', 'status', 'assigned_to', 'opened_at', 'suppressed_count', 'response_breached', 'resolution_breached')
+    list_filter = ('status', 'priority', 'category', 'response_breached', 'resolution_breached')
+    search_fields = ('short_description', 'asset__asset_tag')
+    list_select_related = ('asset', 'assigned_to')
+    raw_id_fields = ('asset', 'parent', 'assigned_to', 'reported_by', 'acknowledged_by')
+    readonly_fields = ('response_due', 'resolution_due', 'suppressed_count', 'last_event_at', 'updated_at')
+    inlines = [IncidentActivityInline]
+    
+    def save_model(self, request, obj, form, change):
+        # Deadlines follow the priority
+        if 'priority' in form.changed_data or 'opened_at' in form.changed_data:
+            obj.apply_sla()
+        super().save_model(request, obj, form, change)
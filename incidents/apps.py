@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class IncidentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'incidents'
+
+    def ready(self):
+        # Connect the signal handlers that reload the correlation topology
+        from . import signals  # noqa: F401
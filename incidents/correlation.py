@@ -0,0 +1,297 @@
+# incidents/correlation.py
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from assets.models import Asset
+from .models import Incident, IncidentActivity
+from .utils import open_incident
+
+# Events this many seconds apart or less are correlated: repeats of an
+# event are suppressed, and related events are grouped under one parent.
+CORRELATION_WINDOW = getattr(settings, 'INCIDENT_CORRELATION_WINDOW', 300)
+
+# How events are related, strongest first: through the asset dependencies
+# (Asset.depends_on), by asset type at one location, or by location alone.
+CORRELATE_BY = getattr(settings, 'INCIDENT_CORRELATE_BY', ['dependency', 'asset_type', 'location'])
+
+# The asset topology (locations, types, dependencies) is reloaded after this
+# many seconds, and when an asset or dependency changes in this process.
+TOPOLOGY_MAX_AGE = getattr(settings, 'INCIDENT_TOPOLOGY_MAX_AGE', 300)
+
+
+class IncidentEvent:
+    """
+    Something that may need an incident, e.g. a BMS alarm or a telemetry
+    threshold rule breached. `key` names what raised it (e.g. 'alert:12'),
+    so a repeat of the same event on the same asset is recognised.
+    """
+    __slots__ = ('asset_id', 'short_description', 'key', 'ts', 'priority', 'category', 'description')
+
+    def __init__(self, asset_id, short_description, key, ts=None, priority=3, category='other', description=''):
+        self.asset_id = asset_id
+        self.short_description = short_description
+        self.key = key
+        self.ts = ts or timezone.now()
+        self.priority = priority
+        self.category = category
+        self.description = description
+
+
+class WindowIndex:
+    """
+    Values (incident ids) under correlation keys, each key's entries sorted
+    by event time and kept for a sliding window. Finding the entry nearest
+    an event is a binary search, O(log n) in the entries under the key.
+    """
+    def __init__(self, window):
+        self.window = window
+        self._times = defaultdict(list)
+        self._values = defaultdict(list)
+
+    def add(self, key, ts, value):
+        times = self._times[key]
+        position = bisect.bisect_right(times, ts)
+        times.insert(position, ts)
+        self._values[key].insert(position, value)
+
+    def find(self, key, ts):
+        """Return the value nearest ts under key within the window, or None"""
+        times = self._times.get(key)
+        if not times:
+            return None
+        position = bisect.bisect_right(times, ts)
+        nearest = min(
+            (index for index in (position - 1, position) if 0 <= index < len(times)),
+            key=lambda index: abs(times[index] - ts),
+        )
+        if abs(times[nearest] - ts) <= self.window:
+            return self._values[key][nearest]
+        return None
+
+    def expire(self, before):
+        """Drop the entries older than `before`"""
+        for key in list(self._times):
+            times = self._times[key]
+            position = bisect.bisect_left(times, before)
+            if position == len(times):
+                del self._times[key], self._values[key]
+            elif position:
+                del times[:position], self._values[key][:position]
+
+    def replace(self, old, new):
+        """Point the entries of one value at another"""
+        for values in self._values.values():
+            for index, value in enumerate(values):
+                if value == old:
+                    values[index] = new
+
+    def discard(self, values):
+        for key in list(self._times):
+            kept = [(ts, value) for ts, value in zip(self._times[key], self._values[key]) if value not in values]
+            if not kept:
+                del self._times[key], self._values[key]
+            else:
+                self._times[key], self._values[key] = map(list, zip(*kept))
+
+
+class Topology:
+    """
+    Location, asset type and everything an asset depends on, directly or
+    through other assets, for every asset; loaded with two queries.
+    """
+    def __init__(self):
+        assets = {pk: (location_id, asset_type_id) for pk, location_id, asset_type_id in
+                  Asset.objects.values_list('pk', 'location_id', 'asset_type_id')}
+        depends_on = defaultdict(list)
+        for asset_id, upstream_id in Asset.depends_on.through.objects.values_list('from_asset_id', 'to_asset_id'):
+            depends_on[asset_id].append(upstream_id)
+
+        self.assets = assets
+        self.upstream = {}
+        for asset_id in assets:
+            # Walk the dependencies; seen guards against cycles
+            seen, stack = set(), list(depends_on[asset_id])
+            while stack:
+                upstream_id = stack.pop()
+                if upstream_id not in seen and upstream_id != asset_id:
+                    seen.add(upstream_id)
+                    stack.extend(depends_on[upstream_id])
+            self.upstream[asset_id] = frozenset(seen)
+        self.loaded_at = time.monotonic()
+
+    def keys(self, asset_id):
+        """Correlation keys of an event on the asset, strongest first"""
+        if asset_id not in self.assets:
+            return []
+        location_id, asset_type_id = self.assets[asset_id]
+        keys = []
+        for relation in CORRELATE_BY:
+            if relation == 'dependency':
+                # Two events are related if their assets depend on a common asset,
+                # or one on the other
+                keys.extend(('asset', related_id) for related_id in self.upstream[asset_id] | {asset_id})
+            elif relation == 'asset_type':
+                keys.append(('asset_type', location_id, asset_type_id))
+            elif relation == 'location':
+                keys.append(('location', location_id))
+        return keys
+
+    def depends_on(self, asset_id, upstream_id):
+        return upstream_id in self.upstream.get(asset_id, ())
+
+
+class Correlator:
+    """
+    Turns incident events into incidents, correlating each with the events
+    of the last CORRELATION_WINDOW seconds in memory before anything is
+    written:
+
+    - a repeat of an event (same asset and key) is suppressed: no row is
+      written, only the incident's repeat counter is bumped once per batch;
+    - an event related to a recent one (see CORRELATE_BY) opens a child
+      incident under the same parent, so a generator failure and the alarms
+      of everything it powers are one entry in the queue; if the new event's
+      asset is what the parent's asset depends on, it becomes the parent;
+    - any other event opens a new top-level incident.
+
+    The window lives in this process: it is rebuilt from the open incidents
+    when first used, and events correlated by different processes may open
+    separate incidents.
+    """
+    def __init__(self, window=CORRELATION_WINDOW):
+        self.window = window
+        self._topology = None
+        self._groups = None
+        self._repeats = {}
+        self._roots = {}
+        self._expired_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate_topology(self):
+        self._topology = None
+
+    def get_topology(self):
+        if self._topology is None or time.monotonic() - self._topology.loaded_at > TOPOLOGY_MAX_AGE:
+            self._topology = Topology()
+        return self._topology
+
+    def load_window(self, topology, now):
+        """Rebuild the in-memory window from the open incidents with recent events"""
+        # Read before anything is reset, so a failed query leaves the window to be loaded next time
+        recent = list(Incident.objects.filter(
+            status__in=Incident.OPEN_STATUSES,
+            opened_at__gte=now - timedelta(seconds=self.window * 2),
+        ).values_list('pk', 'asset_id', 'event_key', 'parent_id', 'opened_at', 'last_event_at'))
+        self._groups = WindowIndex(self.window)
+        self._repeats = {}
+        self._roots = {}
+        for pk, asset_id, event_key, parent_id, opened_at, last_event_at in recent:
+            self.remember(topology, pk, asset_id, event_key, parent_id or pk, (last_event_at or opened_at).timestamp())
+            if parent_id is None:
+                self._roots[pk] = asset_id
+
+    def remember(self, topology, incident_id, asset_id, event_key, root_id, ts):
+        if event_key:
+            self._repeats[asset_id, event_key] = [incident_id, ts]
+        for key in topology.keys(asset_id):
+            self._groups.add(key, ts, root_id)
+
+    def submit(self, events):
+        """
+        Correlate events and write the incidents they open. Returns a list of
+        (event, incident id, outcome) with outcome 'opened', 'grouped' or
+        'suppressed'. If writing fails, the window is reloaded from the
+        database next time, so it never refers to incidents rolled back.
+        """
+        results = []
+        repeated = defaultdict(lambda: [0, None])
+        with self._lock:
+            topology = self.get_topology()
+            now = timezone.now()
+            if self._groups is None:
+                self.load_window(topology, now)
+            if time.monotonic() - self._expired_at > self.window / 10:
+                cutoff = now.timestamp() - self.window * 2
+                self._groups.expire(cutoff)
+                self._repeats = {key: repeat for key, repeat in self._repeats.items() if repeat[1] >= cutoff}
+                self._expired_at = time.monotonic()
+
+            try:
+                with transaction.atomic():
+                    for event in sorted(events, key=lambda event: event.ts):
+                        ts = event.ts.timestamp()
+                        repeat = self._repeats.get((event.asset_id, event.key))
+                        if repeat and abs(ts - repeat[1]) <= self.window:
+                            # The window slides with the repeats, so a flapping alarm stays one incident
+                            repeat[1] = max(repeat[1], ts)
+                            repeated[repeat[0]][0] += 1
+                            repeated[repeat[0]][1] = max(repeated[repeat[0]][1] or event.ts, event.ts)
+                            results.append((event, repeat[0], 'suppressed'))
+                            continue
+
+                        root_id = next(
+                            (root for root in (self._groups.find(key, ts) for key in topology.keys(event.asset_id)) if root),
+                            None,
+                        )
+                        if root_id and topology.depends_on(self._roots.get(root_id), event.asset_id):
+                            # The cause arrived after its effects: it becomes the parent
+                            incident = self.open(event)
+                            Incident.objects.filter(Q(pk=root_id) | Q(parent_id=root_id)).update(parent=incident)
+                            self._groups.replace(root_id, incident.pk)
+                            self._roots.pop(root_id, None)
+                            root_id = None
+                        else:
+                            incident = self.open(event, parent_id=root_id)
+
+                        if root_id:
+                            results.append((event, incident.pk, 'grouped'))
+                        else:
+                            self._roots[incident.pk] = event.asset_id
+                            results.append((event, incident.pk, 'opened'))
+                        self.remember(topology, incident.pk, event.asset_id, event.key, root_id or incident.pk, ts)
+
+                    # One UPDATE per incident repeated in this batch, not per repeat
+                    for incident_id, (count, last_event_at) in repeated.items():
+                        Incident.objects.filter(pk=incident_id).update(
+                            suppressed_count=F('suppressed_count') + count, last_event_at=last_event_at,
+                        )
+            except Exception:
+                # The window already holds what was rolled back
+                self._groups = None
+                raise
+        return results
+
+    def open(self, event, parent_id=None):
+        incident = open_incident(
+            event.short_description, priority=event.priority, category=event.category, description=event.description,
+            asset_id=event.asset_id, parent_id=parent_id, event_key=event.key, opened_at=event.ts, last_event_at=event.ts,
+        )
+        if parent_id:
+            IncidentActivity.objects.create(
+                incident=incident, kind='note', timestamp=incident.opened_at,
+                entry=f'Grouped under {Incident(pk=parent_id).number}',
+            )
+        return incident
+
+    def forget(self, incident_ids):
+        """Stop correlating with incidents that were resolved or closed"""
+        with self._lock:
+            if self._groups is None:
+                return
+            incident_ids = set(incident_ids)
+            self._groups.discard(incident_ids)
+            self._repeats = {key: repeat for key, repeat in self._repeats.items() if repeat[0] not in incident_ids}
+            for incident_id in incident_ids:
+                self._roots.pop(incident_id, None)
+
+
+correlator = Correlator()
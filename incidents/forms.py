@@ -0,0 +1,63 @@
+# incidents/forms.py
+
+from django import forms
+from assets.forms import normalize_asset_tag
+from assets.models import Asset
+from users.models import CustomUser
+from .models import Incident
+
+class IncidentForm(forms.ModelForm):
+    """
+    Form for logging a new incident. The asset is entered by tag rather than
+    picked from a list of every asset.
+    """
+    asset_tag = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., UPS-001 (optional)'}),
+    )
+    
+    class Meta:
+        model = Incident
+        fields = ['short_description', 'category', 'priority', 'description', 'assigned_to']
+        widgets = {
+            'short_description': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'e.g., Water detected under RO plant'
+            }),
+            'category': forms.Select(attrs={'class': 'form-control'}),
+            'priority': forms.Select(attrs={'class': 'form-control'}),
+            'description': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 4,
+                'placeholder': 'What is happening, and what has been checked so far...'
+            }),
+            'assigned_to': forms.Select(attrs={'class': 'form-control'}),
+        }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['assigned_to'].queryset = CustomUser.objects.filter(is_active=True).order_by('full_name')
+        self.fields['assigned_to'].label_from_instance = lambda user: user.full_name or user.username
+    
+    def clean_asset_tag(self):
+        asset_tag = normalize_asset_tag(self.cleaned_data['asset_tag'])
+        if not asset_tag:
+            return None
+        try:
+            return Asset.objects.get(asset_tag=asset_tag)
+        except Asset.DoesNotExist:
+            raise forms.ValidationError(f'No asset with tag {asset_tag}.')
+
+class StatusChangeForm(forms.Form):
+    """
+    Moves an incident along its lifecycle from the detail page, with an optional note.
+    """
+    status = forms.ChoiceField(choices=Incident.STATUS_CHOICES)
+    note = forms.CharField(required=False, widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2}))
+
+class NoteForm(forms.Form):
+    entry = forms.CharField(widget=forms.Textarea(attrs={
+        'class': 'form-control',
+        'rows': 2,
+        'placeholder': 'Add to the activity log...'
+    }))
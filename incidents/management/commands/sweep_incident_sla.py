@@ -0,0 +1,25 @@
+# incidents/management/commands/sweep_incident_sla.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from incidents.sla import SweepResult, sweep_sla
+
+
+class Command(BaseCommand):
+    help = 'Flag incidents that missed their response or resolution SLA (run every minute from cron)'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = sweep_sla(result=SweepResult())
+        elapsed = time.monotonic() - started
+
+        for name, numbers in result.breached.items():
+            if numbers:
+                self.stdout.write(self.style.WARNING(
+                    f'{len(numbers)} {name} SLA breach{"es" if len(numbers) != 1 else ""}: {", ".join(numbers)}'
+                ))
+        self.stdout.write(self.style.SUCCESS(f'SLA sweep done in {elapsed:.2f}s'))
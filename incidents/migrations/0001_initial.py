@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assets', '0003_add_incident_resolved_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Incident',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short_description', models.CharField(help_text='One line summary (e.g., High temperature alarm on IAC 1)', max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('category', models.CharField(choices=[('power', 'Power'), ('cooling', 'Cooling'), ('batteries', 'Batteries'), ('plumbing', 'Plumbing'), ('fire', 'Fire Systems'), ('generators', 'Generators'), ('cameras', 'Cameras'), ('other', 'Other')], default='other', max_length=20)),
+                ('priority', models.PositiveSmallIntegerField(choices=[(1, '1 - Critical'), (2, '2 - High'), (3, '3 - Moderate'), (4, '4 - Low')], default=3)),
+                ('status', models.CharField(choices=[('new', 'New'), ('acknowledged', 'Acknowledged'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], default='new', max_length=20)),
+                ('opened_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resolution', models.TextField(blank=True, help_text='What was done to restore service')),
+                ('response_due', models.DateTimeField(help_text='Acknowledge by')),
+                ('resolution_due', models.DateTimeField(help_text='Resolve by')),
+                ('response_breached', models.BooleanField(default=False)),
+                ('resolution_breached', models.BooleanField(default=False)),
+                ('acknowledged_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('asset', models.ForeignKey(blank=True, help_text='Asset affected, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incidents', to='assets.asset')),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_incidents', to=settings.AUTH_USER_MODEL)),
+                ('reported_by', models.ForeignKey(blank=True, help_text='Empty when logged by the system', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['priority', 'opened_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IncidentActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opened', 'Opened'), ('status_change', 'Status Changed'), ('note', 'Note'), ('sla_breach', 'SLA Breached')], max_length=20)),
+                ('entry', models.TextField()),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('incident', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='incidents.incident')),
+                ('user', models.ForeignKey(blank=True, help_text='Empty for system entries', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Incident Activity',
+                'verbose_name_plural': 'Incident Activity',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['status', 'priority', 'opened_at'], name='incidents_queue'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(condition=models.Q(('acknowledged_at__isnull', True), ('response_breached', False)), fields=['response_due'], name='incidents_response_due'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(condition=models.Q(('resolution_breached', False), ('resolved_at__isnull', True)), fields=['resolution_due'], name='incidents_resolution_due'),
+        ),
+        migrations.AddIndex(
+            model_name='incidentactivity',
+            index=models.Index(fields=['incident', 'timestamp'], name='incidents_activity_incident'),
+        ),
+    ]
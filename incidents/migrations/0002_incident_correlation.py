@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_asset_depends_on'),
+        ('incidents', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='incident',
+            name='incidents_queue',
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='event_key',
+            field=models.CharField(blank=True, help_text='What raised it, for spotting repeats (e.g., alert:12)', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='last_event_at',
+            field=models.DateTimeField(blank=True, help_text='Time of the latest event, repeats included', null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Incident this one is a consequence of, e.g. the generator failure behind an IAC alarm', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='incidents.incident'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='suppressed_count',
+            field=models.PositiveIntegerField(default=0, help_text='Repeats of the event folded into this incident'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(condition=models.Q(('parent__isnull', True)), fields=['status', 'priority', 'opened_at'], name='incidents_queue'),
+        ),
+    ]
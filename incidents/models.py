@@ -0,0 +1,191 @@
+# incidents/models.py
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from assets.models import Asset
+from users.models import CustomUser
+
+class Incident(models.Model):
+    """
+    An unplanned interruption or degradation of a service, usually on one asset
+    (ITIL incident management: log, prioritise, acknowledge, resolve, close).
+    
+    Incidents raised together by one cause are grouped under a parent; the
+    queue lists parents only, and acknowledging or resolving a parent does
+    the same to its children.
+    
+    Every incident gets two SLA deadlines from its priority when it is opened:
+    respond (acknowledge) by response_due and resolve by resolution_due. The
+    SLA sweep (incidents.sla.sweep_sla) flags the ones missed.
+    """
+    PRIORITY_CHOICES = [
+        (1, '1 - Critical'),
+        (2, '2 - High'),
+        (3, '3 - Moderate'),
+        (4, '4 - Low'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('new', 'New'),
+        ('acknowledged', 'Acknowledged'),
+        ('in_progress', 'In Progress'),
+        ('resolved', 'Resolved'),
+        ('closed', 'Closed'),
+    ]
+    
+    # Statuses of incidents still in the queue
+    OPEN_STATUSES = ['new', 'acknowledged', 'in_progress']
+    
+    CATEGORY_CHOICES = [
+        ('power', 'Power'),
+        ('cooling', 'Cooling'),
+        ('batteries', 'Batteries'),
+        ('plumbing', 'Plumbing'),
+        ('fire', 'Fire Systems'),
+        ('generators', 'Generators'),
+        ('cameras', 'Cameras'),
+        ('other', 'Other'),
+    ]
+    
+    # CSS class of the priority badge for each priority
+    PRIORITY_CLASSES = {1: 'critical', 2: 'high', 3: 'medium', 4: 'low'}
+    
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='incidents',
+        help_text="Asset affected, if any"
+    )
+    short_description = models.CharField(max_length=255, help_text="One line summary (e.g., High temperature alarm on IAC 1)")
+    description = models.TextField(blank=True)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=3)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
+    
+    # Correlation (see incidents/correlation.py)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='children',
+        help_text="Incident this one is a consequence of, e.g. the generator failure behind an IAC alarm"
+    )
+    event_key = models.CharField(max_length=100, blank=True, help_text="What raised it, for spotting repeats (e.g., alert:12)")
+    suppressed_count = models.PositiveIntegerField(default=0, help_text="Repeats of the event folded into this incident")
+    last_event_at = models.DateTimeField(null=True, blank=True, help_text="Time of the latest event, repeats included")
+    
+    # People
+    reported_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="Empty when logged by the system")
+    assigned_to = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assigned_incidents',
+    )
+    acknowledged_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    # Lifecycle timestamps
+    opened_at = models.DateTimeField(default=timezone.now)
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    resolution = models.TextField(blank=True, help_text="What was done to restore service")
+    
+    # SLA deadlines, set from the priority when the incident is opened
+    response_due = models.DateTimeField(help_text="Acknowledge by")
+    resolution_due = models.DateTimeField(help_text="Resolve by")
+    response_breached = models.BooleanField(default=False)
+    resolution_breached = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['priority', 'opened_at']
+        indexes = [
+            # The queue: top-level incidents of a status, most urgent and oldest
+            # first (children are read through their parent)
+            models.Index(
+                fields=['status', 'priority', 'opened_at'], name='incidents_queue',
+                condition=Q(parent__isnull=True),
+            ),
+            # The SLA sweep reads only deadlines still running, from these partial
+            # indexes; met and breached deadlines drop out of them
+            models.Index(
+                fields=['response_due'], name='incidents_response_due',
+                condition=Q(acknowledged_at__isnull=True, response_breached=False),
+            ),
+            models.Index(
+                fields=['resolution_due'], name='incidents_resolution_due',
+                condition=Q(resolved_at__isnull=True, resolution_breached=False),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.number} - {self.short_description}"
+    
+    def save(self, *args, **kwargs):
+        if self.response_due is None or self.resolution_due is None:
+            self.apply_sla()
+        super().save(*args, **kwargs)
+    
+    def apply_sla(self):
+        """Set the SLA deadlines from the priority and opening time"""
+        # Imported here because incidents.sla imports this module
+        from .sla import get_deadlines
+        self.response_due, self.resolution_due = get_deadlines(self.priority, self.opened_at)
+    
+    @property
+    def number(self):
+        """Incident number as shown to people, e.g. INC001007"""
+        return f"INC{self.pk:06d}" if self.pk else "INC (new)"
+    
+    @staticmethod
+    def parse_number(number):
+        """Return the primary key for an incident number (INC001007 or 1007), or None"""
+        number = str(number).strip().upper().removeprefix('INC')
+        return int(number) if number.isdigit() else None
+    
+    @property
+    def is_open(self):
+        return self.status in self.OPEN_STATUSES
+    
+    @property
+    def priority_class(self):
+        return self.PRIORITY_CLASSES[self.priority]
+    
+    @property
+    def sla_breached(self):
+        return self.response_breached or self.resolution_breached
+
+class IncidentActivity(models.Model):
+    """
+    An entry in an incident's activity log: status changes, notes and SLA breaches.
+    """
+    KIND_CHOICES = [
+        ('opened', 'Opened'),
+        ('status_change', 'Status Changed'),
+        ('note', 'Note'),
+        ('sla_breach', 'SLA Breached'),
+    ]
+    
+    # No separate foreign key index: the (incident, timestamp) index covers it
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='activity', db_index=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    entry = models.TextField()
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, help_text="Empty for system entries")
+    timestamp = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name = "Incident Activity"
+        verbose_name_plural = "Incident Activity"
+        indexes = [
+            models.Index(fields=['incident', 'timestamp'], name='incidents_activity_incident'),
+        ]
+    
+    def __str__(self):
+        return f"{self.incident_id} - {self.get_kind_display()} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
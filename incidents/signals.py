@@ -0,0 +1,20 @@
+# incidents/signals.py
+
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from assets.models import Asset
+
+# Reload the asset topology used for correlating incident events when assets
+# or their dependencies change. The correlator is imported in the handlers,
+# so that loading the app does not import it.
+
+@receiver([post_save, post_delete], sender=Asset)
+def invalidate_topology_on_asset_change(sender, instance, **kwargs):
+    from .correlation import correlator
+    correlator.invalidate_topology()
+
+@receiver(m2m_changed, sender=Asset.depends_on.through)
+def invalidate_topology_on_dependency_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from .correlation import correlator
+        correlator.invalidate_topology()
@@ -0,0 +1,79 @@
+# incidents/sla.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Incident, IncidentActivity
+
+# Minutes allowed per priority to acknowledge and to resolve an incident.
+SLA_TARGETS = getattr(settings, 'INCIDENT_SLA_TARGETS', {
+    1: (15, 4 * 60),
+    2: (30, 8 * 60),
+    3: (2 * 60, 24 * 60),
+    4: (8 * 60, 72 * 60),
+})
+
+# Incidents flagged per transaction by the sweep.
+SWEEP_BATCH_SIZE = 500
+
+# (name, deadline, completed when set, breached flag) for each SLA deadline.
+# The filter on the last three matches the partial indexes on Incident.
+DEADLINES = [
+    ('response', 'response_due', 'acknowledged_at', 'response_breached'),
+    ('resolution', 'resolution_due', 'resolved_at', 'resolution_breached'),
+]
+
+
+def get_deadlines(priority, opened_at):
+    """Return (response_due, resolution_due) for an incident of this priority"""
+    respond, resolve = SLA_TARGETS[priority]
+    return opened_at + timedelta(minutes=respond), opened_at + timedelta(minutes=resolve)
+
+
+class SweepResult:
+    """
+    Outcome of an SLA sweep: the incident numbers newly found in breach, per deadline.
+    """
+    def __init__(self):
+        self.breached = {name: [] for name, *_ in DEADLINES}
+
+
+def sweep_sla(now=None, result=None):
+    """
+    Flag every incident whose response or resolution deadline passed before
+    `now` while it was still unacknowledged or unresolved, and log the
+    breach in its activity.
+
+    Only deadlines still running are in the partial indexes, so each run
+    reads just the incidents that became due since the last one, however
+    many incidents are stored. Meant to run every minute.
+    """
+    now = now or timezone.now()
+    result = result or SweepResult()
+    for name, due_field, done_field, flag in DEADLINES:
+        running = {f'{done_field}__isnull': True, flag: False}
+        while True:
+            with transaction.atomic():
+                due = list(
+                    Incident.objects.select_for_update()
+                    .filter(**running, **{f'{due_field}__lte': now})
+                    .order_by(due_field)
+                    .values_list('pk', due_field)[:SWEEP_BATCH_SIZE]
+                )
+                if not due:
+                    break
+                Incident.objects.filter(pk__in=[pk for pk, _ in due]).update(**{flag: True})
+                IncidentActivity.objects.bulk_create([
+                    IncidentActivity(
+                        incident_id=pk, kind='sla_breach', timestamp=now,
+                        entry=f'{name.capitalize()} SLA breached (due {timezone.localtime(deadline):%Y-%m-%d %H:%M})',
+                    )
+                    for pk, deadline in due
+                ])
+            result.breached[name].extend(Incident(pk=pk).number for pk, _ in due)
+            if len(due) < SWEEP_BATCH_SIZE:
+                break
+    return result
@@ -0,0 +1,21 @@
+# incidents/urls.py
+
+from django.urls import path
+from . import views
+
+# URL patterns for the Incidents application
+# These will be prefixed with 'incidents/' when included in the main project URLs
+
+urlpatterns = [
+    # The open queue and logging new incidents
+    path('', views.incident_queue, name='incident_queue'),
+    path('new/', views.incident_add, name='incident_add'),
+    
+    # API endpoints
+    path('api/queue/', views.incident_queue_api, name='incident_queue_api'),
+    path('api/acknowledge/', views.incident_bulk_acknowledge, name='incident_bulk_acknowledge'),
+    path('api/events/', views.incident_events, name='incident_events'),
+    
+    # Incident detail (dynamic path last)
+    path('<str:number>/', views.incident_detail, name='incident_detail'),
+]
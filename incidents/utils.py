@@ -0,0 +1,195 @@
+# incidents/utils.py
+
+import heapq
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from assets.models import AssetLog
+from core.routers import replica_safe
+from .models import Incident, IncidentActivity
+
+# Incidents shown in the queue at most.
+QUEUE_LIMIT = 100
+
+# Incidents acknowledged per bulk request at most.
+MAX_BULK_ACKNOWLEDGE = 1000
+
+# Statuses an incident can move to from each status. Resolved incidents can
+# be reopened; closed ones are final.
+TRANSITIONS = {
+    'new': ['acknowledged', 'in_progress', 'resolved', 'closed'],
+    'acknowledged': ['in_progress', 'resolved', 'closed'],
+    'in_progress': ['resolved', 'closed'],
+    'resolved': ['in_progress', 'closed'],
+    'closed': [],
+}
+
+def queue_key(incident):
+    return incident.priority, incident.opened_at, incident.pk
+
+@replica_safe
+def get_open_queue(status=None, priority=None, limit=QUEUE_LIMIT):
+    """
+    Open top-level incidents, most urgent and oldest first, each with
+    child_count set to the number of incidents grouped under it.
+    
+    Each open status is read from the (status, priority, opened_at) index in
+    queue order, so a query stops after `limit` rows without sorting; the
+    per-status lists are then merged. An IN over the statuses would make the
+    database sort every open incident instead.
+    """
+    statuses = [status] if status else Incident.OPEN_STATUSES
+    queues = []
+    for status in statuses:
+        incidents = Incident.objects.filter(status=status, parent__isnull=True)
+        if priority:
+            incidents = incidents.filter(priority=priority)
+        queues.append(
+            incidents.select_related('asset', 'assigned_to')
+            .order_by('priority', 'opened_at', 'pk')[:limit]
+        )
+    queue = list(islice(heapq.merge(*queues, key=queue_key), limit))
+    
+    child_counts = dict(
+        Incident.objects.filter(parent__in=queue).values_list('parent').annotate(count=Count('*')).order_by()
+    )
+    for incident in queue:
+        incident.child_count = child_counts.get(incident.pk, 0)
+    return queue
+
+@replica_safe
+def get_queue_counts():
+    """
+    Open top-level incidents per status and priority, read from the queue index alone.
+    Returns {status: {priority: count}} with every open status and priority present.
+    """
+    counts = {status: dict.fromkeys(dict(Incident.PRIORITY_CHOICES), 0) for status in Incident.OPEN_STATUSES}
+    rows = (
+        Incident.objects.filter(status__in=Incident.OPEN_STATUSES, parent__isnull=True)
+        .values_list('status', 'priority')
+        .annotate(count=Count('*'))
+        .order_by()
+    )
+    for status, priority, count in rows:
+        counts[status][priority] = count
+    return counts
+
+def open_incident(short_description, priority=3, asset=None, category='other', description='', user=None, assigned_to=None, **fields):
+    """
+    Log a new incident, with its SLA deadlines, and note it on the asset's log.
+    Other Incident fields (e.g. parent_id, opened_at) can be given as keywords.
+    """
+    with transaction.atomic():
+        incident = Incident.objects.create(
+            short_description=short_description, description=description, priority=priority,
+            category=category, asset=asset, reported_by=user, assigned_to=assigned_to, **fields,
+        )
+        IncidentActivity.objects.create(
+            incident=incident, kind='opened', user=user, timestamp=incident.opened_at,
+            entry=f'Opened with priority {incident.get_priority_display()}',
+        )
+        if incident.asset_id:
+            AssetLog.objects.create(
+                asset_id=incident.asset_id, event_type='incident_reported', user=user,
+                description=f'{incident.number}: {short_description}', new_value=incident.number,
+            )
+    return incident
+
+def acknowledge_incidents(incident_ids, user=None, now=None):
+    """
+    Acknowledge the incidents among incident_ids that are still new, and the
+    new incidents grouped under them, with one UPDATE and one insert of
+    activity entries however many there are, so an alarm storm can be
+    acknowledged at once. Returns the ids acknowledged; the others were
+    acknowledged already or are further along.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        acknowledged = list(
+            Incident.objects.select_for_update()
+            .filter(Q(pk__in=incident_ids) | Q(parent__in=incident_ids), status='new')
+            .values_list('pk', flat=True)
+        )
+        if not acknowledged:
+            return []
+        Incident.objects.filter(pk__in=acknowledged).update(
+            status='acknowledged', acknowledged_at=now, acknowledged_by=user, updated_at=now,
+        )
+        IncidentActivity.objects.bulk_create([
+            IncidentActivity(incident_id=pk, kind='status_change', user=user, timestamp=now, entry='Acknowledged')
+            for pk in acknowledged
+        ])
+    return acknowledged
+
+def change_status(incident, status, user=None, note=''):
+    """
+    Move an incident to another status, recording when it was acknowledged,
+    resolved or closed. Raises ValueError if the move is not allowed.
+    """
+    if status not in TRANSITIONS[incident.status]:
+        raise ValueError(f'{incident.number} cannot go from {incident.get_status_display()} to {dict(Incident.STATUS_CHOICES)[status]}')
+    
+    now = timezone.now()
+    old_display = incident.get_status_display()
+    if incident.acknowledged_at is None:
+        incident.acknowledged_at = now
+        incident.acknowledged_by = user
+    if status in ('resolved', 'closed') and incident.resolved_at is None:
+        incident.resolved_at = now
+        if note:
+            incident.resolution = note
+    if status == 'in_progress':
+        # Reopened: the resolution deadline applies again
+        incident.resolved_at = None
+    if status == 'closed':
+        incident.closed_at = now
+    incident.status = status
+    
+    with transaction.atomic():
+        incident.save()
+        entry = f'{old_display} → {incident.get_status_display()}'
+        IncidentActivity.objects.create(
+            incident=incident, kind='status_change', user=user, timestamp=now,
+            entry=f'{entry}: {note}' if note else entry,
+        )
+        closed_ids = [incident.pk]
+        if status in ('resolved', 'closed'):
+            closed_ids += close_children(incident, status, user, now)
+        if status == 'resolved' and incident.asset_id:
+            AssetLog.objects.create(
+                asset_id=incident.asset_id, event_type='incident_resolved', user=user,
+                description=f'{incident.number} resolved' + (f': {note}' if note else ''), new_value=incident.number,
+            )
+    
+    if status in ('resolved', 'closed'):
+        # Imported here because incidents.correlation imports this module
+        from .correlation import correlator
+        correlator.forget(closed_ids)
+    return incident
+
+def close_children(incident, status, user, now):
+    """
+    Resolve or close the open incidents grouped under an incident along with
+    it, in one UPDATE. Returns their ids.
+    """
+    children = list(incident.children.filter(status__in=Incident.OPEN_STATUSES).values_list('pk', flat=True))
+    if not children:
+        return []
+    Incident.objects.filter(pk__in=children, acknowledged_at__isnull=True).update(acknowledged_at=now, acknowledged_by=user)
+    fields = {'status': status, 'resolved_at': now, 'updated_at': now}
+    if status == 'closed':
+        fields['closed_at'] = now
+    Incident.objects.filter(pk__in=children).update(**fields)
+    IncidentActivity.objects.bulk_create([
+        IncidentActivity(
+            incident_id=pk, kind='status_change', user=user, timestamp=now,
+            entry=f'{dict(Incident.STATUS_CHOICES)[status]} with {incident.number}',
+        )
+        for pk in children
+    ])
+    return children
+
+def add_note(incident, entry, user=None):
+    return IncidentActivity.objects.create(incident=incident, kind='note', user=user, entry=entry)
@@ -0,0 +1,288 @@
+# incidents/views.py
+
+import json
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from assets.utils import get_asset_incident_context
+from core.routers import replica_safe
+from telemetry.ingest import parse_timestamp
+from telemetry.lookups import asset_tag_map
+from telemetry.views import has_ingest_token
+from .correlation import IncidentEvent, correlator
+from .forms import IncidentForm, NoteForm, StatusChangeForm
+from .models import Incident
+from .utils import (
+    MAX_BULK_ACKNOWLEDGE, TRANSITIONS, acknowledge_incidents, add_note, change_status, get_open_queue,
+    get_queue_counts, open_incident,
+)
+
+# Filters accepted by the bulk acknowledge API, as Incident lookups.
+ACKNOWLEDGE_FILTERS = {
+    'asset': 'asset__asset_tag',
+    'location': 'asset__location__name',
+    'category': 'category',
+    'priority': 'priority',
+}
+
+# Events accepted per request by the events API at most.
+MAX_EVENTS = 1000
+
+
+def get_incident(number):
+    pk = Incident.parse_number(number)
+    if pk is None:
+        raise Http404('No such incident')
+    return get_object_or_404(Incident.objects.select_related('asset', 'parent', 'assigned_to', 'reported_by', 'acknowledged_by'), pk=pk)
+
+def queue_filters(params):
+    """Return the (status, priority) queue filters from the query string, ignoring invalid ones"""
+    status = params.get('status', '')
+    status = status if status in Incident.OPEN_STATUSES else None
+    priority = params.get('priority', '')
+    priority = int(priority) if priority in {str(value) for value, _ in Incident.PRIORITY_CHOICES} else None
+    return status, priority
+
+@login_required
+def incident_queue(request):
+    """
+    The open incident queue, most urgent first; filter with ?status= and ?priority=.
+    Selected new incidents are acknowledged in one go.
+    """
+    if request.method == 'POST':
+        ids = [Incident.parse_number(number) for number in request.POST.getlist('incidents')]
+        acknowledged = acknowledge_incidents([pk for pk in ids if pk], user=request.user)
+        messages.success(request, f'{len(acknowledged)} incident{"s" if len(acknowledged) != 1 else ""} acknowledged.')
+        return redirect(request.get_full_path())
+    
+    status, priority = queue_filters(request.GET)
+    counts = get_queue_counts()
+    status_choices = [(value, label) for value, label in Incident.STATUS_CHOICES if value in Incident.OPEN_STATUSES]
+    
+    context = {
+        'incidents': get_open_queue(status, priority),
+        # One row per open status: counts per priority and the total
+        'count_rows': [
+            (value, label, counts[value].items(), sum(counts[value].values()))
+            for value, label in status_choices
+        ],
+        'status_choices': status_choices,
+        'priority_choices': Incident.PRIORITY_CHOICES,
+        'current_status': status,
+        'current_priority': priority,
+    }
+    
+    return render(request, 'incidents/incident_queue.html', context)
+
+@login_required
+def incident_add(request):
+    """
+    Log a new incident. ?asset=<tag> fills in the asset.
+    """
+    if request.method == 'POST':
+        form = IncidentForm(request.POST)
+        if form.is_valid():
+            incident = open_incident(
+                user=request.user,
+                asset=form.cleaned_data['asset_tag'],
+                **{field: form.cleaned_data[field] for field in IncidentForm.Meta.fields},
+            )
+            messages.success(request, f'Incident {incident.number} logged.')
+            return redirect('incident_detail', number=incident.number)
+    else:
+        form = IncidentForm(initial={'asset_tag': request.GET.get('asset', '')})
+    
+    return render(request, 'incidents/incident_form.html', {'form': form})
+
+@login_required
+def incident_detail(request, number):
+    """
+    An incident with its activity log, the incidents grouped under it, the
+    context of its asset, and forms to move it along or add a note.
+    """
+    incident = get_incident(number)
+    
+    if request.method == 'POST':
+        if 'entry' in request.POST:
+            form = NoteForm(request.POST)
+            if form.is_valid():
+                add_note(incident, form.cleaned_data['entry'], user=request.user)
+        else:
+            form = StatusChangeForm(request.POST)
+            if form.is_valid():
+                try:
+                    change_status(incident, form.cleaned_data['status'], user=request.user, note=form.cleaned_data['note'])
+                    messages.success(request, f'{incident.number} is now {incident.get_status_display()}.')
+                except ValueError as e:
+                    messages.error(request, str(e))
+        return redirect('incident_detail', number=incident.number)
+    
+    context = {
+        'incident': incident,
+        'children': incident.children.select_related('asset').order_by('opened_at'),
+        'activity': incident.activity.select_related('user'),
+        'asset_context': get_asset_incident_context(incident.asset) if incident.asset else None,
+        'next_statuses': [(value, label) for value, label in Incident.STATUS_CHOICES if value in TRANSITIONS[incident.status]],
+        'note_form': NoteForm(),
+    }
+    
+    return render(request, 'incidents/incident_detail.html', context)
+
+def incident_json(incident):
+    return {
+        'number': incident.number,
+        'short_description': incident.short_description,
+        'asset': incident.asset.asset_tag if incident.asset else None,
+        'category': incident.category,
+        'priority': incident.priority,
+        'status': incident.status,
+        'assigned_to': incident.assigned_to.username if incident.assigned_to else None,
+        'opened_at': incident.opened_at.isoformat(),
+        'response_due': incident.response_due.isoformat(),
+        'resolution_due': incident.resolution_due.isoformat(),
+        'sla_breached': incident.sla_breached,
+        'parent': Incident(pk=incident.parent_id).number if incident.parent_id else None,
+        'suppressed_count': incident.suppressed_count,
+    }
+
+@login_required
+@replica_safe
+def incident_queue_api(request):
+    """
+    API endpoint returning the open queue as JSON, for NOC wall displays.
+    Takes the same ?status= and ?priority= filters as the queue page.
+    """
+    status, priority = queue_filters(request.GET)
+    
+    return JsonResponse({
+        'counts': get_queue_counts(),
+        'incidents': [incident_json(incident) for incident in get_open_queue(status, priority)],
+    })
+
+@login_required
+@require_POST
+def incident_bulk_acknowledge(request):
+    """
+    API endpoint acknowledging many new incidents at once, e.g. during an
+    alarm storm. The JSON body names the incidents,
+        {"incidents": ["INC001001", "INC001002"]}
+    or selects the new ones by asset, location, category and/or priority,
+        {"filter": {"location": "Kampala", "category": "cooling"}}
+    At most MAX_BULK_ACKNOWLEDGE are acknowledged per request, most urgent
+    first; 'remaining' says how many more match.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+    
+    remaining = 0
+    if 'incidents' in data:
+        numbers = data['incidents']
+        if not isinstance(numbers, list) or len(numbers) > MAX_BULK_ACKNOWLEDGE:
+            return JsonResponse({'error': f'incidents must be a list of at most {MAX_BULK_ACKNOWLEDGE} numbers'}, status=400)
+        ids = [Incident.parse_number(number) for number in numbers]
+        ids = [pk for pk in ids if pk]
+    elif isinstance(data.get('filter'), dict) and data['filter']:
+        unknown = set(data['filter']) - set(ACKNOWLEDGE_FILTERS)
+        if unknown:
+            return JsonResponse({'error': f'Unknown filters: {", ".join(sorted(unknown))}'}, status=400)
+        for name, value in data['filter'].items():
+            if name == 'priority':
+                if not isinstance(value, int) or isinstance(value, bool) or value not in dict(Incident.PRIORITY_CHOICES):
+                    return JsonResponse({'error': 'priority must be 1-4'}, status=400)
+            elif not isinstance(value, str):
+                return JsonResponse({'error': f'{name} must be a string'}, status=400)
+        matching = Incident.objects.filter(
+            status='new', **{ACKNOWLEDGE_FILTERS[name]: value for name, value in data['filter'].items()}
+        )
+        ids = list(matching.order_by('priority', 'opened_at', 'pk').values_list('pk', flat=True)[:MAX_BULK_ACKNOWLEDGE + 1])
+        if len(ids) > MAX_BULK_ACKNOWLEDGE:
+            ids = ids[:MAX_BULK_ACKNOWLEDGE]
+            remaining = matching.count() - MAX_BULK_ACKNOWLEDGE
+    else:
+        return JsonResponse({'error': 'Send "incidents" or a non-empty "filter"'}, status=400)
+    
+    acknowledged = acknowledge_incidents(ids, user=request.user)
+    
+    return JsonResponse({
+        'acknowledged': [Incident(pk=pk).number for pk in acknowledged],
+        'skipped': len(ids) - len(acknowledged),
+        'remaining': remaining,
+    })
+
+def parse_event(item, asset_ids):
+    """Return an IncidentEvent from one item of the events API, or an error message"""
+    if not isinstance(item, dict):
+        return 'Expected an object'
+    summary = item.get('summary')
+    if not isinstance(summary, str) or not summary.strip() or len(summary) > 255:
+        return 'summary must be 1-255 characters'
+    asset_id = None
+    if item.get('asset') is not None:
+        asset_id = asset_ids.get(str(item['asset']).strip().upper())
+        if asset_id is None:
+            return f'Unknown asset {item["asset"]}'
+    key = str(item.get('key') or summary)[:100]
+    priority = item.get('priority', 3)
+    if not isinstance(priority, int) or isinstance(priority, bool) or priority not in dict(Incident.PRIORITY_CHOICES):
+        return 'priority must be 1-4'
+    category = item.get('category', 'other')
+    if not isinstance(category, str) or category not in dict(Incident.CATEGORY_CHOICES):
+        return f'Unknown category {category}'
+    ts = parse_timestamp(item['ts']) if 'ts' in item else None
+    if 'ts' in item and ts is None:
+        return 'Invalid ts'
+    return IncidentEvent(
+        asset_id, summary.strip(), key, ts=ts, priority=priority, category=category,
+        description=str(item.get('description', '')),
+    )
+
+@csrf_exempt
+@require_POST
+def incident_events(request):
+    """
+    Intake for alarms from the BMS gateways, authenticated with a token from
+    TELEMETRY_INGEST_TOKENS. The body is a JSON list of events,
+        [{"asset": "GEN-A", "summary": "Generator A failed", "key": "gen-fail",
+          "priority": 1, "category": "generators", "ts": 1735732800}]
+    (only summary is required). Events are correlated before anything is
+    written: repeats are suppressed and related events grouped under one
+    parent (see incidents/correlation.py).
+    """
+    if not has_ingest_token(request):
+        return JsonResponse({'error': 'Invalid or missing ingest token'}, status=401)
+    
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(items, list) or len(items) > MAX_EVENTS:
+        return JsonResponse({'error': f'Expected a list of at most {MAX_EVENTS} events'}, status=400)
+    
+    asset_ids = asset_tag_map.get_many({
+        str(item['asset']).strip().upper() for item in items if isinstance(item, dict) and item.get('asset') is not None
+    })
+    events, errors = [], []
+    for index, item in enumerate(items):
+        event = parse_event(item, asset_ids)
+        if isinstance(event, str):
+            errors.append({'index': index, 'error': event})
+        else:
+            events.append(event)
+    
+    outcomes = {'opened': [], 'grouped': [], 'suppressed': 0}
+    for event, incident_id, outcome in correlator.submit(events):
+        if outcome == 'suppressed':
+            outcomes['suppressed'] += 1
+        else:
+            outcomes[outcome].append(Incident(pk=incident_id).number)
+    
+    return JsonResponse({**outcomes, 'rejected': len(errors), 'errors': errors[:20]})
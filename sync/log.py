@@ -0,0 +1,197 @@
+# sync/log.py
+
+import datetime
+import decimal
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Q
+
+from assets.models import Asset, AssetSpecification, MaintenanceRecord
+from .models import Change
+
+# Changes sent per pull at most; clients pull again while 'more' is set.
+PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 5_000)
+
+# What clients get of each kind of object, as columns: the payload lists the
+# field names once and each object as a row of values. updated_at goes back
+# with every edit, for conflict detection.
+KINDS = {
+    Change.ASSET: (Asset, 'assets', [
+        'id', 'asset_tag', 'name', 'asset_type__name', 'manufacturer__name', 'model_number',
+        'serial_number', 'location__name', 'status', 'priority', 'assigned_to__username',
+        'last_maintenance', 'next_maintenance', 'warranty_expiry', 'description', 'notes', 'updated_at',
+    ]),
+    Change.SPECIFICATION: (AssetSpecification, 'specifications', [
+        'id', 'asset_id', 'specification_name', 'specification_value', 'unit', 'updated_at',
+    ]),
+    Change.MAINTENANCE: (MaintenanceRecord, 'maintenance', [
+        'id', 'asset_id', 'maintenance_type', 'status', 'scheduled_date', 'performed_date',
+        'performed_by__username', 'description', 'work_performed', 'parts_used', 'cost',
+        'estimated_duration', 'actual_duration', 'next_maintenance_date', 'notes', 'updated_at',
+    ]),
+}
+
+
+# Key of the PostgreSQL advisory lock serializing writes to the change log
+CHANGE_LOG_LOCK = 0x6b65_7379_6e63
+
+
+def lock_change_log():
+    """
+    Make change log writes commit in sequence order, held until the
+    transaction ends. Pulls stop at the highest sequence number they see;
+    were a lower number still uncommitted, the clients would skip it for
+    good. SQLite serializes every write already.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CHANGE_LOG_LOCK])
+
+
+def write_changes(kind, objects, deleted=False):
+    """
+    Record that objects of a kind changed (or were deleted), giving each a
+    new sequence number. objects maps object id → (asset id, location id);
+    a location of None means the asset's current one. Replaces what each
+    location had of the objects, leaves a tombstone where an object moved
+    away from, and moves the specifications and maintenance records of
+    assets that moved along with them.
+    """
+    if not objects:
+        return
+    with transaction.atomic():
+        lock_change_log()
+        live = {
+            object_id: (asset_id, location_id)
+            for object_id, asset_id, location_id in Change.objects.filter(
+                kind=kind, object_id__in=objects, deleted=False,
+            ).values_list('object_id', 'asset_id', 'location_id')
+        }
+        unknown = {
+            asset_id for object_id, (asset_id, location_id) in objects.items()
+            if location_id is None and live.get(object_id, (None,))[0] != asset_id
+        }
+        asset_locations = dict(Asset.objects.filter(pk__in=unknown).values_list('pk', 'location_id')) if unknown and not deleted else {}
+
+        rows = {}
+        for object_id, (asset_id, location_id) in objects.items():
+            if deleted:
+                # Only the clients that have the object need to hear of it
+                location_id = live.get(object_id, (None, None))[1]
+            elif location_id is None:
+                if object_id in live and live[object_id][0] == asset_id:
+                    location_id = live[object_id][1]
+                else:
+                    location_id = asset_locations.get(asset_id)
+            if location_id is not None:
+                rows[object_id] = (asset_id, location_id)
+        if not rows:
+            return
+
+        # The rows being replaced: the live ones and earlier tombstones at the same location
+        replaced = defaultdict(set)
+        for object_id, (_, location_id) in [*rows.items(), *((pk, live[pk]) for pk in rows if pk in live)]:
+            replaced[location_id].add(object_id)
+        condition = Q()
+        for location_id, object_ids in replaced.items():
+            condition |= Q(location_id=location_id, object_id__in=object_ids)
+        Change.objects.filter(condition, kind=kind).delete()
+
+        moved = {
+            object_id: location_id for object_id, (_, location_id) in rows.items()
+            if object_id in live and live[object_id][1] != location_id
+        }
+        # Tombstones first, so a client pulling everything sees the move in order
+        Change.objects.bulk_create([
+            Change(kind=kind, object_id=object_id, asset_id=live[object_id][0], location_id=live[object_id][1], deleted=True)
+            for object_id in moved
+        ] + [
+            Change(kind=kind, object_id=object_id, asset_id=asset_id, location_id=location_id, deleted=deleted)
+            for object_id, (asset_id, location_id) in rows.items()
+        ])
+
+        if kind == Change.ASSET:
+            if deleted:
+                # Clients drop an asset's specifications and maintenance records with it
+                Change.objects.filter(asset_id__in=rows, deleted=False).exclude(kind=Change.ASSET).delete()
+            elif moved:
+                children = defaultdict(dict)
+                for child_kind, object_id, asset_id in Change.objects.filter(
+                    asset_id__in=moved, deleted=False,
+                ).exclude(kind=Change.ASSET).values_list('kind', 'object_id', 'asset_id'):
+                    children[child_kind][object_id] = (asset_id, moved[asset_id])
+                for child_kind, child_objects in children.items():
+                    write_changes(child_kind, child_objects)
+
+
+def record_change(kind, object_id, asset_id, location_id=None, deleted=False):
+    """Record a change to one object; see write_changes"""
+    write_changes(kind, {object_id: (asset_id, location_id)}, deleted=deleted)
+
+
+def record_objects(kind, object_ids):
+    """
+    Record changes to objects by id, for writes that send no signals
+    (update(), bulk_create()). Reads their assets and locations in one query.
+    """
+    model = KINDS[kind][0]
+    if kind == Change.ASSET:
+        rows = model.objects.filter(pk__in=object_ids).values_list('pk', 'location_id')
+        write_changes(kind, {pk: (pk, location_id) for pk, location_id in rows})
+    else:
+        rows = model.objects.filter(pk__in=object_ids).values_list('pk', 'asset_id', 'asset__location_id')
+        write_changes(kind, {pk: (asset_id, location_id) for pk, asset_id, location_id in rows})
+
+
+def to_json(value):
+    """JSON for the values json doesn't know; timestamps keep their microseconds for conflict checks"""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def get_current_seq():
+    return Change.objects.aggregate(seq=Max('seq'))['seq'] or 0
+
+
+def get_changes(since, location=None, limit=PAGE_SIZE):
+    """
+    What a client holding sequence number `since` (0 for nothing) needs:
+    the objects changed since, as columns and rows per kind, and the ids
+    deleted. Only objects at `location` if given. 'seq' is the number to
+    send next time; 'more' says the page was full. A client ahead of the
+    server (e.g. after a database restore) is sent everything, with 'reset'.
+    """
+    # Read first, so changes written during the pull come next time rather than never
+    current = get_current_seq()
+    reset = since > current
+    if reset:
+        since = 0
+    changes = Change.objects.filter(seq__gt=since, seq__lte=current)
+    if location is not None:
+        changes = changes.filter(location=location)
+    if since == 0:
+        # A new client has nothing to delete
+        changes = changes.filter(deleted=False)
+    rows = list(changes.order_by('seq').values_list('seq', 'kind', 'object_id', 'deleted')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed, deleted = defaultdict(list), defaultdict(list)
+    for _, kind, object_id, is_deleted in rows:
+        (deleted if is_deleted else changed)[kind].append(object_id)
+
+    payload = {'seq': rows[-1][0] if more else current, 'more': more, 'reset': reset}
+    for kind, (model, name, fields) in KINDS.items():
+        payload[name] = {
+            'fields': fields,
+            'rows': list(model.objects.filter(pk__in=changed[kind]).order_by().values_list(*fields)) if changed[kind] else [],
+        }
+    payload['deleted'] = {name: deleted[kind] for kind, (_, name, _) in KINDS.items()}
+    return payload
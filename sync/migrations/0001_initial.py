@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0003_location_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('asset', 'Asset'), ('specification', 'Specification'), ('maintenance', 'Maintenance record')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('asset_id', models.PositiveBigIntegerField(db_index=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.location')),
+            ],
+            options={
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['location', 'seq'], name='sync_change_location_seq')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'location'), name='sync_change_unique_object')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PushedChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64)),
+                ('result', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pushed_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'client_id'), name='sync_pushed_change_unique_id')],
+            },
+        ),
+    ]
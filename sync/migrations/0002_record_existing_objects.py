@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def record_existing_objects(apps, schema_editor):
+    # Start the log with everything there is, so first syncs get it all
+    Asset = apps.get_model('assets', 'Asset')
+    AssetSpecification = apps.get_model('assets', 'AssetSpecification')
+    MaintenanceRecord = apps.get_model('assets', 'MaintenanceRecord')
+    Change = apps.get_model('sync', 'Change')
+
+    changes = [
+        Change(kind='asset', object_id=pk, asset_id=pk, location_id=location_id)
+        for pk, location_id in Asset.objects.order_by('pk').values_list('pk', 'location_id').iterator()
+    ]
+    for kind, model in (('specification', AssetSpecification), ('maintenance', MaintenanceRecord)):
+        changes += [
+            Change(kind=kind, object_id=pk, asset_id=asset_id, location_id=location_id)
+            for pk, asset_id, location_id in model.objects.order_by('pk').values_list('pk', 'asset_id', 'asset__location_id').iterator()
+        ]
+    Change.objects.bulk_create(changes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_assetspecification_updated_at'),
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(record_existing_objects, migrations.RunPython.noop),
+    ]
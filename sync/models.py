@@ -0,0 +1,68 @@
+# sync/models.py
+
+from django.db import models
+from users.models import CustomUser, Location
+
+class Change(models.Model):
+    """
+    The change log mobile clients sync from: one row per object a location's
+    clients hold, stamped with a sequence number that only goes up. Every
+    save replaces the object's row with a new one, so a client holding
+    sequence N pulls exactly the rows above N, one index range, however
+    many times each object changed in between.
+    
+    Deletions leave a row with `deleted` set (a tombstone). An asset moving
+    to another location leaves one at the location it left, so the clients
+    there drop it too; its specifications and maintenance records follow it.
+    """
+    ASSET = 'asset'
+    SPECIFICATION = 'specification'
+    MAINTENANCE = 'maintenance'
+    
+    KIND_CHOICES = [
+        (ASSET, 'Asset'),
+        (SPECIFICATION, 'Specification'),
+        (MAINTENANCE, 'Maintenance record'),
+    ]
+    
+    # SQLite's AUTOINCREMENT never reuses a number, even after the highest row is deleted
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # Not foreign keys: tombstones outlive the objects
+    asset_id = models.PositiveBigIntegerField(db_index=True)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='+')
+    deleted = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['seq']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'location'], name='sync_change_unique_object'),
+        ]
+        indexes = [
+            # A site's clients pull one range of this index
+            models.Index(fields=['location', 'seq'], name='sync_change_location_seq'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.object_id}{' deleted' if self.deleted else ''}"
+
+class PushedChange(models.Model):
+    """
+    The outcome of each edit a client pushed, by the id the client gave it.
+    A client that lost the connection before the answer came resends its
+    queue; edits already applied get their first answer again instead of
+    being applied twice.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='pushed_changes')
+    client_id = models.CharField(max_length=64)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='sync_pushed_change_unique_id'),
+        ]
+    
+    def __str__(self):
+        return f"{self.client_id} by {self.user_id}"
@@ -0,0 +1,211 @@
+# sync/push.py
+
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils.dateparse import parse_datetime
+
+from assets.utils import log_asset_event
+from .log import KINDS, to_json
+from .models import Change, PushedChange
+
+# Edits pushed per request at most.
+MAX_PUSH = 500
+
+# What a client may do to each kind of object, and the fields it may set.
+EDITABLE = {
+    Change.ASSET: {
+        'update': ['status', 'notes', 'description', 'last_maintenance', 'next_maintenance'],
+    },
+    Change.SPECIFICATION: {
+        'create': ['asset', 'specification_name', 'specification_value', 'unit'],
+        'update': ['specification_value', 'unit'],
+        'delete': [],
+    },
+    Change.MAINTENANCE: {
+        'create': [
+            'asset', 'maintenance_type', 'scheduled_date', 'description', 'estimated_duration',
+            'status', 'performed_date', 'work_performed', 'parts_used', 'cost', 'actual_duration',
+            'next_maintenance_date', 'notes',
+        ],
+        'update': [
+            'status', 'performed_date', 'work_performed', 'parts_used', 'cost', 'actual_duration',
+            'next_maintenance_date', 'notes',
+        ],
+    },
+}
+
+
+class Rejected(Exception):
+    """An edit that cannot be applied as sent; the message is for the client"""
+
+
+class Answered(Exception):
+    """An edit another request (a retry of the same queue) answered first; holds that answer"""
+    def __init__(self, result):
+        super().__init__(result)
+        self.result = result
+
+
+def get_row(kind, pk):
+    """An object as clients hold it, in the columns of a pull, ready for JSON"""
+    model, _, fields = KINDS[kind]
+    return json.loads(json.dumps(model.objects.filter(pk=pk).values_list(*fields).first(), default=to_json))
+
+
+def set_fields(instance, fields):
+    for name, value in fields.items():
+        field = instance._meta.get_field(name)
+        if field.is_relation:
+            if not isinstance(value, int):
+                raise Rejected(f'{name} must be an id')
+            setattr(instance, field.attname, value)
+            continue
+        if isinstance(field, models.DurationField) and isinstance(value, (int, float)):
+            # Pulls send durations in seconds
+            value = datetime.timedelta(seconds=value)
+        try:
+            setattr(instance, name, None if value is None else field.to_python(value))
+        except ValidationError as e:
+            raise Rejected(f'{name}: {" ".join(e.messages)}')
+        except (TypeError, ValueError):
+            raise Rejected(f'{name}: invalid value {value!r}')
+
+
+def log_edit(kind, action, instance, old, user):
+    """The asset log entry for an edit, as the web views write them"""
+    if kind == Change.ASSET:
+        if old['status'] != instance.status:
+            log_asset_event(instance, 'status_change', 'Status changed from mobile sync', user, old['status'], instance.status)
+        else:
+            log_asset_event(instance, 'updated', 'Asset information updated from mobile sync', user)
+    elif kind == Change.SPECIFICATION:
+        if action == 'delete':
+            description = f'{instance.specification_name} removed from mobile sync'
+        else:
+            description = f'{instance.specification_name} set to {instance} from mobile sync'
+        log_asset_event(instance.asset, 'specification_updated', description, user)
+    elif action == 'create':
+        log_asset_event(
+            instance.asset, 'maintenance_scheduled',
+            f'{instance.get_maintenance_type_display()} scheduled for {instance.scheduled_date}', user,
+        )
+    if kind == Change.MAINTENANCE and instance.status == 'completed' and old.get('status') != 'completed':
+        log_asset_event(
+            instance.asset, 'maintenance_completed',
+            f'{instance.get_maintenance_type_display()} completed on {instance.performed_date or instance.scheduled_date}', user,
+        )
+
+
+def apply_change(change, user):
+    """
+    Apply one edit a client queued while offline:
+        {"id": "c-17", "type": "maintenance", "action": "update", "key": 42,
+         "updated_at": "<as last pulled>", "fields": {"status": "completed"}}
+    Updates and deletes only go ahead if the object is as the client last
+    saw it (same updated_at); otherwise the answer is a conflict with the
+    server's copy, for the client to merge and resend. Returns the answer.
+    """
+    kind, action = change.get('type'), change.get('action')
+    if not isinstance(kind, str) or not isinstance(action, str) or action not in EDITABLE.get(kind, {}):
+        raise Rejected(f'Cannot {action} {kind}')
+    model = KINDS[kind][0]
+    fields = change.get('fields') or {}
+    if not isinstance(fields, dict):
+        raise Rejected('fields must be an object')
+    not_editable = sorted(set(fields) - set(EDITABLE[kind][action]))
+    if not_editable:
+        raise Rejected(f'Not editable: {", ".join(not_editable)}')
+    key = change.get('key')
+    if action != 'create' and (not isinstance(key, int) or isinstance(key, bool)):
+        raise Rejected('key must be an id')
+
+    with transaction.atomic():
+        if action == 'create':
+            instance, old = model(), {}
+        else:
+            instance = model.objects.select_for_update().filter(pk=key).first()
+            if instance is None:
+                return {'result': 'missing'}
+            try:
+                updated_at = parse_datetime(str(change.get('updated_at') or ''))
+            except ValueError:
+                raise Rejected('updated_at must be a timestamp as last pulled')
+            if updated_at != instance.updated_at:
+                return {'result': 'conflict', 'row': get_row(kind, instance.pk)}
+            old = {field.attname: getattr(instance, field.attname) for field in model._meta.concrete_fields}
+
+        if action == 'delete':
+            log_edit(kind, action, instance, old, user)
+            instance.delete()
+            return {'result': 'applied'}
+
+        set_fields(instance, fields)
+        if kind == Change.MAINTENANCE:
+            if action == 'create':
+                instance.scheduled_by = user
+            if instance.status == 'completed' and instance.performed_by_id is None:
+                instance.performed_by = user
+        try:
+            instance.full_clean()
+        except ValidationError as e:
+            raise Rejected('; '.join(f'{name}: {" ".join(messages)}' for name, messages in e.message_dict.items()))
+        instance.save()
+        log_edit(kind, action, instance, old, user)
+    return {'result': 'applied', 'key': instance.pk, 'row': get_row(kind, instance.pk)}
+
+
+def store_answer(user, client_id, result):
+    """
+    Remember the answer to an edit. Returns it, or the answer stored
+    already if another request answered the same edit first.
+    """
+    try:
+        with transaction.atomic():
+            PushedChange.objects.create(user=user, client_id=client_id, result=result)
+    except IntegrityError:
+        return PushedChange.objects.get(user=user, client_id=client_id).result
+    return result
+
+
+def apply_changes(changes, user):
+    """
+    Apply a client's queue of edits in order, each on its own. Edits
+    answered before (same client id) get the same answer again, so a
+    client resending after a dropped connection never applies one twice,
+    even while the first request is still running: the answer is stored
+    in the transaction applying the edit, and the edit rolled back if
+    another request stored one first.
+    """
+    client_ids = [str(change.get('id')) for change in changes if isinstance(change, dict) and change.get('id')]
+    answered = dict(PushedChange.objects.filter(user=user, client_id__in=client_ids).values_list('client_id', 'result'))
+
+    results = []
+    for change in changes:
+        if not isinstance(change, dict) or not change.get('id') or len(str(change['id'])) > 64:
+            results.append({'id': None, 'result': 'rejected', 'error': 'Each change needs an id of at most 64 characters'})
+            continue
+        client_id = str(change['id'])
+        if client_id in answered:
+            results.append(answered[client_id])
+            continue
+        try:
+            with transaction.atomic():
+                result = {'id': client_id, **apply_change(change, user)}
+                if result['result'] == 'applied':
+                    stored = store_answer(user, client_id, result)
+                    if stored is not result:
+                        raise Answered(stored)
+        except Answered as e:
+            result = e.result
+        except Rejected as e:
+            result = store_answer(user, client_id, {'id': client_id, 'result': 'rejected', 'error': str(e)})
+        except IntegrityError:
+            result = store_answer(user, client_id, {'id': client_id, 'result': 'rejected', 'error': 'Conflicts with existing data'})
+        # Conflicts and missing objects are not remembered: the client resolves them and resends
+        if result['result'] in ('applied', 'rejected'):
+            answered[client_id] = result
+        results.append(result)
+    return results
@@ -0,0 +1,49 @@
+# sync/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from assets.models import Asset, AssetSpecification, MaintenanceRecord
+
+# Record every change to what the mobile clients hold in the sync log. The
+# log helpers are imported in the handlers, so that loading the app does
+# not import them. Changes made with update() or bulk_create() send no
+# signals; the code making them calls sync.log.record_objects.
+
+@receiver(post_save, sender=Asset)
+def record_asset_save(sender, instance, **kwargs):
+    from .log import record_change
+    from .models import Change
+    record_change(Change.ASSET, instance.pk, instance.pk, instance.location_id)
+
+@receiver(post_delete, sender=Asset)
+def record_asset_delete(sender, instance, **kwargs):
+    from .log import record_change
+    from .models import Change
+    record_change(Change.ASSET, instance.pk, instance.pk, deleted=True)
+
+@receiver(post_save, sender=AssetSpecification)
+def record_specification_save(sender, instance, **kwargs):
+    from .log import record_change
+    from .models import Change
+    record_change(Change.SPECIFICATION, instance.pk, instance.asset_id)
+    # The asset's updated_at was bumped (see assets/signals.py); clients need it for their next edit
+    record_change(Change.ASSET, instance.asset_id, instance.asset_id)
+
+@receiver(post_save, sender=MaintenanceRecord)
+def record_maintenance_save(sender, instance, **kwargs):
+    from .log import record_change
+    from .models import Change
+    record_change(Change.MAINTENANCE, instance.pk, instance.asset_id)
+
+@receiver(post_delete, sender=AssetSpecification)
+@receiver(post_delete, sender=MaintenanceRecord)
+def record_child_delete(sender, instance, origin=None, **kwargs):
+    from .log import record_change
+    from .models import Change
+    # Deleted along with their asset: clients drop them with it
+    if isinstance(origin, Asset) or getattr(origin, 'model', None) is Asset:
+        return
+    kind = Change.SPECIFICATION if sender is AssetSpecification else Change.MAINTENANCE
+    record_change(kind, instance.pk, instance.asset_id, deleted=True)
+    if sender is AssetSpecification:
+        record_change(Change.ASSET, instance.asset_id, instance.asset_id)
@@ -0,0 +1,13 @@
+# sync/urls.py
+
+from django.urls import path
+from . import views
+
+# URL patterns for the Sync application
+# These will be prefixed with 'sync/' when included in the main project URLs
+
+urlpatterns = [
+    # Delta sync for offline mobile clients
+    path('api/pull/', views.sync_pull, name='sync_pull'),
+    path('api/push/', views.sync_push, name='sync_push'),
+]
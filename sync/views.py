@@ -0,0 +1,101 @@
+# sync/views.py
+
+import gzip
+import json
+import zlib
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import RequestDataTooBig
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET, require_POST
+
+from core.routers import replica_safe
+from users.models import Location
+from .log import get_changes, to_json
+from .push import MAX_PUSH, apply_changes
+
+# Responses smaller than this go out uncompressed; gzip would barely shrink them.
+MIN_COMPRESS_BYTES = 1024
+
+# Largest push body accepted once decompressed.
+MAX_PUSH_BYTES = 20 * 1024 * 1024
+
+
+def compressed_json_response(request, data):
+    """JSON without whitespace, gzipped when the client accepts it"""
+    body = json.dumps(data, default=to_json, separators=(',', ':')).encode()
+    response = HttpResponse(content_type='application/json')
+    if len(body) >= MIN_COMPRESS_BYTES and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip.compress(body, compresslevel=6)
+        response['Content-Encoding'] = 'gzip'
+    response.content = body
+    patch_vary_headers(response, ['Accept-Encoding'])
+    
+    return response
+
+def read_json_body(request):
+    """The request's JSON body, gunzipped if sent with Content-Encoding: gzip. Raises ValueError"""
+    body = request.body
+    if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, MAX_PUSH_BYTES)
+        except zlib.error:
+            raise ValueError('Invalid gzip body')
+        if decompressor.unconsumed_tail:
+            raise ValueError('Body too large; push fewer changes at a time')
+    return json.loads(body)
+
+@login_required
+@replica_safe
+@require_GET
+def sync_pull(request):
+    """
+    API endpoint for offline clients: what changed since the client's last
+    sync, ?since=<seq> (0 or absent the first time), for one site with
+    ?location=<name or id>. The answer lists each kind's field names once
+    and the objects as rows, with the ids deleted and the 'seq' to send
+    next time; pull again while 'more' is set.
+    """
+    try:
+        since = int(request.GET.get('since') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'since must be a sequence number'}, status=400)
+    if since < 0:
+        return JsonResponse({'error': 'since must be a sequence number'}, status=400)
+    
+    location = None
+    if request.GET.get('location'):
+        value = request.GET['location']
+        locations = Location.objects.filter(pk=int(value)) if value.isdigit() else Location.objects.filter(name__iexact=value)
+        location = locations.first()
+        if location is None:
+            return JsonResponse({'error': f'Unknown location {value}'}, status=400)
+    
+    return compressed_json_response(request, get_changes(since, location))
+
+@login_required
+@require_POST
+def sync_push(request):
+    """
+    API endpoint receiving the edits an offline client queued, as
+        {"changes": [{"id": "c-17", "type": "maintenance", "action": "update",
+                      "key": 42, "updated_at": "...", "fields": {...}}]}
+    optionally gzipped (Content-Encoding: gzip). Answers each change with
+    applied, conflict (with the server's copy), missing or rejected; see
+    sync/push.py.
+    """
+    try:
+        data = read_json_body(request)
+    except RequestDataTooBig:
+        return JsonResponse({'error': 'Body too large; push fewer changes at a time'}, status=413)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    changes = data.get('changes') if isinstance(data, dict) else None
+    if not isinstance(changes, list) or len(changes) > MAX_PUSH:
+        return JsonResponse({'error': f'Expected "changes", a list of at most {MAX_PUSH} edits'}, status=400)
+    
+    return compressed_json_response(request, {'results': apply_changes(changes, request.user)})
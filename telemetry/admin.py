@@ -0,0 +1,55 @@
+# telemetry/admin.py
+
+from django.contrib import admin
+from .models import ActiveAlert, Metric, RollupWatermark, ThresholdRule
+
+# Reading and Rollup use composite primary keys, which the admin does not support;
+# query them through telemetry.series instead.
+
+@admin.register(Metric)
+class MetricAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Metric model.
+    """
+    list_display = ('name', 'unit', 'description')
+    search_fields = ('name', 'description')
+    ordering = ('name',)
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for RollupWatermark model. Read-only: the roll-up job maintains it.
+    """
+    list_display = ('resolution', 'processed_until')
+    
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ThresholdRule)
+class ThresholdRuleAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for ThresholdRule model.
+    """
+    list_display = ('name', 'asset_type', 'metric', 'comparison', 'threshold', 'clear_threshold', 'consecutive', 'severity', 'mark_faulty', 'is_active')
+    list_filter = ('asset_type', 'severity', 'mark_faulty', 'is_active')
+    search_fields = ('name', 'metric__name')
+    list_select_related = ('asset_type', 'metric')
+
+@admin.register(ActiveAlert)
+class ActiveAlertAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for ActiveAlert model. Deleting an alert clears it without a log entry.
+    """
+    list_display = ('asset', 'rule', 'value', 'raised_at')
+    list_filter = ('rule__severity', 'rule__asset_type')
+    search_fields = ('asset__asset_tag', 'rule__name')
+    list_select_related = ('asset', 'rule')
+    
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,198 @@
+# telemetry/alerts.py
+
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from assets.models import AssetLog
+from assets.utils import set_assets_status
+from .lookups import asset_type_map
+from .models import ActiveAlert, ThresholdRule
+
+# Rules are reloaded after this many seconds, and when one is saved or deleted
+# in this process (see telemetry/signals.py). Alerts deleted by hand in the
+# admin are noticed at the next reload.
+RULES_MAX_AGE = getattr(settings, 'TELEMETRY_RULES_MAX_AGE', 60)
+
+# Priority (1 Critical ... 4 Low) of the incidents opened by alerts of each severity.
+SEVERITY_PRIORITIES = {'critical': 1, 'warning': 3}
+
+
+class AlertState:
+    """Where one rule stands for one asset: raised or not, and the readings in a row counted towards changing that"""
+    __slots__ = ('raised', 'count', 'last_ts')
+
+    def __init__(self, raised):
+        self.raised = raised
+        self.count = 0
+        self.last_ts = None
+
+
+def describe(rule, value, cleared=False):
+    unit = f' {rule.metric.unit}' if rule.metric.unit else ''
+    if cleared:
+        return f'{rule.name} cleared: {rule.metric.name} back at {value:g}{unit}'
+    return f'{rule.name}: {rule.metric.name} at {value:g}{unit}, {rule.comparison} {rule.threshold:g}{unit}'
+
+
+class AlertEngine:
+    """
+    Evaluates the threshold rules on every batch of readings as it is
+    stored, so alerts need no periodic scan of the readings table.
+
+    Rules are held in memory by (asset type, metric), so a batch costs a
+    dictionary lookup per reading, and no query unless it contains readings
+    covered by a rule for an asset not seen yet. The hysteresis counters
+    also live in memory; raised alerts are ActiveAlert rows, which are
+    loaded when an asset is first seen and de-duplicate alerts across
+    processes.
+
+    Raising an alert opens an incident through the incident correlator and,
+    for rules with mark_faulty, sets the asset to Faulty in bulk; clearing
+    it logs 'incident_resolved' but leaves the status and the incident for
+    a person to deal with.
+    """
+    def __init__(self, max_age=RULES_MAX_AGE):
+        self.max_age = max_age
+        self._rules = None
+        self._metric_ids = set()
+        self._loaded_at = 0.0
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._rules = None
+
+    def get_rules(self):
+        """Return {(asset_type_id, metric_id): [rule, ...]} of the active rules"""
+        if self._rules is None or time.monotonic() - self._loaded_at > self.max_age:
+            rules = defaultdict(list)
+            for rule in ThresholdRule.objects.filter(is_active=True).select_related('metric'):
+                rules[rule.asset_type_id, rule.metric_id].append(rule)
+            self._rules = dict(rules)
+            self._metric_ids = {metric_id for _, metric_id in rules}
+            self._loaded_at = time.monotonic()
+            self.refresh_states()
+        return self._rules
+
+    def refresh_states(self):
+        """
+        Forget the states of rules no longer active, and take whether an
+        alert is raised from ActiveAlert again: it may have been raised or
+        cleared elsewhere meanwhile. The counters carry on, so a reload in
+        the middle of a run of readings does not start it over.
+        """
+        rule_ids = {rule.pk for rules in self._rules.values() for rule in rules}
+        self._states = {key: state for key, state in self._states.items() if key[0] in rule_ids}
+        if not self._states:
+            return
+        active = set(ActiveAlert.objects.filter(rule_id__in=rule_ids).values_list('rule_id', 'asset_id'))
+        for key, state in self._states.items():
+            raised = key in active
+            if raised != state.raised:
+                # The run counted towards the other direction
+                state.raised = raised
+                state.count = 0
+
+    def evaluate(self, rows):
+        """
+        Feed stored (asset_id, metric_id, ts, value) rows through the rules.
+        Returns (alerts raised, alerts cleared).
+        """
+        with self._lock:
+            rules = self.get_rules()
+            relevant = [row for row in rows if row[1] in self._metric_ids]
+            if not relevant:
+                return 0, 0
+
+            asset_types = asset_type_map.get_many({row[0] for row in relevant})
+            readings = defaultdict(list)
+            for asset_id, metric_id, ts, value in relevant:
+                for rule in rules.get((asset_types.get(asset_id), metric_id), ()):
+                    readings[rule, asset_id].append((ts, value))
+            self.load_states(readings)
+
+            raised, cleared = [], []
+            for (rule, asset_id), values in readings.items():
+                state = self._states[rule.pk, asset_id]
+                for ts, value in sorted(values):
+                    # Late and resent readings do not count twice
+                    if state.last_ts is not None and ts <= state.last_ts:
+                        continue
+                    state.last_ts = ts
+                    counts = rule.is_cleared(value) if state.raised else rule.is_breached(value)
+                    state.count = state.count + 1 if counts else 0
+                    if state.count >= rule.consecutive:
+                        state.raised = not state.raised
+                        state.count = 0
+                        (raised if state.raised else cleared).append((rule, asset_id, ts, value))
+
+            try:
+                if raised:
+                    self.raise_alerts(raised)
+                if cleared:
+                    self.clear_alerts(cleared)
+            except Exception:
+                # Nothing was written; the next readings raise or clear them again
+                for rule, asset_id, _, _ in raised + cleared:
+                    self._states.pop((rule.pk, asset_id), None)
+                raise
+            return len(raised), len(cleared)
+
+    def load_states(self, keys):
+        """Load whether an alert is raised for the (rule, asset_id) pairs seen for the first time"""
+        missing = [(rule.pk, asset_id) for rule, asset_id in keys if (rule.pk, asset_id) not in self._states]
+        if not missing:
+            return
+        active = set(
+            ActiveAlert.objects.filter(
+                rule_id__in={rule_id for rule_id, _ in missing},
+                asset_id__in={asset_id for _, asset_id in missing},
+            ).values_list('rule_id', 'asset_id')
+        )
+        for key in missing:
+            self._states[key] = AlertState(key in active)
+
+    def raise_alerts(self, raised):
+        # Imported here because the incidents app imports the telemetry lookups
+        from incidents.correlation import IncidentEvent, correlator
+        events = []
+        faulty = defaultdict(list)
+        with transaction.atomic():
+            for rule, asset_id, ts, value in raised:
+                _, created = ActiveAlert.objects.get_or_create(
+                    rule=rule, asset_id=asset_id, defaults={'value': value, 'raised_at': ts}
+                )
+                if not created:
+                    # Another process raised it already
+                    continue
+                events.append(IncidentEvent(
+                    asset_id, describe(rule, value), f'alert:{rule.pk}', ts=ts,
+                    priority=SEVERITY_PRIORITIES[rule.severity],
+                ))
+                if rule.mark_faulty:
+                    faulty[rule].append(asset_id)
+            for rule, asset_ids in faulty.items():
+                set_assets_status(asset_ids, 'faulty', f'Set to Faulty by alert "{rule.name}"')
+            # Opens incidents (logged as 'incident_reported' on the assets), grouping
+            # the alerts of one failure and folding repeats into the open incident.
+            # In the same transaction: an alert is never left raised without its incident.
+            correlator.submit(events)
+
+    def clear_alerts(self, cleared):
+        logs = []
+        with transaction.atomic():
+            for rule, asset_id, ts, value in cleared:
+                deleted, _ = ActiveAlert.objects.filter(rule=rule, asset_id=asset_id).delete()
+                if deleted:
+                    logs.append(AssetLog(
+                        asset_id=asset_id, event_type='incident_resolved',
+                        description=describe(rule, value, cleared=True), new_value=f'{value:g}',
+                    ))
+            AssetLog.objects.bulk_create(logs)
+
+
+alert_engine = AlertEngine()
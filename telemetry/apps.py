@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TelemetryConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'telemetry'
+
+    def ready(self):
+        # Connect the signal handler that refreshes the ingest asset tag map
+        from . import signals  # noqa: F401
@@ -0,0 +1,176 @@
+# telemetry/buffer.py
+
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection
+
+from assets.models import Asset
+from .ingest import write_readings
+from .models import Metric
+
+logger = logging.getLogger(__name__)
+
+# Readings held in memory at most per process; beyond this the ingest
+# endpoint answers 429 Too Many Requests until the flusher catches up.
+QUEUE_SIZE = getattr(settings, 'TELEMETRY_INGEST_QUEUE_SIZE', 250_000)
+
+# Readings written per INSERT transaction, and how long (seconds) readings
+# wait at most for a batch to fill up.
+BATCH_SIZE = getattr(settings, 'TELEMETRY_INGEST_BATCH_SIZE', 5_000)
+FLUSH_INTERVAL = getattr(settings, 'TELEMETRY_INGEST_FLUSH_INTERVAL', 0.5)
+
+# Seconds to wait before retrying a batch the database refused.
+RETRY_DELAY = 1.0
+
+
+class IngestBuffer:
+    """
+    Bounded in-memory queue between the ingest endpoint and the database.
+
+    Requests add their prepared rows with offer(), which never blocks: it
+    returns False when the rows do not fit, and the endpoint tells the
+    gateway to retry later. A background thread writes the rows in batches
+    of batch_size with write_readings(). Space is only freed once a batch
+    is committed, so a slow or unavailable database fills the queue and
+    pushes back on the gateways instead of growing memory. A batch the
+    database could not take for the moment (OperationalError, e.g. locked)
+    is retried; rows it can never take, such as readings of an asset
+    deleted while they were queued, are dropped and counted so they do not
+    hold up the rest.
+
+    Rows in the queue are lost if the process is killed; they are flushed
+    on a normal exit.
+    """
+    def __init__(self, capacity=QUEUE_SIZE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.size = 0
+        self.accepted = 0
+        self.refused = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.write_rate = None
+        self._chunks = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def offer(self, rows):
+        """Queue rows for writing; False, and nothing queued, if they do not fit"""
+        if not rows:
+            return True
+        with self._lock:
+            if self.size + len(rows) > self.capacity:
+                self.refused += len(rows)
+                return False
+            self._chunks.append(rows)
+            self.size += len(rows)
+            self.accepted += len(rows)
+            ready = self.size >= self.batch_size
+            if self._thread is None:
+                self._start()
+        if ready:
+            self._wakeup.set()
+        return True
+
+    @property
+    def full(self):
+        return self.size >= self.capacity
+
+    def retry_after(self):
+        """Seconds until the queued rows should have been written, for the Retry-After header"""
+        if not self.write_rate:
+            return 1
+        return max(1, math.ceil(self.size / self.write_rate))
+
+    def flush(self):
+        """Write everything queued now, in the calling thread"""
+        while self.write_batch():
+            pass
+
+    def write_batch(self):
+        """Write up to batch_size queued rows; returns how many left the queue (written or dropped)"""
+        with self._write_lock:
+            with self._lock:
+                batch = []
+                while self._chunks and len(batch) < self.batch_size:
+                    batch.extend(self._chunks.popleft())
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                written = self._write(batch)
+            except OperationalError:
+                # Put the batch back in front; its space stays taken until it is written
+                with self._lock:
+                    self._chunks.appendleft(batch)
+                    self.failed_batches += 1
+                raise
+            except Exception:
+                logger.exception('Dropping %s telemetry readings the database refused', len(batch))
+                written = 0
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.size -= len(batch)
+                self.written += written
+                self.dropped += len(batch) - written
+                if written:
+                    self.write_rate = written / elapsed if elapsed else None
+            return len(batch)
+
+    def _write(self, batch):
+        """
+        Write a batch; on IntegrityError, without the rows whose asset or
+        metric has been deleted since they were queued. Returns the rows written.
+        """
+        try:
+            return write_readings(batch)
+        except IntegrityError:
+            asset_ids = set(Asset.objects.filter(pk__in={row[0] for row in batch}).values_list('pk', flat=True))
+            metric_ids = set(Metric.objects.filter(pk__in={row[1] for row in batch}).values_list('pk', flat=True))
+            rows = [row for row in batch if row[0] in asset_ids and row[1] in metric_ids]
+            if len(rows) == len(batch):
+                raise
+            logger.warning('Dropping %s telemetry readings of deleted assets or metrics', len(batch) - len(rows))
+            return write_readings(rows)
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='telemetry-ingest-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.write_batch():
+                    pass
+            except Exception:
+                logger.exception('Writing telemetry readings failed; retrying in %ss', RETRY_DELAY)
+                # Start over with a new connection in case this one broke
+                connection.close()
+                time.sleep(RETRY_DELAY)
+
+    def stats(self):
+        return {
+            'queued': self.size,
+            'capacity': self.capacity,
+            'accepted': self.accepted,
+            'refused': self.refused,
+            'written': self.written,
+            'failed_batches': self.failed_batches,
+            'dropped': self.dropped,
+        }
+
+
+ingest_buffer = IngestBuffer()
@@ -0,0 +1,112 @@
+# telemetry/frames.py
+
+# Wire formats accepted by the ingest endpoint (telemetry.views.ingest).
+#
+# JSON Lines (Content-Type: application/x-ndjson), one reading per line:
+#   {"asset": "AC-001", "metric": "supply_air_temperature", "ts": 1735732800.0, "value": 18.4}
+# ts may also be an ISO 8601 string; epoch seconds are cheaper to parse.
+#
+# Binary frames (Content-Type: application/x-ke-telemetry), little-endian:
+#   magic      4 bytes  b'KET1'
+#   assets     uint16 count, then per asset tag: uint8 length + UTF-8 bytes
+#   metrics    uint16 count, then per metric name: uint8 length + UTF-8 bytes
+#   readings   uint32 count, then per reading: uint16 asset index,
+#              uint16 metric index, float64 epoch seconds, float64 value
+# Tags and names are sent once per frame, so a reading costs 20 bytes.
+
+import json
+import struct
+
+JSONL_CONTENT_TYPE = 'application/x-ndjson'
+FRAME_CONTENT_TYPE = 'application/x-ke-telemetry'
+
+FRAME_MAGIC = b'KET1'
+READING = struct.Struct('<HHdd')
+COUNT16 = struct.Struct('<H')
+COUNT32 = struct.Struct('<I')
+
+
+class FrameError(ValueError):
+    """A request body that cannot be decoded at all"""
+
+
+def encode_frame(readings):
+    """Encode (asset_tag, metric_name, epoch_seconds, value) tuples as a binary frame"""
+    assets, metrics, records = {}, {}, []
+    for asset_tag, metric_name, ts, value in readings:
+        asset_index = assets.setdefault(asset_tag, len(assets))
+        metric_index = metrics.setdefault(metric_name, len(metrics))
+        records.append(READING.pack(asset_index, metric_index, ts, value))
+
+    parts = [FRAME_MAGIC]
+    for names in (assets, metrics):
+        parts.append(COUNT16.pack(len(names)))
+        for name in names:
+            encoded = name.encode()
+            parts.append(bytes([len(encoded)]) + encoded)
+    parts.append(COUNT32.pack(len(records)))
+    parts.extend(records)
+    return b''.join(parts)
+
+
+def decode_frame(body):
+    """Return (asset_tag, metric_name, epoch_seconds, value) tuples from a binary frame"""
+    if body[:4] != FRAME_MAGIC:
+        raise FrameError('Not a telemetry frame')
+    try:
+        offset = 4
+        tables = []
+        for _ in range(2):
+            (count,), offset = COUNT16.unpack_from(body, offset), offset + COUNT16.size
+            names = []
+            for _ in range(count):
+                length = body[offset]
+                names.append(body[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+            tables.append(names)
+        (count,), offset = COUNT32.unpack_from(body, offset), offset + COUNT32.size
+    except (IndexError, struct.error, UnicodeDecodeError):
+        raise FrameError('Truncated or corrupt frame header')
+    if len(body) - offset != count * READING.size:
+        raise FrameError(f'Frame declares {count} readings but holds {(len(body) - offset) / READING.size:g}')
+
+    assets, metrics = tables
+    try:
+        return [
+            (assets[asset_index], metrics[metric_index], ts, value)
+            for asset_index, metric_index, ts, value in READING.iter_unpack(memoryview(body)[offset:])
+        ]
+    except IndexError:
+        raise FrameError('Reading refers to an asset or metric missing from the frame')
+
+
+def decode_jsonl(body):
+    """
+    Return (asset_tag, metric_name, ts, value) tuples from JSON Lines.
+    Malformed lines become None, so their position is reported as rejected.
+    """
+    lines = [line for line in body.splitlines() if line.strip()]
+    try:
+        # Parsing all lines as one JSON array is several times faster than line by line
+        items = json.loads(b'[' + b','.join(lines) + b']')
+        if len(items) != len(lines):
+            raise ValueError('A line holds more than one reading')
+        return [(item['asset'], item['metric'], item['ts'], item['value']) for item in items]
+    except (ValueError, TypeError, KeyError):
+        pass
+    readings = []
+    for line in lines:
+        try:
+            item = json.loads(line)
+            readings.append((item['asset'], item['metric'], item['ts'], item['value']))
+        except (ValueError, TypeError, KeyError):
+            readings.append(None)
+    return readings
+
+
+def encode_jsonl(readings):
+    """Encode (asset_tag, metric_name, ts, value) tuples as JSON Lines"""
+    return b''.join(
+        json.dumps({'asset': asset_tag, 'metric': metric_name, 'ts': ts, 'value': value}).encode() + b'\n'
+        for asset_tag, metric_name, ts, value in readings
+    )
@@ -0,0 +1,228 @@
+# telemetry/ingest.py
+
+import logging
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from assets.forms import normalize_asset_tag
+from assets.management.batch import bulk_get_or_create
+from .alerts import alert_engine
+from .lookups import asset_tag_map, metric_name_map
+from .models import Metric, Reading, Rollup
+from .rollups import RAW_RETENTION, get_watermarks, rewind_watermarks
+
+logger = logging.getLogger(__name__)
+
+# Number of readings validated and written per transaction.
+INGEST_CHUNK_SIZE = 1000
+
+# Readings timestamped further than this (seconds) in the future are rejected,
+# allowing for collectors whose clocks run a little fast.
+MAX_CLOCK_SKEW = 5 * 60
+
+METRIC_NAME_MAX_LENGTH = Metric._meta.get_field('name').max_length
+
+
+def parse_timestamp(value):
+    """
+    Return an aware datetime from a datetime, Unix epoch seconds or an
+    ISO 8601 string; naive values are taken as UTC. None if invalid.
+    """
+    if isinstance(value, datetime):
+        ts = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if not math.isfinite(value):
+            return None
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    elif isinstance(value, str):
+        try:
+            ts = parse_datetime(value.strip())
+        except ValueError:
+            return None
+        if ts is None:
+            return None
+    else:
+        return None
+    if timezone.is_naive(ts):
+        ts = timezone.make_aware(ts, dt_timezone.utc)
+    return ts
+
+
+def clean_asset_tag(value):
+    """The normalized asset tag, or a ValueError describing the problem"""
+    if not isinstance(value, str) or not value.strip():
+        return ValueError('Missing asset tag')
+    return normalize_asset_tag(value)
+
+
+def clean_metric_name(value):
+    """The metric name without surrounding spaces, or a ValueError describing the problem"""
+    if not isinstance(value, str) or not value.strip():
+        return ValueError('Missing metric name')
+    if len(value.strip()) > METRIC_NAME_MAX_LENGTH:
+        return ValueError(f'Metric name longer than {METRIC_NAME_MAX_LENGTH} characters')
+    return value.strip()
+
+
+class IngestResult:
+    """
+    Outcome of an ingest: readings stored and rejected readings with their position.
+
+    Readings already stored (same asset, metric and time) are counted as
+    stored; sending a batch twice does not duplicate it.
+    """
+    def __init__(self):
+        self.stored = 0
+        self.errors = []
+
+    def add_error(self, index, message):
+        self.errors.append((index, message))
+
+
+def prepare_readings(readings, now=None, offset=0):
+    """
+    Validate (asset_tag, metric_name, timestamp, value) tuples and resolve
+    them to (asset_id, metric_id, ts, value) rows ready for write_readings().
+
+    Returns (rows, errors), errors being (position, message) pairs counted
+    from offset. Readings for unknown assets, with non-numeric values, or
+    outside [now - raw retention, now + MAX_CLOCK_SKEW] are rejected; unknown
+    metrics are created. Asset tags and metric names are resolved through
+    the in-memory maps, so usually this runs no query at all.
+    """
+    now = now or timezone.now()
+    oldest = now - timedelta(seconds=RAW_RETENTION)
+    newest = now + timedelta(seconds=MAX_CLOCK_SKEW)
+    errors = []
+
+    # A batch repeats the same few tags and names; check each once
+    asset_tags, metric_names = {}, {}
+    valid = []
+    for index, reading in enumerate(readings, start=offset):
+        try:
+            asset_tag, metric_name, ts, value = reading
+            tag = asset_tags.get(asset_tag)
+            name = metric_names.get(metric_name)
+        except (TypeError, ValueError):
+            errors.append((index, 'Expected asset, metric, timestamp and value'))
+            continue
+        if tag is None:
+            tag = asset_tags[asset_tag] = clean_asset_tag(asset_tag)
+        if name is None:
+            name = metric_names[metric_name] = clean_metric_name(metric_name)
+        if isinstance(tag, ValueError) or isinstance(name, ValueError):
+            errors.append((index, str(tag if isinstance(tag, ValueError) else name)))
+            continue
+        ts = parse_timestamp(ts)
+        if ts is None:
+            errors.append((index, 'Invalid timestamp'))
+            continue
+        if not oldest <= ts <= newest:
+            errors.append((index, 'Timestamp outside the accepted range'))
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            errors.append((index, 'Value must be a finite number'))
+            continue
+        valid.append((index, tag, name, ts, float(value)))
+    if not valid:
+        return [], errors
+
+    asset_ids = asset_tag_map.get_many({row[1] for row in valid})
+    for row in valid:
+        if row[1] not in asset_ids:
+            errors.append((row[0], f'Unknown asset "{row[1]}"'))
+    valid = [row for row in valid if row[1] in asset_ids]
+
+    metric_names = {row[2] for row in valid}
+    metric_ids = metric_name_map.get_many(metric_names)
+    if len(metric_ids) < len(metric_names):
+        created, _ = bulk_get_or_create(Metric, 'name', {name: {} for name in metric_names - metric_ids.keys()})
+        created_ids = {name: metric.pk for name, metric in created.items()}
+        metric_name_map.add(created_ids)
+        metric_ids.update(created_ids)
+
+    rows = [
+        (asset_ids[asset_tag], metric_ids[metric_name], ts, value)
+        for _, asset_tag, metric_name, ts, value in valid
+    ]
+    return rows, errors
+
+
+def datetime_adapter(connection):
+    """
+    A faster equivalent of connection.ops.adapt_datetimefield_value() for
+    aware datetimes. On SQLite the ORM's version costs more than the INSERT
+    itself; the database gets the same text, naive UTC.
+    """
+    if connection.vendor == 'sqlite' and settings.USE_TZ and connection.timezone == dt_timezone.utc:
+        utc = dt_timezone.utc
+        return lambda value: str(value.astimezone(utc).replace(tzinfo=None))
+    return connection.ops.adapt_datetimefield_value
+
+
+def write_readings(rows, using='default'):
+    """
+    Insert prepared (asset_id, metric_id, ts, value) rows in one transaction.
+
+    Uses a plain INSERT ... ON CONFLICT DO NOTHING through executemany(),
+    which skips building a model instance per reading (the bulk of
+    bulk_create()'s cost at this volume); duplicates are ignored.
+    Readings older than what has already been rolled up move the roll-up
+    watermarks back, so the next telemetry roll-up includes them. Then the
+    alert rules are evaluated on the rows (see telemetry.alerts).
+    """
+    if not rows:
+        return 0
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(
+        quote_name(Reading._meta.get_field(name).column) for name in ('asset', 'metric', 'ts', 'value')
+    )
+    sql = (
+        f'INSERT INTO {quote_name(Reading._meta.db_table)} ({columns}) '
+        f'VALUES (%s, %s, %s, %s) ON CONFLICT DO NOTHING'
+    )
+    adapt = datetime_adapter(connection)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.executemany(sql, [(asset_id, metric_id, adapt(ts), value) for asset_id, metric_id, ts, value in rows])
+
+    earliest = min(row[2] for row in rows)
+    minute_watermark = get_watermarks()[Rollup.MINUTE]
+    if minute_watermark is not None and earliest < minute_watermark:
+        rewind_watermarks(earliest)
+
+    # Alert rules see every batch as it is stored; the readings are kept even if that fails
+    try:
+        alert_engine.evaluate(rows)
+    except Exception:
+        logger.exception('Evaluating alert rules failed for %s readings', len(rows))
+    return len(rows)
+
+
+def ingest_readings(readings, chunk_size=INGEST_CHUNK_SIZE, now=None):
+    """
+    Store readings given as (asset_tag, metric_name, timestamp, value) tuples,
+    validating and writing chunk_size of them at a time (see
+    prepare_readings() and write_readings()).
+    """
+    result = IngestResult()
+    iterator = iter(readings)
+    offset = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        rows, errors = prepare_readings(chunk, now, offset)
+        result.errors.extend(errors)
+        result.stored += write_readings(rows)
+        offset += len(chunk)
+    return result
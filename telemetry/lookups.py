@@ -0,0 +1,63 @@
+# telemetry/lookups.py
+
+import threading
+import time
+
+from django.conf import settings
+
+from assets.models import Asset
+from .models import Metric
+
+# The in-memory asset tag and metric name maps are reloaded after this many
+# seconds, and at most this often (seconds) when a batch names one they lack.
+NAME_MAP_MAX_AGE = getattr(settings, 'TELEMETRY_NAME_MAP_MAX_AGE', 300)
+NAME_MAP_MISS_INTERVAL = getattr(settings, 'TELEMETRY_NAME_MAP_MISS_INTERVAL', 5)
+
+
+class NameMap:
+    """
+    In-memory name -> id map of a model (or of any two fields), shared by
+    the requests of a process, so ingest needs no query to resolve the
+    asset tags and metric names of a batch.
+
+    Reloaded after NAME_MAP_MAX_AGE seconds, after invalidate() (called when
+    an asset is saved or deleted, see telemetry/signals.py) and when a batch
+    names something missing, at most every NAME_MAP_MISS_INTERVAL seconds;
+    the last two pick up rows created elsewhere, e.g. by another process.
+    """
+    def __init__(self, model, field, value_field='pk', max_age=NAME_MAP_MAX_AGE, miss_interval=NAME_MAP_MISS_INTERVAL):
+        self.model = model
+        self.field = field
+        self.value_field = value_field
+        self.max_age = max_age
+        self.miss_interval = miss_interval
+        self._ids = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_many(self, names):
+        """Return {name: id} for those of names that exist"""
+        ids = self._ids
+        age = time.monotonic() - self._loaded_at
+        if ids is None or age > self.max_age or (age > self.miss_interval and not names <= ids.keys()):
+            ids = self.reload()
+        return {name: ids[name] for name in names if name in ids}
+
+    def reload(self):
+        with self._lock:
+            self._ids = dict(self.model.objects.values_list(self.field, self.value_field))
+            self._loaded_at = time.monotonic()
+            return self._ids
+
+    def add(self, ids):
+        with self._lock:
+            if self._ids is not None:
+                self._ids = {**self._ids, **ids}
+
+    def invalidate(self):
+        self._ids = None
+
+
+asset_tag_map = NameMap(Asset, 'asset_tag')
+asset_type_map = NameMap(Asset, 'pk', 'asset_type_id')
+metric_name_map = NameMap(Metric, 'name')
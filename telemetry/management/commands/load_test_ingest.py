@@ -0,0 +1,136 @@
+# telemetry/management/commands/load_test_ingest.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from assets.models import Asset
+from telemetry.buffer import IngestBuffer, ingest_buffer
+from telemetry.frames import FRAME_CONTENT_TYPE, JSONL_CONTENT_TYPE, decode_frame, decode_jsonl, encode_frame, encode_jsonl
+from telemetry.ingest import prepare_readings
+from telemetry.lookups import metric_name_map
+from telemetry.models import Metric, Reading, Rollup
+
+# Metrics the load test writes, removed with their readings afterwards.
+METRIC_PREFIX = 'loadtest_metric_'
+TOKEN = 'load-test-token'
+
+FORMATS = {
+    'binary': (FRAME_CONTENT_TYPE, encode_frame, decode_frame),
+    'jsonl': (JSONL_CONTENT_TYPE, encode_jsonl, decode_jsonl),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the telemetry ingest pipeline in this process: time decoding, validation and '
+        'writing per reading, then the full endpoint through Django (target: 50,000 readings/s on one core)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readings', type=int, default=200_000, help='Readings sent per format')
+        parser.add_argument('--batch', type=int, default=5_000, help='Readings per request')
+        parser.add_argument('--metrics', type=int, default=20, help='Metrics per asset')
+        parser.add_argument('--format', choices=[*FORMATS, 'both'], default='both')
+        parser.add_argument('--keep', action='store_true', help='Keep the readings written instead of deleting them')
+
+    def handle(self, *args, **options):
+        asset_tags = list(Asset.objects.order_by('pk').values_list('asset_tag', flat=True))
+        if not asset_tags:
+            raise CommandError('The load test needs at least one asset')
+        metrics = [f'{METRIC_PREFIX}{number:02d}' for number in range(options['metrics'])]
+        formats = list(FORMATS) if options['format'] == 'both' else [options['format']]
+
+        try:
+            for name in formats:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {options["readings"]:,} readings in batches of {options["batch"]:,}'))
+                # Each format gets its own timestamps, so nothing is a duplicate
+                batches = self.make_batches(asset_tags, metrics, options['readings'], options['batch'])
+                self.run_stages(name, batches)
+                self.clean_up()
+                self.run_endpoint(name, batches)
+                if not options['keep']:
+                    self.clean_up()
+        finally:
+            if not options['keep']:
+                self.clean_up()
+
+    def make_batches(self, asset_tags, metrics, total, batch_size):
+        """Readings as gateways would send them: every asset and metric at one time, then the next"""
+        start = timezone.now() - timedelta(minutes=5)
+        series = [(asset_tag, metric) for asset_tag in asset_tags for metric in metrics]
+        readings = []
+        for number in range(total):
+            step, position = divmod(number, len(series))
+            asset_tag, metric = series[position]
+            readings.append((asset_tag, metric, start.timestamp() + step * 0.01, 20.0 + number % 100 / 10))
+        return [readings[i:i + batch_size] for i in range(0, total, batch_size)]
+
+    def run_stages(self, name, batches):
+        """Time each stage on its own, in this thread"""
+        _, encode, decode = FORMATS[name]
+        bodies = [encode(batch) for batch in batches]
+        total = sum(len(batch) for batch in batches)
+        buffer = IngestBuffer(capacity=total, batch_size=5_000)
+        timings = {'decode': 0.0, 'validate': 0.0, 'write': 0.0}
+
+        prepare_readings(decode(bodies[0])[:1])  # Load the name maps and create the metrics
+        for body in bodies:
+            started = time.perf_counter()
+            readings = decode(body)
+            decoded = time.perf_counter()
+            rows, errors = prepare_readings(readings)
+            timings['decode'] += decoded - started
+            timings['validate'] += time.perf_counter() - decoded
+            if errors:
+                raise CommandError(f'Readings were rejected: {errors[:3]}')
+            buffer.offer(rows)
+        started = time.perf_counter()
+        buffer.flush()
+        timings['write'] = time.perf_counter() - started
+
+        for stage, elapsed in timings.items():
+            self.stdout.write(f'  {stage:<10} {elapsed / total * 1e6:>8.2f} µs/reading {total / elapsed:>12,.0f} readings/s')
+        overall = sum(timings.values())
+        style = self.style.SUCCESS if total / overall >= 50_000 else self.style.WARNING
+        self.stdout.write(style(f'  {"pipeline":<10} {overall / total * 1e6:>8.2f} µs/reading {total / overall:>12,.0f} readings/s'))
+
+    def run_endpoint(self, name, batches):
+        """POST every batch through the URLconf and middleware, then wait for the queue to drain"""
+        content_type, encode, _ = FORMATS[name]
+        bodies = [encode(batch) for batch in batches]
+        total = sum(len(batch) for batch in batches)
+        client = Client(SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+        statuses = {}
+
+        with override_settings(TELEMETRY_INGEST_TOKENS=[TOKEN], DATA_UPLOAD_MAX_MEMORY_SIZE=None):
+            started = time.perf_counter()
+            for body in bodies:
+                while True:
+                    response = client.post('/telemetry/api/ingest/', body, content_type=content_type)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code != 429:
+                        break
+                    # Do what a gateway does under backpressure, minus the sleep
+                    ingest_buffer.write_batch()
+                if response.status_code != 202:
+                    raise CommandError(f'Ingest returned {response.status_code}: {response.content[:200]}')
+            posted = time.perf_counter() - started
+            ingest_buffer.flush()
+            elapsed = time.perf_counter() - started
+
+        style = self.style.SUCCESS if total / elapsed >= 50_000 else self.style.WARNING
+        self.stdout.write(
+            f'  endpoint   {posted / total * 1e6:>8.2f} µs/reading accepted, responses {statuses}'
+        )
+        self.stdout.write(style(f'  {"end to end":<10} {elapsed / total * 1e6:>8.2f} µs/reading {total / elapsed:>12,.0f} readings/s'))
+
+    def clean_up(self):
+        metrics = Metric.objects.filter(name__startswith=METRIC_PREFIX)
+        Reading.objects.filter(metric__in=metrics).delete()
+        Rollup.objects.filter(metric__in=metrics).delete()
+        metrics.delete()
+        metric_name_map.invalidate()
@@ -0,0 +1,37 @@
+# telemetry/management/commands/rollup_telemetry.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from telemetry.models import Rollup
+from telemetry.rollups import RollupResult, purge, roll_up
+
+
+class Command(BaseCommand):
+    help = 'Roll up new telemetry readings into 1 minute, 1 hour and 1 day buckets and purge expired data'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-purge', action='store_true', help='Only roll up; keep data past its retention')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = roll_up(result=RollupResult())
+        if not options['no_purge']:
+            purge(result=result)
+        elapsed = time.monotonic() - started
+
+        labels = dict(Rollup.RESOLUTIONS)
+        for resolution, label in labels.items():
+            self.stdout.write(
+                f'{label}: {result.buckets[resolution]} buckets, {result.rows[resolution]} roll-ups written'
+            )
+        if result.purged:
+            purged = ', '.join(
+                f'{count} {"raw readings" if name == "raw" else labels[name] + " roll-ups"}'
+                for name, count in result.purged.items()
+            )
+            self.stdout.write(f'Purged {purged}')
+        self.stdout.write(self.style.SUCCESS(f'Telemetry rolled up in {elapsed:.2f}s'))
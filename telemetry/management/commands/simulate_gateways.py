@@ -0,0 +1,155 @@
+# telemetry/management/commands/simulate_gateways.py
+
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.models import Asset
+from telemetry.frames import FRAME_CONTENT_TYPE, JSONL_CONTENT_TYPE, encode_frame, encode_jsonl
+
+FORMATS = {
+    'binary': (FRAME_CONTENT_TYPE, encode_frame),
+    'jsonl': (JSONL_CONTENT_TYPE, encode_jsonl),
+}
+
+
+class Gateway(threading.Thread):
+    """
+    One BMS gateway: every interval it reads all metrics of its assets and
+    posts them as one batch. Like a real gateway it keeps a batch that got
+    429 Too Many Requests (or a network error) and resends it after
+    Retry-After, while new readings pile up behind it.
+    """
+    def __init__(self, command, asset_tags, options):
+        super().__init__(daemon=True)
+        self.command = command
+        self.asset_tags = asset_tags
+        self.options = options
+        self.metrics = [f'sim_gateway_metric_{number:02d}' for number in range(options['metrics'])]
+        self.pending = []
+        self.phase = random.random() * 100
+
+    def run(self):
+        content_type, encode = FORMATS[self.options['format']]
+        next_reading = time.time()
+        while not self.command.stopped.is_set():
+            now = time.time()
+            if now >= next_reading:
+                self.pending.append(self.read(next_reading))
+                next_reading += self.options['interval']
+            if self.pending:
+                batch = [reading for readings in self.pending for reading in readings]
+                retry_after = self.post(encode(batch), content_type, len(batch))
+                if retry_after is None:
+                    self.pending = []
+                else:
+                    self.command.stopped.wait(retry_after)
+                    continue
+            self.command.stopped.wait(max(0, next_reading - time.time()))
+
+    def read(self, ts):
+        return [
+            (asset_tag, metric, ts, round(20 + 5 * math.sin(ts / 600 + self.phase + number) + random.random(), 2))
+            for asset_tag in self.asset_tags
+            for number, metric in enumerate(self.metrics)
+        ]
+
+    def post(self, body, content_type, count):
+        """Send a batch; None if it was accepted, else the seconds to wait before resending"""
+        request = urllib.request.Request(self.options['url'], data=body, method='POST', headers={
+            'Content-Type': content_type,
+            'Authorization': f'Bearer {self.options["token"]}',
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            self.command.record(202, count, time.perf_counter() - started)
+            return None
+        except urllib.error.HTTPError as e:
+            self.command.record(e.code, count, time.perf_counter() - started)
+            if e.code == 429:
+                return float(e.headers.get('Retry-After', 1))
+            self.command.stderr.write(f'{self.name}: ingest returned {e.code}: {e.read()[:200]}')
+            self.command.stopped.set()
+            return None
+        except (urllib.error.URLError, OSError) as e:
+            self.command.record('error', count, time.perf_counter() - started)
+            self.command.stderr.write(f'{self.name}: {e}')
+            return 1.0
+
+
+class Command(BaseCommand):
+    help = 'Emulate BMS gateways posting telemetry batches to a running server, to load test the ingest endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000/telemetry/api/ingest/', help='Ingest endpoint URL')
+        parser.add_argument('--token', required=True, help='Ingest token (one of KE_TELEMETRY_TOKENS on the server)')
+        parser.add_argument('--gateways', type=int, default=10, help='Gateways, each owning a share of the assets')
+        parser.add_argument('--assets', type=int, default=1000, help='Assets reporting (existing ones, reused cyclically)')
+        parser.add_argument('--metrics', type=int, default=20, help='Metrics per asset')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between readings of a metric')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+        parser.add_argument('--format', choices=FORMATS, default='binary')
+
+    def handle(self, *args, **options):
+        tags = list(Asset.objects.order_by('pk').values_list('asset_tag', flat=True))
+        if not tags:
+            raise CommandError('No assets to report readings for')
+        # More simulated assets than exist reuse the tags; the database drops their duplicate readings
+        asset_tags = [tags[number % len(tags)] for number in range(options['assets'])]
+
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.latencies = []
+        gateways = [
+            Gateway(self, asset_tags[number::options['gateways']], options)
+            for number in range(options['gateways'])
+        ]
+        rate = options['assets'] * options['metrics'] / options['interval']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{len(gateways)} gateways, {options["assets"]} assets x {options["metrics"]} metrics '
+            f'every {options["interval"]:g}s = {rate:,.0f} readings/s offered to {options["url"]}'
+        ))
+
+        started = time.monotonic()
+        for gateway in gateways:
+            gateway.start()
+        last_accepted = 0
+        try:
+            while time.monotonic() - started < options['duration']:
+                time.sleep(5)
+                with self.lock:
+                    accepted = self.counts.get(202, (0, 0))[1]
+                    refused = self.counts.get(429, (0, 0))[0]
+                    latencies = sorted(self.latencies)
+                    self.latencies = []
+                p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+                self.stdout.write(
+                    f'{time.monotonic() - started:>6.0f}s  {(accepted - last_accepted) / 5:>10,.0f} readings/s accepted  '
+                    f'{refused:>6} x 429 so far  p95 {p95:.0f} ms'
+                )
+                last_accepted = accepted
+        except KeyboardInterrupt:
+            pass
+        self.stopped.set()
+        for gateway in gateways:
+            gateway.join()
+
+        elapsed = time.monotonic() - started
+        for status, (requests, readings) in sorted(self.counts.items(), key=str):
+            self.stdout.write(f'{status}: {requests} requests, {readings:,} readings')
+        accepted = self.counts.get(202, (0, 0))[1]
+        self.stdout.write(self.style.SUCCESS(f'Accepted {accepted / elapsed:,.0f} readings/s on average'))
+
+    def record(self, status, readings, latency):
+        with self.lock:
+            requests, total = self.counts.get(status, (0, 0))
+            self.counts[status] = (requests + 1, total + readings)
+            self.latencies.append(latency)
@@ -0,0 +1,92 @@
+# telemetry/management/commands/simulate_telemetry.py
+
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from assets.models import Asset
+from telemetry.ingest import INGEST_CHUNK_SIZE, ingest_readings
+from telemetry.models import Reading, Rollup
+from telemetry.rollups import RAW_RETENTION, RollupResult, purge, roll_up
+from telemetry.series import get_asset_telemetry_summary, get_series
+
+
+class Command(BaseCommand):
+    help = (
+        'Load synthetic sensor readings for existing assets and time ingest, roll-ups and queries '
+        '(sizing: 1k assets x 20 metrics every 10 seconds is 2,000 readings/s)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assets', type=int, default=50, help='Assets to generate readings for (existing ones)')
+        parser.add_argument('--metrics', type=int, default=20, help='Metrics per asset')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between readings of a metric')
+        parser.add_argument('--minutes', type=int, default=60, help='Minutes of readings, ending now')
+        parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE, help='Readings per ingest batch')
+
+    def handle(self, *args, **options):
+        assets = list(Asset.objects.order_by('pk').values_list('pk', 'asset_tag')[:options['assets']])
+        if not assets:
+            raise CommandError('No assets to generate readings for')
+        if options['minutes'] * 60 > RAW_RETENTION:
+            raise CommandError(f'Readings older than {RAW_RETENTION // 60} minutes are rejected; lower --minutes')
+        metrics = [f'sim_metric_{number:02d}' for number in range(options['metrics'])]
+        now = timezone.now()
+        start = now - timedelta(minutes=options['minutes'])
+        steps = options['minutes'] * 60 // options['interval']
+
+        def readings():
+            # A slow sine wave with noise per asset and metric
+            for step in range(steps):
+                ts = start + timedelta(seconds=step * options['interval'])
+                for asset_number, (_, asset_tag) in enumerate(assets):
+                    for metric_number, metric in enumerate(metrics):
+                        phase = asset_number + metric_number
+                        value = 20 + 5 * math.sin(step / 60 + phase) + random.random()
+                        yield asset_tag, metric, ts, round(value, 2)
+
+        total = steps * len(assets) * len(metrics)
+        started = time.monotonic()
+        result = ingest_readings(readings(), chunk_size=options['chunk_size'], now=now)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Ingested {result.stored} of {total} readings in {elapsed:.2f}s: '
+            f'{result.stored / elapsed:,.0f} readings/s ({len(result.errors)} rejected)'
+        )
+
+        started = time.monotonic()
+        rollup_result = roll_up(now=now, result=RollupResult())
+        elapsed = time.monotonic() - started
+        written = sum(rollup_result.rows.values())
+        self.stdout.write(
+            f'Rolled up {rollup_result.buckets[Rollup.MINUTE]} minutes into {written} roll-ups in {elapsed:.2f}s'
+        )
+        started = time.monotonic()
+        purge(now=now, result=rollup_result)
+        self.stdout.write(f'Purged {rollup_result.purged} in {time.monotonic() - started:.2f}s')
+
+        asset = Asset.objects.get(pk=assets[0][0])
+        metric = Reading.objects.filter(asset=asset).select_related('metric').first().metric
+        queries = [
+            ('summary (asset detail)', lambda: get_asset_telemetry_summary(asset)),
+            ('series, 1 hour', lambda: get_series(asset, metric, now - timedelta(hours=1), now)),
+            ('series, 24 hours', lambda: get_series(asset, metric, now - timedelta(hours=24), now)),
+            ('series, 30 days', lambda: get_series(asset, metric, now - timedelta(days=30), now)),
+        ]
+        for name, query in queries:
+            started = time.monotonic()
+            query()
+            self.stdout.write(f'{name:<24} {(time.monotonic() - started) * 1000:>8.1f} ms')
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'telemetry_reading%'")
+                size = cursor.fetchone()[0]
+            if size:
+                count = Reading.objects.count()
+                self.stdout.write(f'Raw readings: {count} rows, {size / 1024 / 1024:.1f} MB ({size / max(count, 1):.0f} bytes/row)')
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assets', '0002_assignmentrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Metric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Metric name as sent by collectors (e.g., supply_air_temperature)', max_length=100, unique=True)),
+                ('unit', models.CharField(blank=True, help_text='Unit of measurement (e.g., °C, %, kW, hours)', max_length=20)),
+                ('description', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('resolution', models.PositiveIntegerField(choices=[(60, '1 minute'), (3600, '1 hour'), (86400, '1 day')], primary_key=True, serialize=False)),
+                ('processed_until', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Roll-up Watermark',
+                'verbose_name_plural': 'Roll-up Watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='Reading',
+            fields=[
+                ('pk', models.CompositePrimaryKey('asset', 'metric', 'ts', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('ts', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset')),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='telemetry.metric')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ts'], name='telemetry_reading_ts')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('pk', models.CompositePrimaryKey('asset', 'metric', 'resolution', 'bucket', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('resolution', models.PositiveIntegerField(choices=[(60, '1 minute'), (3600, '1 hour'), (86400, '1 day')], help_text='Bucket length in seconds')),
+                ('bucket', models.DateTimeField(help_text='Start of the bucket')),
+                ('count', models.PositiveIntegerField()),
+                ('sum', models.FloatField()),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset')),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='telemetry.metric')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='telemetry_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_assignmentrule'),
+        ('telemetry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reading',
+            name='asset',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset'),
+        ),
+        migrations.AlterField(
+            model_name='reading',
+            name='metric',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='telemetry.metric'),
+        ),
+        migrations.AlterField(
+            model_name='rollup',
+            name='asset',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset'),
+        ),
+        migrations.AlterField(
+            model_name='rollup',
+            name='metric',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='telemetry.metric'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_add_incident_resolved_event'),
+        ('telemetry', '0002_drop_redundant_foreign_key_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThresholdRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Short description used in alerts (e.g., High supply air temperature)', max_length=100)),
+                ('comparison', models.CharField(choices=[('above', 'Above'), ('below', 'Below')], default='above', max_length=10)),
+                ('threshold', models.FloatField(help_text='Value past which the alert is raised')),
+                ('clear_threshold', models.FloatField(blank=True, help_text='Value back past which the alert clears (defaults to the threshold)', null=True)),
+                ('consecutive', models.PositiveIntegerField(default=3, help_text='Readings in a row needed to raise or clear the alert')),
+                ('severity', models.CharField(choices=[('warning', 'Warning'), ('critical', 'Critical')], default='warning', max_length=10)),
+                ('mark_faulty', models.BooleanField(default=False, help_text="Set the asset's status to Faulty when the alert is raised")),
+                ('is_active', models.BooleanField(default=True)),
+                ('asset_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='threshold_rules', to='assets.assettype')),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='threshold_rules', to='telemetry.metric')),
+            ],
+            options={
+                'verbose_name': 'Threshold Rule',
+                'verbose_name_plural': 'Threshold Rules',
+                'ordering': ['asset_type', 'metric', 'threshold'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActiveAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.FloatField(help_text='Reading that raised the alert')),
+                ('raised_at', models.DateTimeField(help_text='Time of that reading')),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_alerts', to='assets.asset')),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_alerts', to='telemetry.thresholdrule')),
+            ],
+            options={
+                'verbose_name': 'Active Alert',
+                'verbose_name_plural': 'Active Alerts',
+                'ordering': ['-raised_at'],
+                'constraints': [models.UniqueConstraint(fields=('rule', 'asset'), name='telemetry_alert_unique_rule_asset')],
+            },
+        ),
+    ]
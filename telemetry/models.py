@@ -0,0 +1,168 @@
+# telemetry/models.py
+
+from django.db import models
+from assets.models import Asset, AssetType
+
+class Metric(models.Model):
+    """
+    A kind of sensor reading, e.g. 'supply_air_temperature' or 'load'.
+    Readings refer to metrics by id to keep every row small.
+    """
+    name = models.CharField(max_length=100, unique=True, help_text="Metric name as sent by collectors (e.g., supply_air_temperature)")
+    unit = models.CharField(max_length=20, blank=True, help_text="Unit of measurement (e.g., °C, %, kW, hours)")
+    description = models.CharField(max_length=255, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.unit})" if self.unit else self.name
+
+class Reading(models.Model):
+    """
+    One raw sensor value. Append-only and kept only for TELEMETRY_RAW_RETENTION;
+    queries read the Rollup table instead.
+
+    The composite primary key (asset, metric, ts) is the only index besides
+    ts, so no surrogate id is stored, and a reading sent twice is ignored.
+    """
+    pk = models.CompositePrimaryKey('asset', 'metric', 'ts')
+    # No separate foreign key indexes: the primary key already starts with
+    # the asset, and every index slows down ingest
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='+', db_index=False)
+    metric = models.ForeignKey(Metric, on_delete=models.PROTECT, related_name='+', db_index=False)
+    ts = models.DateTimeField()
+    value = models.FloatField()
+    
+    class Meta:
+        indexes = [
+            # Roll-ups and retention scan readings by time
+            models.Index(fields=['ts'], name='telemetry_reading_ts'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id}/{self.metric_id} @ {self.ts:%Y-%m-%d %H:%M:%S}: {self.value}"
+
+class Rollup(models.Model):
+    """
+    Readings of one asset and metric aggregated over a time bucket of
+    1 minute, 1 hour or 1 day (buckets are aligned to UTC).
+
+    count, sum, min and max can be combined again, so each resolution is
+    built from the one below it, and averages are sum / count.
+    """
+    MINUTE = 60
+    HOUR = 60 * 60
+    DAY = 24 * 60 * 60
+    RESOLUTIONS = [
+        (MINUTE, '1 minute'),
+        (HOUR, '1 hour'),
+        (DAY, '1 day'),
+    ]
+    
+    pk = models.CompositePrimaryKey('asset', 'metric', 'resolution', 'bucket')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='+', db_index=False)
+    metric = models.ForeignKey(Metric, on_delete=models.PROTECT, related_name='+', db_index=False)
+    resolution = models.PositiveIntegerField(choices=RESOLUTIONS, help_text="Bucket length in seconds")
+    bucket = models.DateTimeField(help_text="Start of the bucket")
+    count = models.PositiveIntegerField()
+    sum = models.FloatField()
+    min = models.FloatField()
+    max = models.FloatField()
+    
+    class Meta:
+        indexes = [
+            # Coarser roll-ups and retention scan one resolution by time
+            models.Index(fields=['resolution', 'bucket'], name='telemetry_rollup_bucket'),
+        ]
+
+    @property
+    def avg(self):
+        return self.sum / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.asset_id}/{self.metric_id} {self.get_resolution_display()} @ {self.bucket:%Y-%m-%d %H:%M}"
+
+class RollupWatermark(models.Model):
+    """
+    How far each resolution has been rolled up: every bucket starting before
+    processed_until is complete. Moved back when late readings arrive.
+    """
+    resolution = models.PositiveIntegerField(primary_key=True, choices=Rollup.RESOLUTIONS)
+    processed_until = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = "Roll-up Watermark"
+        verbose_name_plural = "Roll-up Watermarks"
+
+    def __str__(self):
+        return f"{self.get_resolution_display()} until {self.processed_until:%Y-%m-%d %H:%M}"
+
+class ThresholdRule(models.Model):
+    """
+    An alert threshold for one metric on every asset of a type, e.g. supply
+    air temperature above 27 °C on cooling units, or load above 90 % on UPSs.
+
+    Hysteresis: an alert is raised after `consecutive` readings past the
+    threshold and cleared only after as many readings back past
+    clear_threshold (the threshold itself if empty), so a value hovering
+    around the threshold does not raise an alert on every reading.
+    On/off signals such as "on battery" are metrics with values 0 and 1.
+    """
+    COMPARISON_CHOICES = [
+        ('above', 'Above'),
+        ('below', 'Below'),
+    ]
+    
+    SEVERITY_CHOICES = [
+        ('warning', 'Warning'),
+        ('critical', 'Critical'),
+    ]
+    
+    name = models.CharField(max_length=100, help_text="Short description used in alerts (e.g., High supply air temperature)")
+    asset_type = models.ForeignKey(AssetType, on_delete=models.CASCADE, related_name='threshold_rules')
+    metric = models.ForeignKey(Metric, on_delete=models.CASCADE, related_name='threshold_rules')
+    comparison = models.CharField(max_length=10, choices=COMPARISON_CHOICES, default='above')
+    threshold = models.FloatField(help_text="Value past which the alert is raised")
+    clear_threshold = models.FloatField(null=True, blank=True, help_text="Value back past which the alert clears (defaults to the threshold)")
+    consecutive = models.PositiveIntegerField(default=3, help_text="Readings in a row needed to raise or clear the alert")
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default='warning')
+    mark_faulty = models.BooleanField(default=False, help_text="Set the asset's status to Faulty when the alert is raised")
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        ordering = ['asset_type', 'metric', 'threshold']
+        verbose_name = "Threshold Rule"
+        verbose_name_plural = "Threshold Rules"
+
+    def __str__(self):
+        return f"{self.asset_type}: {self.metric.name} {self.comparison} {self.threshold:g}"
+
+    def is_breached(self, value):
+        return value > self.threshold if self.comparison == 'above' else value < self.threshold
+
+    def is_cleared(self, value):
+        level = self.threshold if self.clear_threshold is None else self.clear_threshold
+        return value <= level if self.comparison == 'above' else value >= level
+
+class ActiveAlert(models.Model):
+    """
+    A threshold rule currently breached by an asset. The row exists only
+    while the alert is raised; its uniqueness keeps two processes from
+    raising (and logging) the same alert twice.
+    """
+    rule = models.ForeignKey(ThresholdRule, on_delete=models.CASCADE, related_name='active_alerts')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='active_alerts')
+    value = models.FloatField(help_text="Reading that raised the alert")
+    raised_at = models.DateTimeField(help_text="Time of that reading")
+    
+    class Meta:
+        ordering = ['-raised_at']
+        verbose_name = "Active Alert"
+        verbose_name_plural = "Active Alerts"
+        constraints = [
+            models.UniqueConstraint(fields=['rule', 'asset'], name='telemetry_alert_unique_rule_asset'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id}: {self.rule.name}"
@@ -0,0 +1,183 @@
+# telemetry/rollups.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from .models import Reading, Rollup, RollupWatermark
+
+# Raw readings are kept this long (seconds) once rolled up.
+RAW_RETENTION = getattr(settings, 'TELEMETRY_RAW_RETENTION', 6 * 60 * 60)
+
+# Roll-ups are kept this long (seconds) per resolution; None keeps them forever.
+ROLLUP_RETENTION = getattr(settings, 'TELEMETRY_ROLLUP_RETENTION', {
+    Rollup.MINUTE: 2 * 24 * 60 * 60,
+    Rollup.HOUR: 90 * 24 * 60 * 60,
+    Rollup.DAY: None,
+})
+
+# A minute is rolled up this many seconds after it ends, so readings that
+# arrive a little late still make it into their bucket.
+LATENESS = getattr(settings, 'TELEMETRY_LATENESS', 30)
+
+# Each resolution is built from the one before it; 1 minute from raw readings (None).
+SOURCES = {
+    Rollup.MINUTE: None,
+    Rollup.HOUR: Rollup.MINUTE,
+    Rollup.DAY: Rollup.HOUR,
+}
+
+
+def floor_time(value, resolution):
+    """Start of the resolution-second bucket containing value; buckets are aligned to UTC"""
+    seconds = int(value.timestamp()) // resolution * resolution
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+def get_watermarks():
+    """Return {resolution: processed_until}; None for resolutions never rolled up"""
+    watermarks = dict.fromkeys(SOURCES)
+    watermarks.update(RollupWatermark.objects.values_list('resolution', 'processed_until'))
+    return watermarks
+
+
+def rewind_watermarks(earliest):
+    """
+    Move the watermarks back so the buckets containing earliest are rolled
+    up again, at every resolution. Called when late readings are stored.
+    """
+    for resolution in SOURCES:
+        bucket = floor_time(earliest, resolution)
+        RollupWatermark.objects.filter(resolution=resolution, processed_until__gt=bucket).update(processed_until=bucket)
+
+
+def source_rows(resolution):
+    """
+    Return (queryset, time field, aggregates) that build one bucket of a
+    resolution, grouped by asset and metric.
+    """
+    source = SOURCES[resolution]
+    if source is None:
+        return Reading.objects.all(), 'ts', {
+            'count': Count('value'), 'sum': Sum('value'), 'min': Min('value'), 'max': Max('value'),
+        }
+    return Rollup.objects.filter(resolution=source), 'bucket', {
+        'count': Sum('count'), 'sum': Sum('sum'), 'min': Min('min'), 'max': Max('max'),
+    }
+
+
+class RollupResult:
+    """
+    Outcome of a roll-up run: buckets and rows written per resolution, and rows purged.
+    """
+    def __init__(self):
+        self.buckets = dict.fromkeys(SOURCES, 0)
+        self.rows = dict.fromkeys(SOURCES, 0)
+        self.purged = {}
+
+
+def roll_up(now=None, result=None):
+    """
+    Roll up every complete bucket since the last run, finest resolution first.
+
+    A bucket is aggregated from its source (raw readings, or the roll-ups of
+    the resolution below) with one grouped query and upserted, so a bucket
+    rolled up again after late readings is replaced rather than added to.
+    Each bucket commits together with its watermark, so an interrupted run
+    continues where it stopped. Gaps without data are skipped with one
+    indexed lookup instead of visiting every empty bucket.
+    """
+    now = now or timezone.now()
+    result = result or RollupResult()
+    watermarks = get_watermarks()
+
+    for resolution, source in SOURCES.items():
+        if source is None:
+            limit = floor_time(now - timedelta(seconds=LATENESS), resolution)
+        elif watermarks[source] is None:
+            break
+        else:
+            # A coarser bucket is complete once the resolution below has passed its end
+            limit = floor_time(watermarks[source], resolution)
+
+        queryset, time_field, aggregates = source_rows(resolution)
+        start = watermarks[resolution]
+        if start is None:
+            first = queryset.order_by(time_field).values_list(time_field, flat=True).first()
+            if first is None:
+                continue
+            start = floor_time(first, resolution)
+            start = RollupWatermark.objects.get_or_create(
+                resolution=resolution, defaults={'processed_until': start}
+            )[0].processed_until
+
+        step = timedelta(seconds=resolution)
+        while start < limit:
+            end = start + step
+            rows = list(
+                queryset.filter(**{f'{time_field}__gte': start, f'{time_field}__lt': end})
+                .order_by()
+                .values('asset_id', 'metric_id')
+                .annotate(**aggregates)
+            )
+            if not rows:
+                # Jump to the bucket of the next source row, if any is complete
+                following = (
+                    queryset.filter(**{f'{time_field}__gte': end})
+                    .order_by(time_field).values_list(time_field, flat=True).first()
+                )
+                end = min(floor_time(following, resolution), limit) if following else limit
+            with transaction.atomic():
+                if rows:
+                    Rollup.objects.bulk_create(
+                        [Rollup(resolution=resolution, bucket=start, **row) for row in rows],
+                        update_conflicts=True,
+                        unique_fields=['asset', 'metric', 'resolution', 'bucket'],
+                        update_fields=['count', 'sum', 'min', 'max'],
+                        batch_size=1000,
+                    )
+                    result.buckets[resolution] += 1
+                    result.rows[resolution] += len(rows)
+                # Only advance if ingest has not moved the watermark back meanwhile
+                advanced = RollupWatermark.objects.filter(
+                    resolution=resolution, processed_until=start
+                ).update(processed_until=end)
+            if advanced:
+                start = end
+            else:
+                start = RollupWatermark.objects.get(resolution=resolution).processed_until
+        watermarks[resolution] = start
+    return result
+
+
+def purge(now=None, result=None):
+    """
+    Delete raw readings and roll-ups past their retention. Data that has not
+    been rolled up into the next resolution yet is kept regardless.
+    """
+    now = now or timezone.now()
+    result = result or RollupResult()
+    watermarks = get_watermarks()
+
+    def cutoff(retention, watermark):
+        if retention is None or watermark is None:
+            return None
+        return min(floor_time(now - timedelta(seconds=retention), Rollup.MINUTE), watermark)
+
+    raw_cutoff = cutoff(RAW_RETENTION, watermarks[Rollup.MINUTE])
+    if raw_cutoff is not None:
+        result.purged['raw'], _ = Reading.objects.filter(ts__lt=raw_cutoff).delete()
+
+    coarser = {source: resolution for resolution, source in SOURCES.items() if source is not None}
+    for resolution in SOURCES:
+        # The coarsest resolution has no next one to wait for
+        watermark = watermarks.get(coarser[resolution]) if resolution in coarser else now
+        resolution_cutoff = cutoff(ROLLUP_RETENTION.get(resolution), watermark)
+        if resolution_cutoff is not None:
+            result.purged[resolution], _ = Rollup.objects.filter(
+                resolution=resolution, bucket__lt=resolution_cutoff
+            ).delete()
+    return result
@@ -0,0 +1,151 @@
+# telemetry/series.py
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Metric, Reading, Rollup
+from .rollups import ROLLUP_RETENTION, floor_time, get_watermarks
+
+# Default number of points a series is downsampled to, about one per pixel column of a chart.
+DEFAULT_MAX_POINTS = 300
+
+# Finest first
+RESOLUTIONS = [resolution for resolution, _ in Rollup.RESOLUTIONS]
+
+
+def choose_resolution(start, end, max_points=DEFAULT_MAX_POINTS, now=None):
+    """
+    The finest resolution giving at most max_points buckets between start
+    and end whose roll-ups are still kept at start.
+    """
+    now = now or timezone.now()
+    span = (end - start).total_seconds()
+    for resolution in RESOLUTIONS:
+        retention = ROLLUP_RETENTION.get(resolution)
+        if span / resolution <= max_points and (retention is None or start >= now - timedelta(seconds=retention)):
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def source_ranges(resolution, start, end, watermarks, include_raw=True):
+    """
+    Split [start, end) into (source, from, to) ranges: the roll-ups of the
+    resolution up to its watermark, then each finer resolution up to its
+    own, then raw readings (source None) for the minutes not rolled up yet.
+    """
+    ranges = []
+    cursor = start
+    for source in reversed([r for r in RESOLUTIONS if r <= resolution]):
+        watermark = watermarks.get(source)
+        if cursor >= end:
+            return ranges
+        if watermark is not None and watermark > cursor:
+            until = min(watermark, end)
+            ranges.append((source, cursor, until))
+            cursor = until
+    if include_raw and cursor < end:
+        ranges.append((None, cursor, end))
+    return ranges
+
+
+def fetch_rows(asset_id, source, start, end, metric_id=None):
+    """Return (metric_id, time, count, sum, min, max) rows of one source range, for one or all metrics"""
+    metric_filter = {'metric_id': metric_id} if metric_id is not None else {}
+    if source is None:
+        readings = Reading.objects.filter(
+            asset_id=asset_id, ts__gte=start, ts__lt=end, **metric_filter
+        ).values_list('metric_id', 'ts', 'value')
+        return [(metric, ts, 1, value, value, value) for metric, ts, value in readings]
+    return list(Rollup.objects.filter(
+        asset_id=asset_id, resolution=source, bucket__gte=start, bucket__lt=end, **metric_filter
+    ).values_list('metric_id', 'bucket', 'count', 'sum', 'min', 'max'))
+
+
+def merge(aggregate, count, total, minimum, maximum):
+    """Combine a row into a [count, sum, min, max] aggregate"""
+    if aggregate is None:
+        return [count, total, minimum, maximum]
+    aggregate[0] += count
+    aggregate[1] += total
+    aggregate[2] = min(aggregate[2], minimum)
+    aggregate[3] = max(aggregate[3], maximum)
+    return aggregate
+
+
+def get_series(asset, metric, start, end, max_points=DEFAULT_MAX_POINTS, resolution=None):
+    """
+    Return a metric's values for an asset between start and end, downsampled
+    to at most about max_points buckets:
+
+        {'metric': ..., 'unit': ..., 'resolution': seconds,
+         'points': [{'t': bucket start, 'avg', 'min', 'max', 'count'}, ...]}
+
+    Reads the roll-ups of the chosen resolution; only the buckets after its
+    watermark are combined from finer roll-ups and the latest raw readings.
+    """
+    resolution = resolution or choose_resolution(start, end, max_points)
+    start = floor_time(start, resolution)
+    buckets = {}
+    for source, range_start, range_end in source_ranges(resolution, start, end, get_watermarks()):
+        for _, time, *values in fetch_rows(asset.pk, source, range_start, range_end, metric.pk):
+            bucket = floor_time(time, resolution)
+            buckets[bucket] = merge(buckets.get(bucket), *values)
+
+    return {
+        'metric': metric.name,
+        'unit': metric.unit,
+        'resolution': resolution,
+        'points': [
+            {'t': bucket, 'avg': total / count, 'min': minimum, 'max': maximum, 'count': count}
+            for bucket, (count, total, minimum, maximum) in sorted(buckets.items())
+        ],
+    }
+
+
+def get_asset_telemetry_summary(asset, hours=24):
+    """
+    Return the latest 1-minute average and the min/avg/max over the last
+    hours of every metric an asset reported in that time, from roll-ups only:
+
+        [{'metric': Metric, 'latest': float, 'latest_at': datetime,
+          'min': float, 'avg': float, 'max': float}, ...]
+
+    Hourly roll-ups cover most of the window and 1-minute roll-ups the rest,
+    so at most a few hundred rows are read per asset. Raw readings newer
+    than the last roll-up run are left out, which keeps the result (and the
+    asset detail page's ETag) unchanged between runs.
+    """
+    watermarks = get_watermarks()
+    minute_watermark = watermarks[Rollup.MINUTE]
+    if minute_watermark is None:
+        return []
+    start = floor_time(minute_watermark - timedelta(hours=hours), Rollup.HOUR)
+
+    totals = {}
+    latest = {}
+    ranges = source_ranges(Rollup.HOUR, start, minute_watermark, watermarks, include_raw=False)
+    for source, range_start, range_end in ranges:
+        for metric_id, time, *values in fetch_rows(asset.pk, source, range_start, range_end):
+            totals[metric_id] = merge(totals.get(metric_id), *values)
+    # The last minutes are read at 1-minute resolution even where hourly roll-ups cover them
+    latest_rows = fetch_rows(
+        asset.pk, Rollup.MINUTE, minute_watermark - timedelta(minutes=10), minute_watermark
+    )
+    for metric_id, time, count, total, _, _ in sorted(latest_rows, key=lambda row: row[1]):
+        latest[metric_id] = (total / count, time)
+
+    metrics = Metric.objects.in_bulk(list(totals))
+    summary = []
+    for metric_id, (count, total, minimum, maximum) in totals.items():
+        value, latest_at = latest.get(metric_id, (None, None))
+        summary.append({
+            'metric': metrics[metric_id],
+            'latest': value,
+            'latest_at': latest_at,
+            'min': minimum,
+            'avg': total / count,
+            'max': maximum,
+        })
+    summary.sort(key=lambda row: row['metric'].name)
+    return summary
@@ -0,0 +1,18 @@
+# telemetry/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from assets.models import Asset
+from .models import ThresholdRule
+
+@receiver([post_save, post_delete], sender=Asset)
+def invalidate_asset_maps(sender, instance, **kwargs):
+    # Imported here so loading the app does not import the ingest lookups
+    from .lookups import asset_tag_map, asset_type_map
+    asset_tag_map.invalidate()
+    asset_type_map.invalidate()
+
+@receiver([post_save, post_delete], sender=ThresholdRule)
+def reload_alert_rules(sender, instance, **kwargs):
+    from .alerts import alert_engine
+    alert_engine.invalidate()
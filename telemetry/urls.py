@@ -0,0 +1,13 @@
+# telemetry/urls.py
+
+from django.urls import path
+from . import views
+
+# URL patterns for the Telemetry application
+# These will be prefixed with 'telemetry/' when included in the main project URLs
+
+urlpatterns = [
+    # API endpoints
+    path('api/ingest/', views.ingest, name='telemetry_ingest'),
+    path('api/assets/<str:asset_tag>/series/', views.asset_series, name='asset_series'),
+]
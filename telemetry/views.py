@@ -0,0 +1,137 @@
+# telemetry/views.py
+
+import hmac
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import RequestDataTooBig
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from assets.models import Asset
+from core.routers import replica_safe
+from .buffer import ingest_buffer
+from .frames import FRAME_CONTENT_TYPE, FrameError, decode_frame, decode_jsonl
+from .ingest import parse_timestamp, prepare_readings
+from .models import Metric
+from .series import DEFAULT_MAX_POINTS, get_series
+
+# Upper limits for the series endpoint's ?points= and ?hours=.
+MAX_POINTS = 2000
+MAX_HOURS = 366 * 24
+
+# Rejected readings listed in an ingest response; the rest are only counted.
+MAX_REPORTED_ERRORS = 20
+
+# A "+02:00" offset left unencoded in a query string arrives as " 02:00"
+DECODED_PLUS_OFFSET = re.compile(r'(T\d\d:\d\d(?::\d\d(?:\.\d+)?)?) (\d\d(?::?\d\d)?)$')
+
+
+def has_ingest_token(request):
+    """Whether the request carries one of TELEMETRY_INGEST_TOKENS as 'Authorization: Bearer <token>'"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(
+        hmac.compare_digest(token.encode(), valid.encode())
+        for valid in getattr(settings, 'TELEMETRY_INGEST_TOKENS', [])
+    )
+
+@csrf_exempt
+@require_POST
+def ingest(request):
+    """
+    Ingest endpoint for the BMS gateways: accepts a batch of readings as JSON
+    Lines or a binary frame (see telemetry/frames.py) and queues them for
+    writing, answering 202 Accepted with the number accepted and the first
+    rejected readings. Answers 429 with Retry-After while the write queue is
+    full, so gateways hold on to their readings and resend them.
+    Authenticated with a token from TELEMETRY_INGEST_TOKENS.
+    """
+    if not has_ingest_token(request):
+        return JsonResponse({'error': 'Invalid or missing ingest token'}, status=401)
+    
+    # Refuse before parsing: under backpressure the CPU is better spent flushing
+    if ingest_buffer.full:
+        return too_many_requests()
+    
+    try:
+        body = request.body
+    except RequestDataTooBig:
+        return JsonResponse({'error': 'Batch too large; send smaller batches'}, status=413)
+    
+    if request.content_type == FRAME_CONTENT_TYPE:
+        try:
+            readings = decode_frame(body)
+        except FrameError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+    else:
+        readings = decode_jsonl(body)
+    
+    rows, errors = prepare_readings(readings)
+    if not ingest_buffer.offer(rows):
+        return too_many_requests()
+    
+    return JsonResponse({
+        'accepted': len(rows),
+        'rejected': len(errors),
+        'errors': [{'index': index, 'error': message} for index, message in sorted(errors)[:MAX_REPORTED_ERRORS]],
+    }, status=202)
+
+def query_timestamp(value):
+    """A timestamp from a query parameter: Unix seconds or ISO 8601, else None"""
+    value = value.strip()
+    try:
+        return parse_timestamp(float(value))
+    except ValueError:
+        return parse_timestamp(DECODED_PLUS_OFFSET.sub(r'\1+\2', value))
+
+def too_many_requests():
+    response = JsonResponse({'error': 'Ingest queue full; retry later'}, status=429)
+    response['Retry-After'] = str(ingest_buffer.retry_after())
+    return response
+
+@login_required
+@replica_safe
+def asset_series(request, asset_tag):
+    """
+    API endpoint returning one metric of an asset as a downsampled time series.
+    Query with ?metric=<name> and either ?hours=<n> (default 24) or
+    ?start=...&end=... (ISO 8601 or Unix seconds); ?points=<n> caps the
+    number of buckets, which picks the 1 minute, 1 hour or 1 day roll-ups.
+    """
+    asset = get_object_or_404(Asset, asset_tag=asset_tag)
+    metric = get_object_or_404(Metric, name=request.GET.get('metric', ''))
+    
+    end = timezone.now()
+    if request.GET.get('start'):
+        start = query_timestamp(request.GET['start'])
+        if request.GET.get('end'):
+            end = query_timestamp(request.GET['end'])
+        if start is None or end is None or start >= end:
+            return JsonResponse({'error': 'Invalid start or end'}, status=400)
+    else:
+        try:
+            hours = min(float(request.GET.get('hours', 24)), MAX_HOURS)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid hours'}, status=400)
+        if not hours > 0:
+            return JsonResponse({'error': 'Invalid hours'}, status=400)
+        start = end - timedelta(hours=hours)
+    
+    try:
+        max_points = min(int(request.GET.get('points', DEFAULT_MAX_POINTS)), MAX_POINTS)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid points'}, status=400)
+    if max_points < 1:
+        return JsonResponse({'error': 'Invalid points'}, status=400)
+    
+    series = get_series(asset, metric, start, end, max_points)
+    series['asset'] = asset.asset_tag
+    
+    return JsonResponse(series)
@@ -49,6 +49,7 @@ class CustomUserAdmin(UserAdmin):
             'fields': (
                 'login_time',
                 'logout_time',
+                'last_seen',
             ),
         }),
     )
@@ -59,7 +60,7 @@ admin.site.register(CustomUser, CustomUserAdmin)
 # Register the Location and Certification models so they can be managed in the admin.
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    list_display = ('name', 'country')
+    list_display = ('name', 'country', 'latitude', 'longitude')
     search_fields = ('name', 'country')
 
 @admin.register(Certification)
@@ -0,0 +1,184 @@
+# users/geo.py
+
+import math
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from .models import Location
+
+# Geohash alphabet, in sort order: a geohash cell's sub-cells sort together,
+# so every location inside a cell is one index range on Location.geohash.
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Characters stored per location (about 37 mm × 19 mm cells).
+GEOHASH_PRECISION = 12
+
+# Geohash cells a radius query reads at most, each an index range on
+# Location.geohash (adjacent ones merged). More cells fit the circle closer.
+MAX_CELLS = 32
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Search radius of the nearby APIs when none is given, and the largest allowed
+# (half the Earth's circumference: everywhere).
+DEFAULT_RADIUS_KM = getattr(settings, 'GEO_DEFAULT_RADIUS_KM', 500)
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point: longitude and latitude bits interleaved, five to a character"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        coordinate, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            bounds[0] = middle
+        else:
+            value *= 2
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Height and width in degrees of a geohash cell of the given length"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def covering_ranges(latitude, longitude, radius_km):
+    """
+    Geohash ranges [start, end) that together cover the circle's bounding
+    box: the box is tiled with the smallest cells that keep the tiles to
+    MAX_CELLS, and cells next to each other in geohash order are merged
+    into one range. Returns [] if the circle is too big for that (a
+    whole-table scan is as good).
+    """
+    lat_degrees = radius_km / KM_PER_DEGREE
+    cos_latitude = math.cos(math.radians(min(abs(latitude) + lat_degrees, 90.0)))
+    lng_degrees = radius_km / KM_PER_DEGREE / cos_latitude if cos_latitude > 0.01 else 360.0
+    south, north = max(latitude - lat_degrees, -90.0), min(latitude + lat_degrees, 90.0)
+    if lng_degrees >= 180:
+        west, width = -180.0, 360.0
+    else:
+        west, width = longitude - lng_degrees, 2 * lng_degrees
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = cell_size(precision)
+        rows = math.floor((north + 90) / cell_lat) - math.floor((south + 90) / cell_lat) + 1
+        columns = min(math.floor(width / cell_lng) + 2, round(360 / cell_lng))
+        if rows * columns <= MAX_CELLS:
+            break
+    else:
+        return []
+
+    # The centre of each cell overlapping the box
+    first_row = math.floor((south + 90) / cell_lat)
+    first_column = math.floor((west + 180) / cell_lng)
+    cells = set()
+    for row in range(rows):
+        lat = min((first_row + row + 0.5) * cell_lat - 90, 90.0)
+        for column in range(columns):
+            lng = ((first_column + column + 0.5) * cell_lng) % 360 - 180
+            cells.add(encode_geohash(lat, lng, precision))
+
+    ranges = []
+    for cell in sorted(cells):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = next_geohash(cell)
+        else:
+            ranges.append([cell, next_geohash(cell)])
+    return ranges
+
+
+def next_geohash(cell):
+    """The geohash sorting right after every geohash starting with cell, for range ends"""
+    for position in range(len(cell) - 1, -1, -1):
+        index = GEOHASH_ALPHABET.index(cell[position])
+        if index < len(GEOHASH_ALPHABET) - 1:
+            return cell[:position] + GEOHASH_ALPHABET[index + 1]
+    # Past the last cell
+    return '~'
+
+
+def locations_within(latitude, longitude, radius_km, queryset=None):
+    """
+    Locations within radius_km of a point, nearest first, as a list of
+    (location, distance in km). Candidates are read by geohash ranges on
+    the indexed geohash column, then measured exactly.
+    """
+    locations = (queryset if queryset is not None else Location.objects.all()).exclude(geohash='')
+    ranges = covering_ranges(latitude, longitude, radius_km)
+    if ranges:
+        locations = locations.filter(reduce(operator.or_, (
+            Q(geohash__gte=start, geohash__lt=end) for start, end in ranges
+        )))
+
+    found = []
+    for location in locations:
+        distance = distance_km(latitude, longitude, location.latitude, location.longitude)
+        if distance <= radius_km:
+            found.append((location, distance))
+    found.sort(key=lambda item: item[1])
+    return found
+
+
+def locations_near(location, radius_km):
+    """Locations within radius_km of a location, itself included, nearest first"""
+    if location is None or location.latitude is None or location.longitude is None:
+        return [(location, 0.0)] if location else []
+    return locations_within(location.latitude, location.longitude, radius_km)
+
+
+def parse_center(params, location_param='location'):
+    """
+    The point a nearby query is centred on, from ?location=<name or id>
+    (or another parameter name) or ?lat=&lng=. Returns (latitude, longitude,
+    location or None). Raises ValueError with a message for the client if
+    neither is usable.
+    """
+    if params.get(location_param):
+        value = params[location_param]
+        locations = Location.objects.filter(pk=int(value)) if value.isdigit() else Location.objects.filter(name__iexact=value)
+        location = locations.first()
+        if location is None:
+            raise ValueError(f'Unknown location {value}')
+        if location.latitude is None or location.longitude is None:
+            raise ValueError(f'{location.name} has no coordinates')
+        return location.latitude, location.longitude, location
+    try:
+        latitude, longitude = float(params['lat']), float(params['lng'])
+    except (KeyError, ValueError):
+        raise ValueError(f'Give ?{location_param}=<name or id>, or ?lat= and ?lng= in decimal degrees')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('lat must be within -90..90 and lng within -180..180')
+    return latitude, longitude, None
+
+
+def parse_radius(params, default=DEFAULT_RADIUS_KM):
+    """?radius_km= as a positive number, or the default. Raises ValueError"""
+    try:
+        radius_km = float(params.get('radius_km') or default)
+    except ValueError:
+        raise ValueError('radius_km must be a number')
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f'radius_km must be above 0 and at most {MAX_RADIUS_KM:g}')
+    return radius_km
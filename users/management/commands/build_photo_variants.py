@@ -0,0 +1,37 @@
+# users/management/commands/build_photo_variants.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.models import CustomUser
+from users.photos import process_photo
+
+
+class Command(BaseCommand):
+    help = 'Build the resized variants of profile photos that have none yet (e.g. uploaded before they existed)'
+    # Run from cron and scripts; skip the system checks, which import every view and form
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every photo, e.g. after changing USER_PHOTO_SIZES')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users = CustomUser.objects.exclude(photo='').exclude(photo__isnull=True)
+        if not options['all']:
+            users = users.filter(photo_hash='')
+
+        built = failed = 0
+        for user_id, name in users.values_list('pk', 'photo').iterator():
+            try:
+                process_photo(user_id, name)
+                built += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'{name}: {e}'))
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f'Built the variants of {built} photo{"s" if built != 1 else ""} in {elapsed:.2f}s'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} could not be read'))
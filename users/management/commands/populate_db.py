@@ -8,11 +8,14 @@ from users.models import CustomUser, Location, Certification # CORRECTED: 'Users
 # --- Data for Population ---
 
 LOCATIONS_DATA = [
-    ("Kampala", "Uganda"), ("Nairobi", "Kenya"), ("Kigali", "Rwanda"),
-    ("Dar es Salaam", "Tanzania"), ("Addis Ababa", "Ethiopia"), ("Lagos", "Nigeria"),
-    ("Accra", "Ghana"), ("Johannesburg", "South Africa"), ("Cape Town", "South Africa"),
-    ("Cairo", "Egypt"), ("Casablanca", "Morocco"), ("Algiers", "Algeria"),
-    ("Dakar", "Senegal"), ("Abidjan", "Côte d'Ivoire"), ("Kinshasa", "DR Congo")
+    ("Kampala", "Uganda", 0.3476, 32.5825), ("Nairobi", "Kenya", -1.2921, 36.8219),
+    ("Kigali", "Rwanda", -1.9441, 30.0619), ("Dar es Salaam", "Tanzania", -6.7924, 39.2083),
+    ("Addis Ababa", "Ethiopia", 8.9806, 38.7578), ("Lagos", "Nigeria", 6.5244, 3.3792),
+    ("Accra", "Ghana", 5.6037, -0.1870), ("Johannesburg", "South Africa", -26.2041, 28.0473),
+    ("Cape Town", "South Africa", -33.9249, 18.4241), ("Cairo", "Egypt", 30.0444, 31.2357),
+    ("Casablanca", "Morocco", 33.5731, -7.5898), ("Algiers", "Algeria", 36.7538, 3.0588),
+    ("Dakar", "Senegal", 14.7167, -17.4677), ("Abidjan", "Côte d'Ivoire", 5.3600, -4.0083),
+    ("Kinshasa", "DR Congo", -4.4419, 15.2663)
 ]
 
 CERTIFICATIONS_DATA = [
@@ -52,8 +55,10 @@ class Command(BaseCommand):
 
         # --- Create Locations ---
         locations = []
-        for name, country in LOCATIONS_DATA:
-            location, _ = Location.objects.get_or_create(name=name, country=country)
+        for name, country, latitude, longitude in LOCATIONS_DATA:
+            location, _ = Location.objects.get_or_create(
+                name=name, country=country, defaults={'latitude': latitude, 'longitude': longitude}
+            )
             locations.append(location)
         self.stdout.write(self.style.SUCCESS(f"Successfully created {len(locations)} locations."))
 
@@ -0,0 +1,21 @@
+# users/middleware.py
+
+from .presence import last_seen_buffer
+
+class LastSeenMiddleware:
+    """
+    Records when authenticated users were last active.
+    Timestamps are buffered in memory and written in batches by the presence module.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        
+        # Checked after the view so logins and logouts in this request are reflected
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            last_seen_buffer.touch(user.pk)
+        
+        return response
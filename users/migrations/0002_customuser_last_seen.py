@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, help_text='Last time the user made a request (updated in batches)', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:44
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Decimal degrees, e.g., 0.3476', null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Decimal degrees, e.g., 32.5825', null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_location_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='photo_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
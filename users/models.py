@@ -1,6 +1,7 @@
 # Users/models.py
 
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 class Location(models.Model):
@@ -11,10 +12,32 @@ class Location(models.Model):
     """
     name = models.CharField(max_length=100, unique=True, help_text="The name of the datacenter location, e.g., Kampala, Nairobi")
     country = models.CharField(max_length=100, help_text="The country where the datacenter is located")
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        help_text="Decimal degrees, e.g., 0.3476"
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)],
+        help_text="Decimal degrees, e.g., 32.5825"
+    )
+    # Set from the coordinates on save; radius queries read it by prefix range (see users/geo.py)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     def __str__(self):
         return f"{self.name}, {self.country}"
 
+    def save(self, *args, **kwargs):
+        # Imported here because users.geo imports this module
+        from .geo import encode_geohash
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
 class Certification(models.Model):
     """
     This model stores the different types of certifications an employee can have.
@@ -60,12 +83,24 @@ class CustomUser(AbstractUser):
     # System Interaction Tracking
     login_time = models.DateTimeField(null=True, blank=True, help_text="Recorded system login timestamp")
     logout_time = models.DateTimeField(null=True, blank=True, help_text="Recorded system logout timestamp")
+    last_seen = models.DateTimeField(null=True, blank=True, help_text="Last time the user made a request (updated in batches)")
 
     # Profile Media
     photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True, help_text="Profile photo")
+    # Names the photo's resized variants (see users/photos.py); empty until they are built
+    photo_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     def __str__(self):
         return self.username
 
+    @property
+    def photo_urls(self):
+        """URLs of the photo's variants for templates, e.g. user.photo_urls.small.webp"""
+        if not self.photo:
+            return None
+        # Imported here so that loading the models does not load Pillow
+        from .photos import photo_urls
+        return photo_urls(self.photo.name, self.photo_hash)
+
 
 
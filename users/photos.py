@@ -0,0 +1,174 @@
+# users/photos.py
+
+import atexit
+import hashlib
+import io
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Square variants built from every profile photo: name → side in pixels.
+# Pages pick the one for their display size (small at 1x and medium at 2x
+# for the 80px avatars).
+PHOTO_SIZES = getattr(settings, 'USER_PHOTO_SIZES', {'small': 96, 'medium': 192, 'large': 480})
+
+# Each variant in WebP for the browsers that take it and JPEG for the rest:
+# extension → (Pillow format, save options)
+PHOTO_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Stored next to the originals (see CustomUser.photo)
+PHOTO_DIR = 'profile_photos'
+
+# Hex digits of the original's SHA-256 naming its variants
+HASH_LENGTH = 20
+
+# Uploads queued for the worker at most; beyond this they wait for
+# "python manage.py build_photo_variants".
+QUEUE_SIZE = 1_000
+
+
+def variant_name(digest, size, extension):
+    """e.g. profile_photos/3f5a…-192.webp: named by content, so a URL never changes meaning"""
+    return f'{PHOTO_DIR}/{digest}-{size}.{extension}'
+
+
+def hash_photo(name):
+    sha = hashlib.sha256()
+    with default_storage.open(name, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:HASH_LENGTH]
+
+
+def build_variants(name):
+    """
+    Write the resized variants of a stored photo and return the hash
+    naming them. Variants already stored (the same picture uploaded again,
+    or by another user) are not rebuilt. The photo is decoded once, at
+    reduced scale when the format allows, and each size is cut from the
+    next larger one.
+    """
+    digest = hash_photo(name)
+    missing = sorted(
+        size for size in set(PHOTO_SIZES.values())
+        if not all(default_storage.exists(variant_name(digest, size, extension)) for extension in PHOTO_FORMATS)
+    )
+    if not missing:
+        return digest
+
+    with default_storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale: a 24-megapixel photo never gets decoded in full
+        image.draft('RGB', (missing[-1] * 2, missing[-1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+
+    for size in reversed(missing):
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for extension, (image_format, options) in PHOTO_FORMATS.items():
+            target = variant_name(digest, size, extension)
+            if default_storage.exists(target):
+                continue
+            content = io.BytesIO()
+            image.save(content, image_format, **options)
+            default_storage.save(target, ContentFile(content.getvalue()))
+    return digest
+
+
+def photo_urls(name, digest):
+    """
+    {variant: {'webp': url, 'jpeg': url}} for a photo, e.g.
+    photo_urls(...)['small']['webp']. Until the variants are built (empty
+    digest), every one is the original's URL.
+    """
+    if not digest:
+        url = default_storage.url(name)
+        return {variant: dict.fromkeys(PHOTO_FORMATS, url) for variant in PHOTO_SIZES}
+    return {
+        variant: {extension: default_storage.url(variant_name(digest, size, extension)) for extension in PHOTO_FORMATS}
+        for variant, size in PHOTO_SIZES.items()
+    }
+
+
+def process_photo(user_id, name):
+    """
+    Build a user's photo variants and record their hash, unless the user
+    uploaded another photo meanwhile. Returns the hash.
+    """
+    from .models import CustomUser
+    from .utils import invalidate_profiles
+    digest = build_variants(name)
+    # update(): saving the user would queue the photo again
+    if CustomUser.objects.filter(pk=user_id, photo=name).update(photo_hash=digest):
+        invalidate_profiles(user_id)
+    return digest
+
+
+class PhotoWorker:
+    """
+    Builds photo variants in a background thread, so an upload answers as
+    soon as the original is stored. Pages show the original until the
+    variants are ready, usually within a second.
+
+    Photos still queued when the process exits normally are built before
+    it does; after a crash, "manage.py build_photo_variants" catches up.
+    """
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.built = 0
+        self.failed = 0
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, user_id, name):
+        """Queue a photo; False, and nothing queued, when the queue is full"""
+        try:
+            self._queue.put_nowait((user_id, name))
+        except queue.Full:
+            logger.warning('Photo queue full; %s waits for build_photo_variants', name)
+            return False
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='user-photo-worker', daemon=True)
+                self._thread.start()
+                atexit.register(self.drain)
+        return True
+
+    def drain(self):
+        """Build everything queued now, in the calling thread"""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(*job)
+
+    def _process(self, user_id, name):
+        try:
+            process_photo(user_id, name)
+            self.built += 1
+        except Exception:
+            self.failed += 1
+            logger.exception('Building the variants of %s failed', name)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            self._process(*job)
+            if self._queue.empty():
+                # Idle: don't hold a connection between uploads
+                connection.close()
+
+
+photo_worker = PhotoWorker()
@@ -0,0 +1,374 @@
+# users/presence.py
+
+import atexit
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import CustomUser, Certification, Location
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two recorded "last seen" timestamps for the same user.
+LAST_SEEN_RESOLUTION = getattr(settings, 'PRESENCE_LAST_SEEN_RESOLUTION', 60)
+
+# Pending "last seen" timestamps are written at most this often (seconds)...
+LAST_SEEN_FLUSH_INTERVAL = getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 30)
+
+# ...or as soon as this many users are waiting to be written.
+LAST_SEEN_FLUSH_SIZE = getattr(settings, 'PRESENCE_FLUSH_SIZE', 500)
+
+# The roster picks up logins/logouts made by other processes this often (seconds)...
+ROSTER_HEARTBEAT_INTERVAL = getattr(settings, 'PRESENCE_ROSTER_HEARTBEAT', 15)
+
+# ...and is rebuilt from scratch this often, to catch any other changes.
+ROSTER_RELOAD_INTERVAL = getattr(settings, 'PRESENCE_ROSTER_RELOAD', 300)
+
+# Shift strings look like '08:00-20:00'; the colon is optional ('2000-0700')
+SHIFT_PATTERN = re.compile(r'^\s*(\d{1,2}):?(\d{2})\s*-\s*(\d{1,2}):?(\d{2})\s*$')
+ALWAYS_ON_SHIFTS = {'24/7', '24x7', '24h', '24 hours'}
+
+
+def record_login(user):
+    """
+    Mark a user as logged in and on duty.
+    Only the presence columns are written, not the whole user row.
+    """
+    user.login_time = timezone.now()
+    user.on_duty = True  # Set user as on duty when they log in
+    user.last_seen = user.login_time
+    user.save(update_fields=['login_time', 'on_duty', 'last_seen'])
+
+
+def record_logout(user):
+    """
+    Mark a user as logged out and off duty.
+    Only the presence columns are written, not the whole user row.
+    """
+    user.logout_time = timezone.now()
+    user.on_duty = False  # Set user as off duty when they log out
+    user.last_seen = user.logout_time
+    user.save(update_fields=['logout_time', 'on_duty', 'last_seen'])
+
+
+class LastSeenBuffer:
+    """
+    Collects "last seen" timestamps in memory and writes them in batches.
+
+    Recording activity on every request would add a write per request; on
+    SQLite those writes serialize on the database lock during shift-change
+    login storms. Instead each user is recorded at most once per
+    LAST_SEEN_RESOLUTION seconds, and pending timestamps are flushed with a
+    single bulk update every LAST_SEEN_FLUSH_INTERVAL seconds or
+    LAST_SEEN_FLUSH_SIZE users, whichever comes first.
+    """
+    def __init__(self, resolution=LAST_SEEN_RESOLUTION, flush_interval=LAST_SEEN_FLUSH_INTERVAL,
+                 flush_size=LAST_SEEN_FLUSH_SIZE):
+        self.resolution = resolution
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.recorded = {}  # user id -> monotonic time last recorded
+        self.last_flush = time.monotonic()
+
+    def touch(self, user_id):
+        """Record that a user was active now, flushing the buffer if it is due"""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.recorded.get(user_id, float('-inf')) < self.resolution:
+                return
+            self.recorded[user_id] = now
+            self.pending[user_id] = timezone.now()
+            due = len(self.pending) >= self.flush_size or now - self.last_flush >= self.flush_interval
+        if due:
+            # Runs after the view has answered; a busy database must not turn that into an error
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Writing last seen times failed; retrying at the next flush')
+
+    def flush(self):
+        """
+        Write all pending timestamps in one bulk update. If that fails they
+        are kept for the next flush (newer ones recorded meanwhile win).
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            return CustomUser.objects.bulk_update(
+                [CustomUser(pk=user_id, last_seen=seen) for user_id, seen in pending.items()],
+                ['last_seen'],
+            )
+        except Exception:
+            with self.lock:
+                self.pending = pending | self.pending
+            raise
+
+
+last_seen_buffer = LastSeenBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Best effort: a lost batch only means slightly stale "last seen" times
+    try:
+        last_seen_buffer.flush()
+    except Exception:
+        pass
+
+
+class ShiftWindow:
+    """
+    Daily working window parsed from a shift string such as '08:00-20:00'.
+    Windows that end before they start (e.g. '20:00-08:00') run overnight.
+    """
+    def __init__(self, start_minute, end_minute):
+        self.start_minute = start_minute
+        self.end_minute = end_minute
+
+    @property
+    def is_overnight(self):
+        return self.end_minute <= self.start_minute
+
+    def contains(self, moment):
+        """Whether a time of day (datetime.time) falls inside the window"""
+        minute = moment.hour * 60 + moment.minute
+        if self.start_minute == self.end_minute:
+            return True  # e.g. 00:00-00:00 covers the whole day
+        if self.is_overnight:
+            return minute >= self.start_minute or minute < self.end_minute
+        return self.start_minute <= minute < self.end_minute
+
+    def __repr__(self):
+        return (f"ShiftWindow({self.start_minute // 60:02d}:{self.start_minute % 60:02d}-"
+                f"{self.end_minute // 60:02d}:{self.end_minute % 60:02d})")
+
+
+ALWAYS = ShiftWindow(0, 0)
+
+
+def parse_shift(shift):
+    """
+    Parse a CustomUser.shift string into a ShiftWindow.
+    Returns ALWAYS for round-the-clock shifts ('24/7') and None when the
+    text cannot be understood.
+    """
+    if not shift:
+        return None
+    if shift.strip().lower() in ALWAYS_ON_SHIFTS:
+        return ALWAYS
+    match = SHIFT_PATTERN.match(shift)
+    if not match:
+        return None
+    start_hour, start_minute, end_hour, end_minute = (int(part) for part in match.groups())
+    if start_hour > 24 or end_hour > 24 or start_minute > 59 or end_minute > 59:
+        return None
+    return ShiftWindow((start_hour * 60 + start_minute) % 1440, (end_hour * 60 + end_minute) % 1440)
+
+
+class RosterEntry:
+    """Presence data the roster keeps for one user"""
+    def __init__(self, user_id, location_id, shift, on_duty, certification_ids):
+        self.user_id = user_id
+        self.location_id = location_id
+        self.shift = shift
+        self.on_duty = on_duty
+        self.certification_ids = set(certification_ids)
+
+
+class OnDutyRoster:
+    """
+    In-memory index of who is on duty where, with which certifications.
+
+    The roster keeps, per location, the set of users currently flagged
+    on duty, plus a certification -> users index, so "who is on duty at
+    Kampala with HVAC certification right now" is a set intersection
+    followed by a shift-window check, without touching the database.
+
+    It is kept current incrementally: user saves and certification changes
+    in this process update it through signals (see users/signals.py), a
+    cheap heartbeat query picks up logins and logouts recorded by other
+    processes, and a periodic full reload catches anything else.
+    """
+    def __init__(self, heartbeat_interval=ROSTER_HEARTBEAT_INTERVAL, reload_interval=ROSTER_RELOAD_INTERVAL):
+        self.heartbeat_interval = heartbeat_interval
+        self.reload_interval = reload_interval
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.entries = {}
+        self.on_duty_by_location = {}
+        self.users_by_certification = {}
+        self.location_ids = {}
+        self.certification_ids = {}
+        self.last_reload = 0.0
+        self.last_heartbeat = 0.0
+        self.heartbeat_since = None
+
+    # --- Loading ---
+
+    def reload(self):
+        """Rebuild the whole roster from the database (two queries plus lookups)"""
+        started_at = timezone.now()
+        users = list(CustomUser.objects.filter(is_active=True).values_list('id', 'location_id', 'shift', 'on_duty'))
+        certifications = {}
+        for user_id, certification_id in CustomUser.certifications.through.objects.values_list(
+            'customuser_id', 'certification_id'
+        ):
+            certifications.setdefault(user_id, []).append(certification_id)
+
+        with self.lock:
+            self.entries = {}
+            self.on_duty_by_location = {}
+            self.users_by_certification = {}
+            for user_id, location_id, shift, on_duty in users:
+                self._add(RosterEntry(user_id, location_id, parse_shift(shift), on_duty, certifications.get(user_id, ())))
+            self.location_ids = {name.lower(): pk for name, pk in Location.objects.values_list('name', 'id')}
+            self.certification_ids = {name.lower(): pk for name, pk in Certification.objects.values_list('name', 'id')}
+            self.loaded = True
+            self.last_reload = self.last_heartbeat = time.monotonic()
+            self.heartbeat_since = started_at
+
+    def heartbeat(self):
+        """
+        Apply logins and logouts recorded since the last heartbeat.
+        Only users whose login or logout time moved are read.
+        """
+        started_at = timezone.now()
+        changed = list(CustomUser.objects.filter(
+            Q(login_time__gte=self.heartbeat_since) | Q(logout_time__gte=self.heartbeat_since)
+        ).values_list('id', 'on_duty'))
+        with self.lock:
+            for user_id, on_duty in changed:
+                self._set_on_duty(user_id, on_duty)
+            self.last_heartbeat = time.monotonic()
+            self.heartbeat_since = started_at
+
+    def ensure_fresh(self):
+        """Load, heartbeat or reload the roster as needed before answering a query"""
+        now = time.monotonic()
+        if not self.loaded or now - self.last_reload >= self.reload_interval:
+            self.reload()
+        elif now - self.last_heartbeat >= self.heartbeat_interval:
+            self.heartbeat()
+
+    # --- Incremental updates ---
+
+    def _add(self, entry):
+        self.entries[entry.user_id] = entry
+        if entry.on_duty:
+            self.on_duty_by_location.setdefault(entry.location_id, set()).add(entry.user_id)
+        for certification_id in entry.certification_ids:
+            self.users_by_certification.setdefault(certification_id, set()).add(entry.user_id)
+
+    def _remove(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return None
+        self.on_duty_by_location.get(entry.location_id, set()).discard(user_id)
+        for certification_id in entry.certification_ids:
+            self.users_by_certification.get(certification_id, set()).discard(user_id)
+        return entry
+
+    def _set_on_duty(self, user_id, on_duty):
+        entry = self.entries.get(user_id)
+        if entry is None or entry.on_duty == on_duty:
+            return
+        entry.on_duty = on_duty
+        users = self.on_duty_by_location.setdefault(entry.location_id, set())
+        if on_duty:
+            users.add(user_id)
+        else:
+            users.discard(user_id)
+
+    def update_user(self, user):
+        """Refresh one user's entry after it was saved, keeping their certifications"""
+        if not self.loaded:
+            return
+        with self.lock:
+            previous = self._remove(user.pk)
+            if user.is_active:
+                certification_ids = previous.certification_ids if previous else ()
+                self._add(RosterEntry(user.pk, user.location_id, parse_shift(user.shift), user.on_duty, certification_ids))
+
+    def remove_user(self, user_id):
+        if not self.loaded:
+            return
+        with self.lock:
+            self._remove(user_id)
+
+    def set_certifications(self, user_id, certification_ids):
+        """Replace one user's certifications in the index"""
+        if not self.loaded:
+            return
+        with self.lock:
+            entry = self._remove(user_id)
+            if entry is not None:
+                entry.certification_ids = set(certification_ids)
+                self._add(entry)
+
+    def register_certification(self, certification):
+        if self.loaded:
+            with self.lock:
+                self.certification_ids[certification.name.lower()] = certification.pk
+
+    def register_location(self, location):
+        if self.loaded:
+            with self.lock:
+                self.location_ids[location.name.lower()] = location.pk
+
+    # --- Queries ---
+
+    def _resolve(self, value, names):
+        """Accept a model instance, a primary key or a (case-insensitive) name"""
+        if value is None or isinstance(value, int):
+            return value
+        if hasattr(value, 'pk'):
+            return value.pk
+        return names.get(str(value).lower(), -1)
+
+    def on_duty(self, location=None, certification=None, at=None, within_shift=True):
+        """
+        Return the ids of users on duty, optionally at a location and holding
+        a certification. With within_shift=True (the default) users whose
+        parsed shift does not cover the given moment (default: now) are
+        excluded; users with an unparseable shift are kept.
+        """
+        self.ensure_fresh()
+        moment = timezone.localtime(at).time() if within_shift else None
+
+        with self.lock:
+            location_id = self._resolve(location, self.location_ids)
+            certification_id = self._resolve(certification, self.certification_ids)
+
+            if location is not None:
+                candidates = self.on_duty_by_location.get(location_id, set())
+            else:
+                candidates = set().union(*self.on_duty_by_location.values())
+            if certification is not None:
+                candidates = candidates & self.users_by_certification.get(certification_id, set())
+
+            if moment is None:
+                return set(candidates)
+            return {
+                user_id for user_id in candidates
+                if self.entries[user_id].shift is None or self.entries[user_id].shift.contains(moment)
+            }
+
+    def is_on_duty(self, user_id, at=None):
+        """Whether one user is flagged on duty and inside their shift"""
+        self.ensure_fresh()
+        entry = self.entries.get(user_id)
+        if entry is None or not entry.on_duty:
+            return False
+        return entry.shift is None or entry.shift.contains(timezone.localtime(at).time())
+
+
+roster = OnDutyRoster()
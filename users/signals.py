@@ -0,0 +1,70 @@
+# users/signals.py
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import CustomUser, Certification, Location
+
+# Keep the in-memory on-duty roster and the cached profile fragments
+# in step with user changes made in this process.
+# The presence and utils modules are imported in the handlers, so that
+# loading the app (e.g. for a management command) does not import them.
+
+@receiver(post_save, sender=CustomUser)
+def update_roster_on_user_save(sender, instance, **kwargs):
+    from .presence import roster
+    roster.update_user(instance)
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_profile_on_user_save(sender, instance, **kwargs):
+    from .utils import invalidate_profiles
+    invalidate_profiles(instance.pk)
+
+@receiver(pre_save, sender=CustomUser)
+def reset_photo_variants_on_upload(sender, instance, update_fields=None, **kwargs):
+    # A new photo: its variants are not built yet, so pages show it as uploaded meanwhile
+    if update_fields is not None and 'photo' not in update_fields:
+        instance._photo_changed = False
+        return
+    previous = CustomUser.objects.filter(pk=instance.pk).values_list('photo', flat=True).first() if instance.pk else None
+    instance._photo_changed = (instance.photo.name or '') != (previous or '')
+    if instance._photo_changed:
+        instance.photo_hash = ''
+
+@receiver(post_save, sender=CustomUser)
+def build_photo_variants_on_upload(sender, instance, **kwargs):
+    if instance.photo and getattr(instance, '_photo_changed', False):
+        from .photos import photo_worker
+        user_id, name = instance.pk, instance.photo.name
+        # After the commit, so the worker reads the new photo
+        transaction.on_commit(lambda: photo_worker.submit(user_id, name))
+
+@receiver(post_delete, sender=CustomUser)
+def update_roster_on_user_delete(sender, instance, **kwargs):
+    from .presence import roster
+    roster.remove_user(instance.pk)
+
+@receiver(m2m_changed, sender=CustomUser.certifications.through)
+def update_on_certifications_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from .presence import roster
+    from .utils import invalidate_profiles
+    if reverse:
+        invalidate_profiles(*(pk_set or ()))
+        # Changed from the certification side: the affected users are not
+        # listed for post_clear, so rebuild on the next query instead.
+        roster.loaded = False
+        return
+    invalidate_profiles(instance.pk)
+    roster.set_certifications(instance.pk, instance.certifications.values_list('id', flat=True))
+
+@receiver(post_save, sender=Certification)
+def update_roster_on_certification_save(sender, instance, **kwargs):
+    from .presence import roster
+    roster.register_certification(instance)
+
+@receiver(post_save, sender=Location)
+def update_roster_on_location_save(sender, instance, **kwargs):
+    from .presence import roster
+    roster.register_location(instance)
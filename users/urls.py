@@ -24,4 +24,7 @@ urlpatterns = [
     # Navigating to '/users/profile/' will call the profile_view function.
     # We've named this 'profile'.
     path('profile/', views.profile_view, name='profile'),
+
+    # API endpoint listing who is on duty, optionally by location and certification.
+    path('api/on-duty/', views.on_duty_roster, name='on_duty_roster'),
 ]
@@ -0,0 +1,107 @@
+# users/utils.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# How long rendered profile fragments stay cached (seconds). Writes that
+# affect a profile invalidate it sooner; this bounds staleness for changes
+# made through bulk paths that bypass signals.
+PROFILE_CACHE_TIMEOUT = getattr(settings, 'PROFILE_FRAGMENT_CACHE_TIMEOUT', 600)
+
+# Number of assigned assets shown on the profile page.
+PROFILE_ASSET_LIMIT = 6
+
+# Number of recent activity entries shown on the profile page.
+PROFILE_ACTIVITY_LIMIT = 5
+
+
+def profile_version_key(user_id):
+    return f'profile-version:{user_id}'
+
+
+def get_profile_version(user_id):
+    """
+    Return the current cache version of a user's profile fragments.
+    The version is part of every fragment's cache key, so changing it
+    invalidates all of them at once without deleting anything.
+    """
+    key = profile_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_profiles(*user_ids):
+    """
+    Invalidate the cached profile fragments of the given users.
+    A fresh timestamp is written as the new version; no read is needed.
+    """
+    version = time.time_ns()
+    cache.set_many({profile_version_key(user_id): version for user_id in user_ids if user_id}, None)
+
+
+class ProfileData:
+    """
+    Loads everything the profile page shows, in a fixed number of queries.
+
+    Each section is a cached property evaluated the first time the template
+    reads it, so sections served from the fragment cache cost no queries:
+        location            1 query (skipped if already loaded)
+        certifications      1 query
+        assigned_assets     1 query (first PROFILE_ASSET_LIMIT, with asset types)
+        assigned_count      1 query
+        recent_asset_logs   1 query (with assets)
+    """
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def version(self):
+        return get_profile_version(self.user.pk)
+
+    @cached_property
+    def today(self):
+        # Part of the asset fragment key, because "maintenance due" changes with the date
+        return timezone.localdate().isoformat()
+
+    @cached_property
+    def location(self):
+        prefetch_related_objects([self.user], 'location')
+        return self.user.location
+
+    @cached_property
+    def certifications(self):
+        return list(self.user.certifications.order_by('name'))
+
+    @cached_property
+    def assigned_assets(self):
+        return list(
+            self.user.assigned_assets.select_related('asset_type').order_by('asset_tag')[:PROFILE_ASSET_LIMIT]
+        )
+
+    @cached_property
+    def assigned_count(self):
+        if len(self.assigned_assets) < PROFILE_ASSET_LIMIT:
+            return len(self.assigned_assets)
+        return self.user.assigned_assets.count()
+
+    @cached_property
+    def recent_asset_logs(self):
+        try:
+            # Import here to avoid circular imports
+            from assets.models import AssetLog
+        except ImportError:
+            # Assets app might not be available
+            return []
+        return list(
+            AssetLog.objects.filter(
+                user=self.user
+            ).select_related('asset').order_by('-timestamp')[:PROFILE_ACTIVITY_LIMIT]
+        )
@@ -4,8 +4,12 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
+from django.http import JsonResponse
+from .geo import locations_within, parse_center, parse_radius
 from .models import CustomUser
+from .photos import photo_urls
+from .presence import record_login, record_logout, roster
+from .utils import ProfileData, PROFILE_CACHE_TIMEOUT
 
 def login_view(request):
     """
@@ -26,10 +30,8 @@ def login_view(request):
             # If authentication is successful, log the user in
             login(request, user)
             
-            # Update login time
-            user.login_time = timezone.now()
-            user.on_duty = True  # Set user as on duty when they log in
-            user.save()
+            # Update login time and duty status (presence columns only)
+            record_login(user)
             
             return redirect('profile')  # Redirect to the profile page after login
         else:
@@ -49,11 +51,8 @@ def logout_view(request):
     This view logs out the current user and redirects them to the login page.
     """
     if request.user.is_authenticated:
-        # Update logout time and duty status
-        user = request.user
-        user.logout_time = timezone.now()
-        user.on_duty = False  # Set user as off duty when they log out
-        user.save()
+        # Update logout time and duty status (presence columns only)
+        record_logout(request.user)
     
     logout(request)
     return redirect('login')
@@ -71,22 +70,61 @@ def profile_view(request):
     # It contains all the information from our CustomUser model.
     user = request.user
     
-    # Get recent asset activity for this user
-    recent_asset_logs = None
-    try:
-        # Import here to avoid circular imports
-        from assets.models import AssetLog
-        recent_asset_logs = AssetLog.objects.filter(
-            user=user
-        ).select_related('asset').order_by('-timestamp')[:10]
-    except ImportError:
-        # Assets app might not be available
-        pass
-    
+    # Sections are loaded lazily by the template, so fragments served from
+    # the cache do not query the database at all.
     context = {
         'user': user,
-        'recent_asset_logs': recent_asset_logs,
+        'profile': ProfileData(user),
+        'cache_timeout': PROFILE_CACHE_TIMEOUT,
     }
     return render(request, 'users/profile.html', context)
 
 
+def with_photo(user):
+    """A roster entry with its photo as the small variant's URLs (or None), not the multi-megabyte original"""
+    name, digest = user.pop('photo'), user.pop('photo_hash')
+    user['photo'] = photo_urls(name, digest)['small'] if name else None
+    return user
+
+
+@login_required
+def on_duty_roster(request):
+    """
+    API endpoint listing the users on duty right now, for incident routing.
+    Optional filters: ?location=<name or id>&certification=<name or id>.
+    With ?near=<location name or id> (or ?lat=&lng=) and ?radius_km=, lists
+    the users on duty at every location in range instead, nearest first.
+    Answered from the in-memory presence roster; only the matching users are read.
+    """
+    location = request.GET.get('location') or None
+    certification = request.GET.get('certification') or None
+    if location and location.isdigit():
+        location = int(location)
+    if certification and certification.isdigit():
+        certification = int(certification)
+    
+    if not (request.GET.get('near') or request.GET.get('lat')):
+        user_ids = roster.on_duty(location=location, certification=certification)
+        users = CustomUser.objects.filter(pk__in=user_ids).values(
+            'id', 'username', 'full_name', 'designation', 'department', 'shift', 'location__name', 'photo', 'photo_hash'
+        ).order_by('full_name')
+        return JsonResponse({'count': len(user_ids), 'users': [with_photo(user) for user in users]})
+    
+    try:
+        latitude, longitude, _ = parse_center(request.GET, 'near')
+        radius_km = parse_radius(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    distances = {}
+    for nearby, distance in locations_within(latitude, longitude, radius_km):
+        for user_id in roster.on_duty(location=nearby.pk, certification=certification):
+            distances[user_id] = round(distance, 1)
+    users = [with_photo(user) for user in CustomUser.objects.filter(pk__in=distances).values(
+        'id', 'username', 'full_name', 'designation', 'department', 'shift', 'location__name', 'photo', 'photo_hash'
+    )]
+    for user in users:
+        user['distance_km'] = distances[user['id']]
+    users.sort(key=lambda user: (user['distance_km'], user['full_name']))
+    
+    return JsonResponse({'count': len(users), 'users': users})